@@ -1,15 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 import os
-from typing import Literal, Optional
+from typing import Annotated, Literal, Optional
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
+import bmc_health
+import capabilities
 import collector
+import events
+import http_pool
+import ipmi_shell
+import log_batch
+import log_cursor
+import log_record
+import log_segments
+import log_store
+import pipeline
+import redfish_session
+import scheduler
+import sensor_store
+import telemetry
 
 
 class ServerInput(BaseModel):
@@ -19,6 +37,11 @@ class ServerInput(BaseModel):
     password: str
 
 
+class ConnectRequest(ServerInput):
+    # Overall collection budget in seconds; defaults to TEMS_CONNECT_TIMEOUT (0 = unbounded).
+    timeout: Optional[float] = Field(default=None, gt=0)
+
+
 class HardwareInfo(BaseModel):
     model: str
     serial: str
@@ -29,7 +52,8 @@ class HardwareInfo(BaseModel):
 
 class LogEntry(BaseModel):
     timestamp: datetime
-    severity: str
+    severity: str  # canonical name: INFO, WARN, ERROR, CRITICAL
+    level: int = 0  # collector.Severity code of ``severity``
     message: str
     component: Optional[str] = None
     host: Optional[str] = None
@@ -47,18 +71,95 @@ class ConnectResponse(BaseModel):
     hardware: HardwareInfo
     logs: list[LogEntry]
     analysis: Analysis
+    complete: bool = True
+    sources: dict[str, str] = Field(default_factory=dict)
 
 
 class AnalyzeRequest(BaseModel):
     vendor: Literal["hpe", "dell", "lenovo", "supermicro", "other", "all"] = "all"
     bmc_host: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
 
 
 class AiSearchRequest(BaseModel):
     query: str
 
 
-app = FastAPI(title="Hardware Monitoring API", version="0.2.0")
+class EventSubscribeRequest(BaseModel):
+    servers: list[ServerInput]
+
+
+class TelemetryRequest(BaseModel):
+    servers: list[ServerInput]
+    stream: bool = False
+
+
+class FleetSweepRequest(BaseModel):
+    servers: list[ServerInput]
+    concurrency: Optional[int] = Field(default=None, ge=1)
+    vendor_limits: Optional[dict[str, Annotated[int, Field(ge=1)]]] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One keep-alive client pool for all BMC traffic, shared by collector and every endpoint.
+    pool = http_pool.ClientPool.from_env()
+    http_pool.set_pool(pool)
+    await pool.open()
+    app.state.http_pool = pool
+    sensors = sensor_store.get_sensor_store()
+    sensors.load()
+    pipeline.get_pipeline().add_sample_sink(sensors.ingest)
+    logs = log_store.get_log_store()
+    logs.open()
+    segments = log_segments.get_segments()
+    segments.load()
+    segments.attach(logs)  # also re-buffers rows stored but not sealed before a restart
+
+    async def persist(batch: log_batch.LogBatch, source: str) -> None:
+        # SQLite drops already-stored records; only new rows reach the append-only segments.
+        await asyncio.to_thread(segments.ingest, logs, batch, source)
+
+    pipeline.get_pipeline().add_sink(persist)
+    # Background fleet polling, only when an inventory file is configured.
+    inventory = os.environ.get("TEMS_FLEET_INVENTORY")
+    fleet = scheduler.FleetScheduler.from_env() if inventory else None
+    fleet_task = asyncio.create_task(fleet.run(lambda: scheduler.load_inventory(Path(inventory)))) if fleet else None
+    app.state.fleet = fleet
+    # Subscriptions are deleted at shutdown and live only in memory; subscribe the inventory again.
+    subscribing = (
+        asyncio.create_task(
+            events.subscribe_many([asdict(h) for h in scheduler.load_inventory(Path(inventory))], pool=pool)
+        )
+        if inventory and events.get_subscriptions().base_url
+        else None
+    )
+    try:
+        yield
+    finally:
+        if fleet_task is not None:
+            fleet.stop()
+            fleet_task.cancel()
+            await asyncio.gather(fleet_task, return_exceptions=True)
+        if subscribing is not None:
+            subscribing.cancel()
+            await asyncio.gather(subscribing, return_exceptions=True)
+        await telemetry.get_streams().stop_all()
+        pipeline.get_pipeline().remove_sample_sink(sensors.ingest)
+        sensors.save()
+        pipeline.get_pipeline().remove_sink(persist)
+        segments.flush()
+        logs.close()
+        capabilities.get_profiles().save()
+        log_cursor.get_cursors().save()
+        await events.get_subscriptions().unsubscribe_all(pool=pool)
+        await redfish_session.get_sessions().logout_all(pool)
+        await ipmi_shell.get_shells().close_all()
+        await http_pool.close_pool()
+
+
+app = FastAPI(title="Hardware Monitoring API", version="0.2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -94,23 +195,40 @@ def mock_hardware(vendor: str) -> HardwareInfo:
     )
 
 
-def mock_logs(vendor: str, host: Optional[str] = None) -> list[LogEntry]:
+def mock_logs(vendor: str, host: Optional[str] = None) -> list[collector.LogRecord]:
     now = datetime.utcnow()
     source = host or f"{vendor}-bmc"
     return [
-        LogEntry(timestamp=now, severity="INFO", message=f"[{vendor}] system OK", component="BMC", host=source, vendor=vendor),
-        LogEntry(timestamp=now, severity="WARN", message="Fan 2 speed above threshold", component="Cooling", host=source, vendor=vendor),
-        LogEntry(timestamp=now, severity="ERROR", message="PSU input unstable", component="Power", host=source, vendor=vendor),
-        LogEntry(timestamp=now, severity="INFO", message="Periodic telemetry sync", component="Agent", host=source, vendor=vendor),
-        LogEntry(timestamp=now, severity="WARN", message="Disk SMART pre-fail flagged", component="Storage", host=source, vendor=vendor),
+        collector.normalize_log(timestamp=now, host=source, vendor=vendor, service="BMC", severity=collector.Severity.INFO, message=f"[{vendor}] system OK"),
+        collector.normalize_log(timestamp=now, host=source, vendor=vendor, service="Cooling", severity=collector.Severity.WARN, message="Fan 2 speed above threshold"),
+        collector.normalize_log(timestamp=now, host=source, vendor=vendor, service="Power", severity=collector.Severity.ERROR, message="PSU input unstable"),
+        collector.normalize_log(timestamp=now, host=source, vendor=vendor, service="Agent", severity=collector.Severity.INFO, message="Periodic telemetry sync"),
+        collector.normalize_log(timestamp=now, host=source, vendor=vendor, service="Storage", severity=collector.Severity.WARN, message="Disk SMART pre-fail flagged"),
     ]
 
 
-def analyze_logs(logs: list[LogEntry]) -> Analysis:
-    if not logs:
+def log_entry(record: collector.LogRecord) -> LogEntry:
+    """API-edge conversion of a collector record."""
+    return LogEntry(
+        timestamp=log_record.utc(record.timestamp),
+        severity=record.severity.name,
+        level=int(record.severity),
+        message=record.message,
+        component=record.service,
+        host=record.host,
+        vendor=record.vendor,
+    )
+
+
+def analyze_logs(logs: log_batch.LogBatch) -> Analysis:
+    return analyze_counts(logs.severity_counts())  # one bincount over the severity codes
+
+
+def analyze_counts(counts: dict[collector.Severity, int]) -> Analysis:
+    if not any(counts.values()):
         return Analysis(risk_score=0, summary="No data", insights=["No logs to analyze"])
-    crit = sum(1 for l in logs if l.severity.upper() in {"ERROR", "CRITICAL", "FATAL"})
-    warn = sum(1 for l in logs if l.severity.upper() == "WARN")
+    crit = counts[collector.Severity.ERROR] + counts[collector.Severity.CRITICAL]
+    warn = counts[collector.Severity.WARN]
     score = min(0.2 * crit + 0.05 * warn, 1.0)
     summary = "Stable" if score < 0.3 else "Investigate power/cooling"
     notes = [f"{crit} critical/error", f"{warn} warnings"]
@@ -118,67 +236,228 @@ def analyze_logs(logs: list[LogEntry]) -> Analysis:
 
 
 @app.post("/api/connect", response_model=ConnectResponse)
-async def connect(payload: ServerInput) -> ConnectResponse:
+async def connect(payload: ConnectRequest) -> ConnectResponse:
+    sources: dict[str, str] = {}
+    complete = True
     try:
         use_real = os.environ.get("TEMS_REAL_FETCH") == "1"
         if use_real:
-            # Real fetch from BMC
-            logs_raw = await collector.collect_logs(
+            # Real fetch from BMC, bounded by the request budget; a slow BMC yields partial logs.
+            result = await collector.collect(
                 vendor=payload.vendor,
                 bmc_host=payload.bmc_host,
                 username=payload.username,
                 password=payload.password,
                 prefer_redfish=True,
+                timeout=payload.timeout or float(os.environ.get("TEMS_CONNECT_TIMEOUT", "20")) or None,
             )
-            logs = [LogEntry(**l, vendor=payload.vendor) for l in logs_raw]
+            logs, sources, complete = result.logs, result.sources, result.complete
+            await pipeline.get_pipeline().publish(logs, source="poll")
+            await pipeline.get_pipeline().publish_samples(result.samples, source="poll")
             hardware = mock_hardware(payload.vendor)
         else:
             if payload.vendor == "all":
                 vendors = ["hpe", "dell", "lenovo", "supermicro", "other"]
-                logs: list[LogEntry] = []
-                for v in vendors:
-                    logs.extend(mock_logs(v, host=f"{v}-demo"))
+                logs = log_batch.LogBatch.from_records(
+                    l for v in vendors for l in mock_logs(v, host=f"{v}-demo")
+                )
                 hardware = mock_hardware("all")
             else:
                 hardware = mock_hardware(payload.vendor)
-                logs = mock_logs(payload.vendor, host=payload.bmc_host)
+                logs = log_batch.LogBatch.from_records(mock_logs(payload.vendor, host=payload.bmc_host))
     except httpx.HTTPStatusError as exc:
         raise HTTPException(status_code=exc.response.status_code, detail="BMC auth failed")
     except httpx.RequestError:
         raise HTTPException(status_code=504, detail="BMC connection failed")
+    except bmc_health.CircuitOpen as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="BMC unreachable, backing off",
+            headers={"Retry-After": str(int(exc.retry_after) + 1)},
+        )
 
     return ConnectResponse(
         vendor=payload.vendor,
         hardware=hardware,
-        logs=logs,
+        logs=[log_entry(l) for l in logs],
         analysis=analyze_logs(logs),
+        complete=complete,
+        sources=sources,
     )
 
 
 @app.post("/api/analyze")
-async def analyze_endpoint(payload: AnalyzeRequest) -> dict:
+def analyze_endpoint(payload: AnalyzeRequest) -> dict:
+    # Plain def like /api/logs: segment scans block, so FastAPI runs this in its thread pool.
     try:
-        vendors = (
-            ["hpe", "dell", "lenovo", "supermicro", "other"]
-            if payload.vendor == "all"
-            else [payload.vendor]
-        )
-        all_logs: list[LogEntry] = []
-        for v in vendors:
-            all_logs.extend(mock_logs(v, host=payload.bmc_host or f"{v}-demo"))
-        result = analyze_logs(all_logs)
+        vendor = None if payload.vendor == "all" else payload.vendor
+        store = log_segments.get_segments()
+        filters = dict(host=payload.bmc_host, vendor=vendor, start=payload.start, end=payload.end)
+        counts = store.severity_counts(**filters)
+        if any(counts.values()):
+            # Stored logs: segments outside the range are skipped by footer, covered ones counted from it.
+            result = analyze_counts(counts)
+            evidence = store.query(**filters, min_severity=collector.Severity.WARN, limit=10)
+            count = sum(counts.values())
+        else:
+            vendors = (
+                ["hpe", "dell", "lenovo", "supermicro", "other"]
+                if payload.vendor == "all"
+                else [payload.vendor]
+            )
+            all_logs = log_batch.LogBatch.from_records(
+                l for v in vendors for l in mock_logs(v, host=payload.bmc_host or f"{v}-demo")
+            )
+            result = analyze_logs(all_logs)
+            evidence, count = all_logs.take(slice(10)), len(all_logs)
         return {
             "vendor": payload.vendor,
             "risk_score": result.risk_score,
             "summary": result.summary,
             "insights": result.insights,
-            "evidence": [f"[{l.vendor}@{l.host}] {l.severity}: {l.message}" for l in all_logs[:10]],
-            "count": len(all_logs),
+            "evidence": [f"[{l.vendor}@{l.host}] {l.severity.name}: {l.message}" for l in evidence],
+            "count": count,
         }
     except Exception:
         raise HTTPException(status_code=500, detail="analysis_failed")
 
 
+@app.post("/api/fleet/sweep")
+async def fleet_sweep(payload: FleetSweepRequest) -> dict:
+    """
+    Poll every server in the payload once, concurrently, and report sweep duration and per-host latency.
+    """
+    sched = scheduler.FleetScheduler.from_env(
+        concurrency=payload.concurrency,
+        vendor_limits=payload.vendor_limits,
+    )
+    hosts = [
+        scheduler.FleetHost(vendor=s.vendor, bmc_host=s.bmc_host, username=s.username, password=s.password)
+        for s in payload.servers
+    ]
+    report = await sched.sweep(hosts)
+    return report.summary()
+
+
+@app.get("/api/fleet/report")
+def fleet_report() -> dict:
+    """
+    Last background sweep (TEMS_FLEET_INVENTORY); null when background polling is off or has not swept yet.
+    """
+    fleet = getattr(app.state, "fleet", None)
+    report = fleet.last_report if fleet is not None else None
+    return {"enabled": fleet is not None, "report": report.summary() if report is not None else None}
+
+
+@app.get("/api/fleet/health")
+def fleet_health() -> dict:
+    """
+    Per-host breaker state for each protocol.
+    """
+    return {"hosts": bmc_health.get_health().snapshot()}
+
+
+@app.get("/api/fleet/capabilities")
+def fleet_capabilities() -> dict:
+    """
+    Learned per-host capability profiles (protocols, log services, cipher suite, SDR cache).
+    """
+    return {"hosts": capabilities.get_profiles().snapshot()}
+
+
+@app.post("/api/events/subscribe")
+async def events_subscribe(payload: EventSubscribeRequest) -> dict:
+    """
+    Create Redfish EventService subscriptions that push events back to /api/events/{context}.
+    """
+    results = await events.subscribe_many([s.model_dump() for s in payload.servers])
+    return {"subscriptions": results}
+
+
+@app.post("/api/events/{context}", status_code=204)
+async def events_receive(context: str, payload: dict = Body(...)) -> None:
+    try:
+        logs = events.get_subscriptions().receive(context, payload)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="unknown_subscription")
+    await pipeline.get_pipeline().publish(logs, source="event")
+
+
+@app.get("/api/logs")
+def stored_logs(
+    vendor: str = "all",
+    host: Optional[str] = None,
+    severity: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500,
+) -> dict:
+    """
+    Stored logs, newest first, without contacting any BMC; severity is the minimum level (INFO..CRITICAL).
+    """
+    try:
+        min_severity = collector.Severity[severity.upper()] if severity else None
+    except KeyError:
+        raise HTTPException(status_code=400, detail="unknown_severity")
+    store = log_segments.get_segments()
+    filters = dict(host=host, vendor=None if vendor == "all" else vendor, start=start, end=end)
+    logs = store.query(**filters, min_severity=min_severity, limit=min(max(limit, 1), 5000))
+    return {
+        "count": len(logs),
+        "logs": [log_entry(l) for l in logs],
+        "analysis": analyze_counts(store.severity_counts(**filters)),
+    }
+
+
+@app.get("/api/logs/recent")
+def recent_logs(host: Optional[str] = None, limit: int = 100) -> dict:
+    logs = pipeline.get_pipeline().recent(host=host, limit=min(max(limit, 1), 1000))
+    return {"count": len(logs), "logs": [l.to_dict() for l in logs]}
+
+
+@app.post("/api/telemetry/collect")
+async def telemetry_collect(payload: TelemetryRequest) -> dict:
+    """
+    Read Redfish TelemetryService MetricReports as numeric sensor samples.
+    With stream=true, also keep an SSE MetricReport stream open per host.
+    """
+    servers = [s.model_dump() for s in payload.servers]
+    results = await telemetry.collect_many(servers)
+    if payload.stream:
+        streams = telemetry.get_streams()
+        for s in servers:
+            streams.start(s["bmc_host"], s["username"], s["password"])
+    return {"results": results, "streaming": telemetry.get_streams().hosts()}
+
+
+@app.get("/api/sensors")
+def list_sensors(host: Optional[str] = None) -> dict:
+    store = sensor_store.get_sensor_store()
+    return {
+        "sensors": [{"host": h, "sensor": s} for h, s in store.sensors(host)],
+        "stats": store.stats(),
+    }
+
+
+@app.get("/api/sensors/series")
+def sensor_series(
+    host: str,
+    sensor: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    step: Optional[int] = None,
+) -> dict:
+    """
+    Samples of one sensor in [start, end]; with step (seconds), min/max/avg buckets instead.
+    """
+    store = sensor_store.get_sensor_store()
+    end = end or datetime.utcnow()
+    if step and step > 0:
+        return {"host": host, "sensor": sensor, "step": step, "buckets": store.downsample(host, sensor, start, end, step)}
+    ts, values = store.query(host, sensor, start, end)
+    return {"host": host, "sensor": sensor, "t": ts.tolist(), "v": values.tolist()}
+
+
 @app.post("/api/ai-search")
 async def ai_search(payload: AiSearchRequest) -> dict:
     """
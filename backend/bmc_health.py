@@ -0,0 +1,219 @@
+"""
+Per-BMC health tracking: circuit breaker with exponential backoff, and AIMD
+request concurrency.
+
+``HealthRegistry`` keeps a breaker per (host, protocol). After
+``failure_threshold`` consecutive failures the breaker opens and the host is
+skipped until the backoff expires (``base_backoff`` doubling per re-open up to
+``max_backoff``, with jitter so a rack that died together does not come back
+in lockstep). Then one half-open probe is let through: success closes the
+breaker, failure re-opens it with a longer backoff. Dead hosts therefore cost
+a dictionary lookup per sweep instead of a full connect timeout.
+
+``AimdLimiter`` bounds in-flight requests to one BMC. The limit grows by
+``1/limit`` per success (about +1 per round of requests) and halves when the
+BMC shows overload (timeouts, 429/503), which is what fragile iLO/iDRAC web
+servers need. ``http_pool`` uses one per host.
+
+The registry also learns per-host protocol latency and which protocol won
+the last hedged collection (``collector.collect(hedge=True)``), so the next
+poll starts with the faster protocol and hedges after its usual p95.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(RuntimeError):
+    """Raised when every protocol of a host is in backoff."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"{host} circuit open, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class AimdLimiter:
+    def __init__(self, *, initial: float = 1.0, minimum: float = 1.0, maximum: float = 4.0) -> None:
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.inflight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_overload(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+@dataclass
+class Breaker:
+    state: str = CLOSED
+    failures: int = 0  # consecutive failures
+    opens: int = 0  # consecutive openings, drives the backoff
+    retry_at: float = 0.0
+    probing: bool = False
+    last_error: Optional[str] = None
+    last_ok: Optional[float] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=32))  # successful attempts
+
+
+class HealthRegistry:
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 3,
+        base_backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+        hedge_percentile: float = 95.0,
+        hedge_default: float = 2.0,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default = hedge_default
+        self._breakers: Dict[Tuple[str, str], Breaker] = {}
+        self._preferred: Dict[str, str] = {}
+
+    def breaker(self, host: str, protocol: str) -> Breaker:
+        key = (host, protocol)
+        b = self._breakers.get(key)
+        if b is None:
+            b = self._breakers[key] = Breaker()
+        return b
+
+    def allow(self, host: str, protocol: str) -> bool:
+        """True if a request may go out now; claims the half-open probe if due."""
+        b = self.breaker(host, protocol)
+        if b.state == CLOSED:
+            return True
+        if b.state == OPEN and time.monotonic() >= b.retry_at:
+            b.state = HALF_OPEN
+        if b.state == HALF_OPEN and not b.probing:
+            b.probing = True
+            return True
+        return False
+
+    def retry_after(self, host: str, protocol: str) -> float:
+        return max(0.0, self.breaker(host, protocol).retry_at - time.monotonic())
+
+    def record_success(self, host: str, protocol: str) -> None:
+        b = self.breaker(host, protocol)
+        b.state, b.failures, b.opens, b.probing = CLOSED, 0, 0, False
+        b.last_ok = time.time()
+
+    def record_failure(self, host: str, protocol: str, error: BaseException) -> None:
+        b = self.breaker(host, protocol)
+        b.failures += 1
+        b.last_error = f"{type(error).__name__}: {error}"
+        b.probing = False
+        if b.state == HALF_OPEN or b.failures >= self.failure_threshold:
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** b.opens))
+            b.retry_at = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+            b.state = OPEN
+            b.opens += 1
+
+    def release(self, host: str, protocol: str) -> None:
+        """Give back a half-open probe claimed by ``allow`` but never used."""
+        self.breaker(host, protocol).probing = False
+
+    def observe_latency(self, host: str, protocol: str, seconds: float) -> None:
+        self.breaker(host, protocol).latencies.append(seconds)
+
+    def hedge_delay(self, host: str, protocol: str) -> float:
+        """How long to give ``protocol`` before hedging: its learned latency percentile."""
+        values = sorted(self.breaker(host, protocol).latencies)
+        if len(values) < 5:
+            return self.hedge_default
+        idx = min(len(values) - 1, round(self.hedge_percentile / 100 * (len(values) - 1)))
+        return values[idx]
+
+    def record_winner(self, host: str, protocol: str) -> None:
+        self._preferred[host] = protocol
+
+    def preferred(self, host: str) -> Optional[str]:
+        return self._preferred.get(host)
+
+    def order(self, host: str, protocols: Sequence[str]) -> List[str]:
+        """``protocols`` with the host's last winner first."""
+        preferred = self._preferred.get(host)
+        return sorted(protocols, key=lambda p: p != preferred)
+
+    @asynccontextmanager
+    async def track(self, host: str, protocol: str) -> AsyncIterator[None]:
+        """Record the outcome of the wrapped attempt; call only after ``allow``.
+
+        Cancellation and ``asyncio.TimeoutError`` (the caller's own deadline ran out)
+        say nothing about the BMC and are not counted.
+        """
+        try:
+            yield
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            self.breaker(host, protocol).probing = False
+            raise
+        except Exception as exc:
+            self.record_failure(host, protocol, exc)
+            raise
+        self.record_success(host, protocol)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        out: Dict[str, Dict[str, Any]] = {}
+        for (host, protocol), b in self._breakers.items():
+            out.setdefault(host, {})[protocol] = {
+                "state": b.state,
+                "failures": b.failures,
+                "retry_in": round(max(0.0, b.retry_at - now), 1) if b.state != CLOSED else 0.0,
+                "last_error": b.last_error,
+                "hedge_after": round(self.hedge_delay(host, protocol), 3),
+            }
+        for host, protocol in self._preferred.items():
+            out.setdefault(host, {})["preferred"] = protocol
+        return out
+
+
+_registry: Optional[HealthRegistry] = None
+
+
+def get_health() -> HealthRegistry:
+    global _registry
+    if _registry is None:
+        _registry = HealthRegistry(
+            failure_threshold=int(os.environ.get("TEMS_BREAKER_FAILURES", "3")),
+            base_backoff=float(os.environ.get("TEMS_BREAKER_BACKOFF", "30")),
+            max_backoff=float(os.environ.get("TEMS_BREAKER_MAX_BACKOFF", "3600")),
+            hedge_percentile=float(os.environ.get("TEMS_HEDGE_PERCENTILE", "95")),
+            hedge_default=float(os.environ.get("TEMS_HEDGE_DELAY", "2")),
+        )
+    return _registry
@@ -0,0 +1,233 @@
+"""
+Persisted per-host protocol capability profiles.
+
+Each profile records what a BMC can do, learned as a side effect of normal
+collection: whether Redfish/IPMI work at all, the Redfish version, service
+root and discovered log services with their query options, the IPMI cipher
+suite that authenticated, whether ``sdr dump`` caching works, and the last
+hedged-race winner. ``collector`` uses it to skip protocols that are known
+not to work and to start from the right path right after a restart, instead
+of re-learning it through timeouts and exceptions.
+
+A protocol only counts as unsupported after ``failure_threshold``
+consecutive definite rejections (no Redfish service root, IPMI commands
+refused); timeouts and unreachable hosts are left to the per-host breaker
+in ``bmc_health``. The verdict is re-checked once it is older than
+``ttl`` (``TEMS_PROFILE_TTL``). A changed Redfish version or BMC firmware
+revision throws the profile away.
+
+Profiles live in a JSON file (``TEMS_PROFILE_PATH``), written at most every
+``save_interval`` seconds and on shutdown.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import redfish_discovery
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "state" / "profiles.json"
+
+
+@dataclass
+class HostProfile:
+    redfish: Optional[bool] = None  # None = unknown
+    ipmi: Optional[bool] = None
+    redfish_version: Optional[str] = None
+    service_root: Dict[str, Any] = field(default_factory=dict)
+    system_paths: List[str] = field(default_factory=list)
+    manager_paths: List[str] = field(default_factory=list)
+    chassis_paths: List[str] = field(default_factory=list)
+    log_services: List[str] = field(default_factory=list)
+    features: Dict[str, Optional[bool]] = field(default_factory=dict)
+    cipher_suite: Optional[int] = None
+    sdr_cache: Optional[bool] = None
+    firmware: Optional[str] = None
+    preferred: Optional[str] = None
+    failures: Dict[str, int] = field(default_factory=dict)  # consecutive, per protocol
+    checked: Dict[str, float] = field(default_factory=dict)  # wall time of the last verdict, per protocol
+    discovered_at: Optional[float] = None  # wall time of the stored Redfish discovery
+
+
+class ProfileStore:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        ttl: float = 86400.0,
+        failure_threshold: int = 3,
+        save_interval: float = 60.0,
+    ) -> None:
+        self.path = Path(path or os.environ.get("TEMS_PROFILE_PATH", DEFAULT_PATH))
+        self.ttl = ttl
+        self.failure_threshold = max(1, failure_threshold)
+        self.save_interval = save_interval
+        self._profiles: Dict[str, HostProfile] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._primed: set[str] = set()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        names = {f.name for f in fields(HostProfile)}
+        for host, raw in data.items():
+            self._profiles[host] = HostProfile(**{k: v for k, v in raw.items() if k in names})
+
+    def get(self, host: str) -> HostProfile:
+        prof = self._profiles.get(host)
+        if prof is None:
+            prof = self._profiles[host] = HostProfile()
+        return prof
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if time.time() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def usable(self, host: str, capability: str) -> bool:
+        """False only while a recent verdict says ``capability`` ("redfish", "ipmi",
+        "sdr_cache") does not work on ``host``."""
+        prof = self.get(host)
+        if getattr(prof, capability) is not False:
+            return True
+        return time.time() - prof.checked.get(capability, 0.0) >= self.ttl
+
+    def record(self, host: str, protocol: str, ok: bool) -> None:
+        """Record a working ``protocol``, or with ``ok=False`` a definite rejection (never a timeout)."""
+        prof = self.get(host)
+        state = getattr(prof, protocol)
+        if ok:
+            prof.failures.pop(protocol, None)
+            verdict = True
+        else:
+            prof.failures[protocol] = prof.failures.get(protocol, 0) + 1
+            verdict = False if prof.failures[protocol] >= self.failure_threshold else state
+        if verdict != state or verdict is False:
+            setattr(prof, protocol, verdict)
+            prof.checked[protocol] = time.time()
+            self._changed()
+
+    def note_redfish(self, host: str, info: redfish_discovery.ServiceInfo) -> None:
+        """Remember a discovery result; a new Redfish version resets the profile."""
+        prof = self.get(host)
+        if prof.discovered_at is not None and info.service_root is prof.service_root:
+            return  # discovery primed from this profile
+        if prof.redfish_version and info.redfish_version != prof.redfish_version:
+            prof = self._profiles[host] = HostProfile()  # firmware update
+        if (
+            prof.service_root == info.service_root
+            and prof.log_services == info.log_services
+            and prof.discovered_at is not None
+            and time.time() - prof.discovered_at < self.ttl / 2
+        ):
+            return
+        prof.redfish_version = info.redfish_version
+        prof.service_root = info.service_root
+        prof.system_paths = list(info.system_paths)
+        prof.manager_paths = list(info.manager_paths)
+        prof.chassis_paths = list(info.chassis_paths)
+        prof.log_services = list(info.log_services)
+        prof.features = asdict(info.features)
+        prof.discovered_at = time.time()
+        self._changed()
+
+    def prime_discovery(self, host: str, discovery: redfish_discovery.DiscoveryCache) -> None:
+        """Seed an empty discovery cache from a fresh stored profile, once per process (after
+        that, an empty cache means discovery was invalidated and must really run)."""
+        if host in self._primed:
+            return
+        self._primed.add(host)
+        prof = self._profiles.get(host)
+        if (
+            prof is None
+            or discovery.peek(host) is not None
+            or not prof.service_root
+            or prof.discovered_at is None
+            or time.time() - prof.discovered_at >= self.ttl
+        ):
+            return
+        discovery.prime(
+            host,
+            redfish_discovery.ServiceInfo(
+                service_root=prof.service_root,
+                system_paths=list(prof.system_paths),
+                log_services=list(prof.log_services),
+                features=redfish_discovery.ProtocolFeatures(**prof.features),
+                manager_paths=list(prof.manager_paths),
+                chassis_paths=list(prof.chassis_paths),
+            ),
+        )
+
+    def note_firmware(self, host: str, firmware: Optional[str]) -> None:
+        """Record the BMC firmware revision; a change resets the profile."""
+        if not firmware or firmware == "unknown":
+            return
+        prof = self.get(host)
+        if prof.firmware == firmware:
+            return
+        if prof.firmware is not None:
+            prof = self._profiles[host] = HostProfile()
+            redfish_discovery.get_discovery().invalidate(host)
+        prof.firmware = firmware
+        self._changed()
+
+    def note(self, host: str, **values: Any) -> None:
+        """Set ``cipher_suite``, ``sdr_cache`` or ``preferred``, saving only on change."""
+        prof = self.get(host)
+        changed = False
+        for key, value in values.items():
+            if isinstance(value, bool):
+                prof.checked[key] = time.time()
+            if getattr(prof, key) != value:
+                setattr(prof, key, value)
+                changed = True
+        if changed:
+            self._changed()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            host: {
+                "redfish": p.redfish,
+                "ipmi": p.ipmi,
+                "redfish_version": p.redfish_version,
+                "log_services": p.log_services,
+                "features": p.features,
+                "cipher_suite": p.cipher_suite,
+                "sdr_cache": p.sdr_cache,
+                "firmware": p.firmware,
+                "preferred": p.preferred,
+            }
+            for host, p in self._profiles.items()
+        }
+
+    def save(self, *, force: bool = False) -> None:
+        """Atomically rewrite the profile file if anything changed."""
+        if not self._dirty and not force:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".profiles-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({host: asdict(p) for host, p in self._profiles.items()}, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
+        self._saved_at = time.time()
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_profiles() -> ProfileStore:
+    global _store
+    if _store is None:
+        _store = ProfileStore(ttl=float(os.environ.get("TEMS_PROFILE_TTL", "86400")))
+    return _store
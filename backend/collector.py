@@ -1,15 +1,12 @@
 """
 TEMS log collector helpers for Redfish/IPMI.
 
-Normalized log schema:
-{
-    "timestamp": datetime,
-    "host": str,
-    "vendor": str,
-    "service": str,
-    "severity": str,
-    "message": str,
-}
+Normalized log schema (``log_record.LogRecord``, a named tuple with interned
+host/vendor/service):
+    (timestamp: datetime, host: str, vendor: str, service: str, severity: Severity, message: str)
+
+Severity text is mapped to ``log_record.Severity`` once, in ``normalize_log``,
+through ``SEVERITY_MAP`` plus the vendor's ``VENDOR_SEVERITY`` overrides.
 
 This module keeps network calls minimal and focuses on shaping data for
 downstream analysis. Replace stubs with real Redfish/IPMI calls when ready.
@@ -17,13 +14,106 @@ downstream analysis. Replace stubs with real Redfish/IPMI calls when ready.
 
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import os
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import httpx
-import subprocess
 
-NormalizedLog = Dict[str, Any]
+import bmc_health
+import capabilities
+import http_pool
+import ipmi_lan
+import ipmi_shell
+import log_batch
+import log_cursor
+import log_record
+import redfish_discovery
+import redfish_session
+import sdr_cache as sdr_cache_mod
+import sel_decode
+import sensor_store
+
+LogRecord = log_record.LogRecord
+NormalizedLog = LogRecord
+Severity = log_record.Severity
+
+# Per-source completeness of one collection (see ``CollectResult``).
+COMPLETE, PARTIAL, TIMEOUT, ERROR, SKIPPED = "complete", "partial", "timeout", "error", "skipped"
+CANCELLED = "cancelled"  # lost a hedged race
+
+
+# Receives each page of logs as it is read (see ``collect(sink=...)``).
+PageSink = Callable[[log_batch.LogBatch], Awaitable[None]]
+SampleSink = Callable[[List[sensor_store.SensorSample]], Awaitable[None]]
+
+
+@dataclass
+class CollectResult:
+    logs: log_batch.LogBatch
+    streamed: int = 0  # entries already handed to the ``sink``, not in ``logs``
+    samples: List[sensor_store.SensorSample] = field(default_factory=list)  # IPMI sensor readings
+    sources: Dict[str, str] = field(default_factory=dict)  # "redfish"/"ipmi" -> COMPLETE, PARTIAL, ...
+    protocol: Optional[str] = None  # protocol whose logs were returned
+
+    @property
+    def complete(self) -> bool:
+        return not any(s in (PARTIAL, TIMEOUT) for s in self.sources.values())
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until ``deadline`` (event loop time); None means no deadline."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - asyncio.get_running_loop().time())
+
+
+# Severity text (casefolded) -> canonical severity, for every vendor.
+SEVERITY_MAP: Dict[str, Severity] = {
+    # Redfish Severity / MessageSeverity, EntryType and mock levels
+    "ok": Severity.INFO,
+    "info": Severity.INFO,
+    "informational": Severity.INFO,
+    "event": Severity.INFO,
+    "sel": Severity.INFO,
+    "oem": Severity.INFO,
+    "warn": Severity.WARN,
+    "warning": Severity.WARN,
+    "error": Severity.ERROR,
+    "critical": Severity.CRITICAL,
+    "fatal": Severity.CRITICAL,
+    # ipmitool sel / sensor status text
+    "non-critical": Severity.WARN,
+    "non-recoverable": Severity.CRITICAL,
+}
+
+# Vendor wording that differs from, or is missing in, ``SEVERITY_MAP``.
+VENDOR_SEVERITY: Dict[str, Dict[str, Severity]] = {
+    "hpe": {"caution": Severity.WARN, "repaired": Severity.INFO, "degraded": Severity.WARN},  # iLO IML
+    "dell": {"minor": Severity.WARN, "major": Severity.ERROR},  # iDRAC Lifecycle / SEL
+    "lenovo": {"audit": Severity.INFO},  # XCC
+}
+
+# (vendor, raw text) -> severity, so each distinct string is resolved once.
+_severity_cache: Dict[Tuple[str, str], Severity] = {}
+
+
+def severity_of(vendor: str, raw: Any) -> Severity:
+    """Canonical severity of a vendor severity value; unknown text counts as INFO."""
+    if isinstance(raw, Severity):
+        return raw
+    key = (vendor, raw)
+    sev = _severity_cache.get(key)
+    if sev is None:
+        text = str(raw).strip().casefold()
+        overrides = VENDOR_SEVERITY.get(vendor, {})
+        sev = overrides[text] if text in overrides else SEVERITY_MAP.get(text, Severity.INFO)
+        if len(_severity_cache) < 4096:
+            _severity_cache[key] = sev
+    return sev
 
 
 def normalize_log(
@@ -32,19 +122,17 @@ def normalize_log(
     host: str,
     vendor: str,
     service: str,
-    severity: str,
+    severity: Any,
     message: str,
-) -> NormalizedLog:
-    return {
-        "timestamp": timestamp,
-        "host": host,
-        "vendor": vendor,
-        "service": service,
-        "severity": severity,
-        "message": message,
-    }
+    record_id: str = "",
+) -> LogRecord:
+    intern = log_record.intern
+    return LogRecord(
+        timestamp, intern(host), intern(vendor), intern(service), severity_of(vendor, severity), message, record_id
+    )
 
 
+# Fallback only: used when discovery finds no LogServices on the BMC.
 VENDOR_LOG_PATHS = {
     "hpe": "/Systems/1/LogServices/IEL/Entries",  # iLO IML
     "dell": "/Systems/System.Embedded.1/LogServices/Lclog/Entries",  # iDRAC Lifecycle
@@ -54,67 +142,427 @@ VENDOR_LOG_PATHS = {
 }
 
 
-async def fetch_redfish_logs(
+def _entry_time(e: Dict[str, Any]) -> datetime:
+    ts = e.get("Created") or e.get("DateTime") or datetime.utcnow().isoformat()
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def _normalize_redfish_entry(e: Dict[str, Any], created: datetime, *, host: str, vendor: str) -> NormalizedLog:
+    msg = e.get("Message") or e.get("OemRecordFormat") or str(e)
+    sev = e.get("Severity") or e.get("EntryType") or "INFO"
+    comp = e.get("SensorType") or e.get("OriginOfCondition") or "log"
+    return normalize_log(
+        timestamp=created,
+        host=host,
+        vendor=vendor,
+        service=str(comp),
+        severity=str(sev),
+        message=str(msg),
+        record_id=str(e.get("@odata.id") or e.get("Id") or ""),
+    )
+
+
+REDFISH_TOP = int(os.environ.get("TEMS_REDFISH_TOP", "200"))
+
+
+def _paged(params: Dict[str, str], top: int, offset: int = 0) -> Dict[str, str]:
+    """``params`` bounded to one ``$top`` page starting ``offset`` entries in (``top`` 0: unbounded)."""
+    if not top:
+        return params
+    skip = int(params.get("$skip", "0")) + offset
+    return {**params, "$top": str(top), **({"$skip": str(skip)} if skip else {})}
+
+
+def _cursor_params(cursor: log_cursor.LogCursor, features: redfish_discovery.ProtocolFeatures) -> Dict[str, str]:
+    """Server-side query options that skip entries the cursor has already seen."""
+    if cursor.created is None:
+        return {}
+    if cursor.supports_filter is not False and features.filter is not False:
+        # ``ge`` rather than ``gt``: same-second entries are de-duplicated by Id client-side.
+        return {"$filter": f"Created ge '{cursor.created}'"}
+    if cursor.supports_skip is not False and features.top_skip is not False and cursor.ascending and cursor.count:
+        return {"$skip": str(cursor.count)}
+    return {}
+
+
+def _log_paths(info: redfish_discovery.ServiceInfo, vendor: str, system_path: Optional[str]) -> List[str]:
+    """Entries paths of every discovered log service (``system_path`` limits Systems services to one node)."""
+    paths = info.entries_paths()
+    if system_path:
+        paths = [p for p in paths if not p.startswith("/Systems/") or p.startswith(f"{system_path}/")]
+    return paths or [VENDOR_LOG_PATHS.get(vendor, "/Systems/1/LogServices/SEL/Entries")]
+
+
+async def _discover(
+    client: http_pool.ClientPool, bmc_host: str, username: str, password: str
+) -> redfish_discovery.ServiceInfo:
+    """Discovery through the per-host cache, seeded from and recorded in the capability profile."""
+    discovery = redfish_discovery.get_discovery()
+    profiles = capabilities.get_profiles()
+    profiles.prime_discovery(bmc_host, discovery)
+    info = await discovery.get(client, bmc_host, username=username, password=password)
+    profiles.note_redfish(bmc_host, info)
+    return info
+
+
+async def iter_log_pages(
     bmc_host: str,
     username: str,
     password: str,
     vendor: str,
-    system_path: str = "/Systems/1",
-) -> List[NormalizedLog]:
-    """Fetch Redfish log entries and normalize.
+    log_path: str,
+    *,
+    info: redfish_discovery.ServiceInfo,
+    pool: Optional[http_pool.ClientPool] = None,
+    incremental: bool = True,
+    cursors: Optional[log_cursor.CursorStage] = None,
+) -> AsyncIterator[List[NormalizedLog]]:
+    """Stream one log service's new entries a page at a time, following ``Members@odata.nextLink``.
 
-    Replace the endpoint paths per vendor if 다름 (예: iLO IML: /Systems/1/LogServices/IEL/Entries,
-    iDRAC Lifecycle: /Systems/System.Embedded.1/LogServices/Lclog/Entries).
+    Requests go through the shared keep-alive pool (``http_pool.get_pool()``) unless one is given,
+    authenticated with a cached Redfish session token (basic auth only if SessionService is missing).
+    With ``incremental`` only entries newer than the persisted per-host cursor are yielded; the cursor
+    advances after each fully consumed page, so only one page is held in memory at a time. If the read
+    stops early, the advance is kept only for logs known to be oldest-first; otherwise the cursor stays
+    put and the next poll reads the skipped older entries (the log store drops the repeats). BMCs
+    known to support ``$top`` are asked for at most ``TEMS_REDFISH_TOP`` entries per page, and paged
+    with ``$skip`` if they do not return a nextLink themselves.
+    Advances go to ``cursors`` when given (the caller commits them), else they are committed
+    when the iterator finishes.
     """
-    async with httpx.AsyncClient(verify=False, timeout=10) as client:
-        system_url = f"https://{bmc_host}/redfish/v1{system_path}"
-        log_path = VENDOR_LOG_PATHS.get(vendor, "/Systems/1/LogServices/SEL/Entries")
-        logs_url = f"https://{bmc_host}/redfish/v1{log_path}"
-        await client.get(system_url, auth=(username, password))  # priming / auth check
-        res = await client.get(logs_url, auth=(username, password))
+    client = pool or http_pool.get_pool()
+    sessions = redfish_session.get_sessions()
+    stage = cursors or log_cursor.get_cursors().stage()
+    discovery = redfish_discovery.get_discovery()
+    base_url = f"https://{bmc_host}"
+    logs_url = f"{base_url}/redfish/v1{log_path}"
+    cursor = stage.get(bmc_host, log_path) if incremental else log_cursor.LogCursor()
+
+    params = _cursor_params(cursor, info.features)
+    top = REDFISH_TOP if info.features.top_skip and cursor.supports_skip is not False else 0
+    res = await sessions.get(client, logs_url, username=username, password=password, params=_paged(params, top))
+    if res.status_code == 404:
+        # Service moved (firmware update, node swap): rediscover on the next poll.
+        discovery.invalidate(bmc_host)
+    if (params or top) and res.status_code in (400, 501):
+        # Query option rejected: remember it and fall back to client-side cut-off.
+        if "$filter" in params:
+            cursor.supports_filter = False
+        else:
+            cursor.supports_skip = False
+        params, top = {}, 0
+        res = await sessions.get(client, logs_url, username=username, password=password)
+    res.raise_for_status()
+    data = res.json()
+
+    total = data.get("Members@odata.count")
+    if "$skip" in params and isinstance(total, int) and cursor.count and total < cursor.count:
+        # Log was cleared or wrapped since the last poll: resync from scratch.
+        cursor.reset()
+        params = {}
+        res = await sessions.get(client, logs_url, username=username, password=password, params=_paged(params, top))
         res.raise_for_status()
         data = res.json()
+        total = data.get("Members@odata.count")
 
-    entries = data.get("Members", [])
-    normalized: List[NormalizedLog] = []
-    for e in entries:
-        ts = e.get("Created") or e.get("DateTime") or datetime.utcnow().isoformat()
-        msg = e.get("Message") or e.get("OemRecordFormat") or str(e)
-        sev = e.get("Severity") or e.get("EntryType") or "INFO"
-        comp = e.get("SensorType") or e.get("OriginOfCondition") or "log"
-        normalized.append(
-            normalize_log(
-                timestamp=datetime.fromisoformat(ts.replace("Z", "+00:00")),
-                host=bmc_host,
-                vendor=vendor,
-                service=str(comp),
-                severity=str(sev),
-                message=str(msg),
-            )
-        )
-    return normalized
+    # Pages are judged against the cursor as it was before this poll; advancing it
+    # page by page must not hide older entries on later pages of a newest-first log.
+    baseline = dataclasses.replace(cursor)
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    n_entries = 0
+    skip, offset = int(params.get("$skip", "0")), 0  # offset: entries paged past with our own $skip
+    visited = {logs_url}
+    complete = False
+    try:
+        while True:
+            page_seen: List[Tuple[datetime, str]] = []
+            page_logs: List[NormalizedLog] = []
+            members = data.get("Members", [])
+            for e in members:
+                created = _entry_time(e)
+                entry_id = str(e.get("Id", ""))
+                page_seen.append((created, entry_id))
+                if baseline.is_new(created, entry_id):
+                    page_logs.append(_normalize_redfish_entry(e, created, host=bmc_host, vendor=vendor))
+            page_new = len(page_logs)
+            if page_logs:
+                yield page_logs
+            del page_logs  # do not hold this page while the next one is fetched
+            if page_seen:
+                first_seen = first_seen or page_seen[0][0]
+                last_seen = page_seen[-1][0]
+                n_entries += len(page_seen)
+            if incremental:
+                cursor.advance(page_seen)
+
+            next_link = data.get("Members@odata.nextLink")
+            if page_seen and not page_new and baseline.ascending is False:
+                # Newest-first log: a page with nothing new means the rest is older still.
+                break
+            if next_link:
+                next_url = next_link if next_link.startswith("http") else f"{base_url}{next_link}"
+                if next_url in visited:
+                    break
+                visited.add(next_url)
+                res = await sessions.get(client, next_url, username=username, password=password)
+            elif top and len(members) == top and (not isinstance(total, int) or skip + offset + top < total):
+                offset += top
+                res = await sessions.get(
+                    client, logs_url, username=username, password=password, params=_paged(params, top, offset)
+                )
+            else:
+                break
+            res.raise_for_status()
+            data = res.json()
+
+        if incremental:
+            if "$filter" in params and cursor.supports_filter is None:
+                cursor.supports_filter = True
+            if not params:
+                cursor.count = total if isinstance(total, int) else n_entries
+                if first_seen is not None and last_seen is not None and n_entries > 1:
+                    cursor.ascending = log_cursor.as_utc(first_seen) <= log_cursor.as_utc(last_seen)
+            elif "$skip" in params and isinstance(total, int):
+                cursor.count = total
+        complete = True
+    finally:
+        if incremental and not complete and baseline.ascending is not True:
+            # Cut off mid-read (deadline, error) in a newest-first or unknown-order log: the entries
+            # not read yet are older than those that were, so the cursor must not move past them.
+            cursor.created, cursor.ids = baseline.created, baseline.ids
+        if incremental and cursors is None:
+            stage.commit()
+
+
+async def iter_log_service(
+    bmc_host: str,
+    username: str,
+    password: str,
+    vendor: str,
+    log_path: str,
+    *,
+    info: redfish_discovery.ServiceInfo,
+    pool: Optional[http_pool.ClientPool] = None,
+    incremental: bool = True,
+    cursors: Optional[log_cursor.CursorStage] = None,
+) -> AsyncIterator[NormalizedLog]:
+    """Entry-by-entry view of ``iter_log_pages``."""
+    async for page in iter_log_pages(
+        bmc_host,
+        username,
+        password,
+        vendor,
+        log_path,
+        info=info,
+        pool=pool,
+        incremental=incremental,
+        cursors=cursors,
+    ):
+        for log in page:
+            yield log
+
+
+async def iter_redfish_logs(
+    bmc_host: str,
+    username: str,
+    password: str,
+    vendor: str,
+    system_path: Optional[str] = None,
+    pool: Optional[http_pool.ClientPool] = None,
+    incremental: bool = True,
+) -> AsyncIterator[log_batch.LogBatch]:
+    """Stream every discovered log service one page (``LogBatch``) at a time, service after service.
+
+    Only the page being yielded is held in memory; ``fetch_redfish_logs(on_page=...)`` does the
+    same with the services read concurrently and a deadline.
+    """
+    client = pool or http_pool.get_pool()
+    info = await _discover(client, bmc_host, username, password)
+    for log_path in _log_paths(info, vendor, system_path):
+        async for page in iter_log_pages(
+            bmc_host, username, password, vendor, log_path, info=info, pool=client, incremental=incremental
+        ):
+            yield log_batch.LogBatch.from_records(page)
+
+
+async def fetch_redfish_logs(
+    bmc_host: str,
+    username: str,
+    password: str,
+    vendor: str,
+    system_path: Optional[str] = None,
+    pool: Optional[http_pool.ClientPool] = None,
+    incremental: bool = True,
+    *,
+    deadline: Optional[float] = None,
+    status: Optional[Dict[str, str]] = None,
+    cursors: Optional[log_cursor.CursorStage] = None,
+    on_page: Optional[PageSink] = None,
+) -> List[NormalizedLog]:
+    """Fetch every (new) entry from all discovered log services concurrently.
+
+    A failing service does not hide the others; the first error is raised only if every service failed.
+    At ``deadline`` (event loop time) services still running are cancelled and the entries read so far
+    are returned; ``status`` receives per log path COMPLETE, PARTIAL (cut off or failed after some
+    entries), TIMEOUT or ERROR. Cursor advances go to ``cursors`` when given (the caller commits them
+    if it keeps the logs). With ``on_page`` each page is handed over as a ``LogBatch`` as soon as it is
+    read and then dropped, so memory is bounded by the page size; the returned list is then empty.
+    """
+    client = pool or http_pool.get_pool()
+    stage = cursors or log_cursor.get_cursors().stage()
+    info = await asyncio.wait_for(_discover(client, bmc_host, username, password), _remaining(deadline))
+    paths = _log_paths(info, vendor, system_path)
+    buckets: Dict[str, List[NormalizedLog]] = {p: [] for p in paths}
+    read: Dict[str, int] = {p: 0 for p in paths}
+
+    async def drain(log_path: str) -> None:
+        # Hand over page by page so a cancelled service still contributes the pages it finished.
+        async for page in iter_log_pages(
+            bmc_host,
+            username,
+            password,
+            vendor,
+            log_path,
+            info=info,
+            pool=client,
+            incremental=incremental,
+            cursors=stage,
+        ):
+            read[log_path] += len(page)
+            if on_page is not None:
+                await on_page(log_batch.LogBatch.from_records(page))
+            else:
+                buckets[log_path].extend(page)
+
+    tasks = {p: asyncio.ensure_future(drain(p)) for p in paths}
+    try:
+        _, pending = await asyncio.wait(tasks.values(), timeout=_remaining(deadline))
+    finally:
+        unfinished = [t for t in tasks.values() if not t.done()]
+        for t in unfinished:
+            t.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        if incremental and cursors is None:
+            stage.commit()
+    errors: List[BaseException] = []
+    for path, task in tasks.items():
+        if task in pending:
+            state = PARTIAL if read[path] else TIMEOUT
+        elif task.exception() is not None:
+            errors.append(task.exception())
+            state = PARTIAL if read[path] else ERROR
+        else:
+            state = COMPLETE
+        if status is not None:
+            status[path] = state
+    if errors and len(errors) == len(tasks) and not any(read.values()):
+        raise errors[0]
+    return [log for p in paths for log in buckets[p]]
+
+
+IpmiError = ipmi_shell.IpmiError
+
+
+class IpmiTimeout(IpmiError):
+    pass
 
 
-def run_ipmitool(args: List[str]) -> str:
-    """Run ipmitool and return stdout. Raises on error."""
-    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+class BmcTimeout(RuntimeError):
+    """The BMC did not answer before the collection deadline; counts against its breaker."""
+
+
+IPMI_MAX_PROCS = int(os.environ.get("TEMS_IPMI_MAX_PROCS", "32"))
+IPMI_TIMEOUT = float(os.environ.get("TEMS_IPMI_TIMEOUT", "30"))
+_ipmi_slots = asyncio.Semaphore(IPMI_MAX_PROCS)
+
+
+async def run_ipmitool(args: List[str], *, timeout: Optional[float] = None, input: Optional[str] = None) -> str:
+    """Run ipmitool as an asyncio subprocess and return stdout. Raises on error.
+
+    At most ``TEMS_IPMI_MAX_PROCS`` ipmitool processes run at once; a call that exceeds ``timeout``
+    (default ``TEMS_IPMI_TIMEOUT``) is killed and raises ``IpmiTimeout``.
+    """
+    timeout = IPMI_TIMEOUT if timeout is None else timeout
+    async with _ipmi_slots:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(input.encode() if input is not None else None), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            _, stderr = await proc.communicate()
+            raise IpmiTimeout(
+                f"ipmitool timed out after {timeout:g}s", returncode=proc.returncode, stderr=stderr.decode(errors="replace")
+            )
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+    err = stderr.decode(errors="replace").strip()
     if proc.returncode != 0:
-        raise RuntimeError(f"ipmitool failed: {proc.stderr.strip()}")
-    return proc.stdout
+        raise IpmiError(f"ipmitool failed: {err}", returncode=proc.returncode, stderr=err)
+    return stdout.decode(errors="replace")
+
+
+def sel_record_id(line: str) -> Optional[int]:
+    """Record ID (hex, as printed by ipmitool) from the first column of a sel elist line."""
+    head = line.split("|", 1)[0].strip()
+    try:
+        return int(head, 16)
+    except ValueError:
+        return None
+
 
+def parse_sel_info(info_output: str) -> Dict[str, str]:
+    """Parse ipmitool sel info output (``Entries``, ``Last Add Time``, ...) into a dict."""
+    info: Dict[str, str] = {}
+    for line in info_output.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            info[key.strip()] = value.strip()
+    return info
 
-def parse_ipmi_sel(sel_output: str, *, host: str, vendor: str, service: str = "ipmi") -> List[NormalizedLog]:
+
+def parse_ipmi_sel(
+    sel_output: str,
+    *,
+    host: str,
+    vendor: str,
+    service: str = "ipmi",
+    after_id: Optional[int] = None,
+) -> List[NormalizedLog]:
     """Parse ipmitool sel elist output into normalized logs.
 
-    Expected line example:
+    Lines whose record ID is not above ``after_id`` are skipped before any parsing.
+
+    Expected line examples:
     1 | 09/13/2024 | 12:34:56 | Critical | PSU1 input lost
+    2 | 09/13/2024 | 12:35:02 | Power Supply PSU1 | Failure detected | Asserted
+
+    With an Asserted/Deasserted column the severity comes from the sensor type and event, as for
+    raw records (``sel_decode.elist_severity``); the direction alone only turns a deasserted
+    Warning/Critical event into a recovery. Events the tables do not know are INFO.
     """
     normalized: List[NormalizedLog] = []
     for line in sel_output.splitlines():
+        if after_id is not None:
+            rid = sel_record_id(line)
+            if rid is not None and rid <= after_id:
+                continue
         parts = [p.strip() for p in line.split("|")]
         if len(parts) < 5:
             continue
-        _, date_str, time_str, sev, msg = parts[:5]
+        rid, date_str, time_str, sev, msg = parts[:5]
+        if len(parts) > 5 and parts[5]:
+            sev = sel_decode.elist_severity(parts[3], msg, parts[5]) or Severity.INFO
+            msg = " | ".join(parts[3:6])  # same "sensor | event | direction" text as decoded raw records
         try:
             ts = datetime.strptime(f"{date_str} {time_str}", "%m/%d/%Y %H:%M:%S")
         except Exception:
@@ -127,31 +575,565 @@ def parse_ipmi_sel(sel_output: str, *, host: str, vendor: str, service: str = "i
                 service=service,
                 severity=sev,
                 message=msg,
+                record_id=f"sel:{rid.lower()}",
             )
         )
     return normalized
 
 
-def parse_ipmi_sensor(sensor_output: str, *, host: str, vendor: str, service: str = "sensor") -> List[NormalizedLog]:
-    """Parse ipmitool sensor output into normalized logs (as metric-like events)."""
-    normalized: List[NormalizedLog] = []
+def _reading(text: str) -> Optional[float]:
+    """Numeric value at the start of an ipmitool reading ("3000 RPM", "45.000"); None for "na",
+    "No Reading", discrete states and the like."""
+    head = text.split(maxsplit=1)[0] if text.strip() else ""
+    try:
+        value = float(head)
+    except ValueError:
+        return None
+    return value if value == value else None  # not NaN
+
+
+def parse_ipmi_sensor(sensor_output: str, *, host: str) -> List[sensor_store.SensorSample]:
+    """Numeric readings from ipmitool sensor output.
+
+    Expected line example:
+    Fan1             | 3000.000   | RPM        | ok    | na | ...
+    """
+    now = datetime.utcnow()
+    samples: List[sensor_store.SensorSample] = []
     for line in sensor_output.splitlines():
         parts = [p.strip() for p in line.split("|")]
         if len(parts) < 2:
             continue
-        name, reading = parts[:2]
-        msg = f"{name}: {reading}"
-        normalized.append(
-            normalize_log(
-                timestamp=datetime.utcnow(),
-                host=host,
-                vendor=vendor,
-                service=service,
-                severity="INFO",
-                message=msg,
+        value = _reading(parts[1])
+        if value is not None:
+            samples.append(sensor_store.SensorSample(timestamp=now, host=host, sensor=parts[0], value=value))
+    return samples
+
+
+IPMI_SHELL = os.environ.get("TEMS_IPMI_SHELL") == "1"
+
+
+def _plan_sel_read(cursor: log_cursor.SelCursor, info: Dict[str, str]) -> Tuple[Optional[str], Optional[int]]:
+    """Decide which ``sel`` command to run and the record-ID cut-off, from ``sel info`` and the cursor.
+
+    Returns ``(None, _)`` when nothing changed since the last poll.
+    """
+    try:
+        entries = int(info.get("Entries", ""))
+    except ValueError:
+        return "sel elist", cursor.last_id
+    last_add, last_del = info.get("Last Add Time"), info.get("Last Del Time")
+    if cursor.entries is None or cursor.last_id is None:
+        return ("sel elist" if entries else None), None
+    if last_del != cursor.last_del or entries < cursor.entries:
+        # SEL was cleared (or records deleted): record IDs may restart, resync from scratch.
+        cursor.reset()
+        return ("sel elist" if entries else None), None
+    if entries == cursor.entries and last_add == cursor.last_add:
+        return None, cursor.last_id
+    if entries > cursor.entries:
+        return f"sel elist last {entries - cursor.entries}", cursor.last_id
+    # Same count, newer add time: a full SEL wrapped and overwrote old records.
+    return "sel elist", cursor.last_id
+
+
+async def fetch_ipmi_logs(
+    bmc_host: str,
+    username: str,
+    password: str,
+    vendor: str,
+    *,
+    sensors: bool = False,
+    use_shell: bool = IPMI_SHELL,
+    sdr_cache: bool = True,
+    incremental: bool = True,
+    deadline: Optional[float] = None,
+    cursors: Optional[log_cursor.CursorStage] = None,
+    samples: Optional[List[sensor_store.SensorSample]] = None,
+) -> List[NormalizedLog]:
+    """Collect SEL logs (and optionally sensor readings into ``samples``) over IPMI.
+
+    With ``use_shell`` all commands go through one persistent ``ipmitool shell`` per host
+    (one RMCP+ session); otherwise each command forks its own ipmitool. Sensor reads use
+    ``sdr elist`` against the managed per-host SDR cache file (``-S``) when the BMC supports it.
+    With ``incremental`` a cheap ``sel info`` decides whether and how much of the SEL to read,
+    and only records newer than the persisted last record ID are parsed.
+    Per-command timeouts are cut to what is left of ``deadline`` (event loop time); a command
+    that does not finish in time raises ``IpmiTimeout`` either way.
+    """
+    sensors = sensors and samples is not None  # nowhere to put readings otherwise
+    base = ["ipmitool", "-I", "lanplus", "-H", bmc_host, "-U", username, "-P", password]
+    extra: List[str] = []
+    sensor_cmd = "sensor"
+    profiles = capabilities.get_profiles()
+    if sensors and sdr_cache and profiles.usable(bmc_host, "sdr_cache"):
+        cache = sdr_cache_mod.get_sdr_cache()
+        sdr_file = await cache.ensure(bmc_host, base, run_ipmitool)
+        if sdr_file is not None:
+            profiles.note(bmc_host, sdr_cache=True)
+            profiles.note_firmware(bmc_host, await cache.firmware(bmc_host, base, run_ipmitool))
+            extra, sensor_cmd = ["-S", str(sdr_file)], "sdr elist"
+        elif cache.rejects(bmc_host):
+            profiles.note(bmc_host, sdr_cache=False)  # a timeout only backs off for TEMS_SDR_RETRY
+
+    shell = None
+    if use_shell:
+        shells = ipmi_shell.get_shells()
+        await shells.reap()
+        shell = await shells.get(bmc_host, username, password, extra_args=extra)
+
+    async def run(commands: List[str]) -> List[str]:
+        if not commands:
+            return []
+        left = _remaining(deadline)
+        if left is not None and left <= 0:
+            raise asyncio.TimeoutError()
+        limit = IPMI_TIMEOUT if left is None else min(IPMI_TIMEOUT, left)
+        try:
+            if shell is not None:
+                return await shell.run_many(commands, timeout=limit)
+            return list(
+                await asyncio.gather(*(run_ipmitool(base + extra + cmd.split(), timeout=limit) for cmd in commands))
+            )
+        except asyncio.TimeoutError as exc:
+            raise IpmiTimeout(f"ipmitool shell timed out after {limit:g}s") from exc
+
+    stage = cursors or log_cursor.get_cursors().stage()
+    cursor = stage.get_sel(bmc_host) if incremental else log_cursor.SelCursor()
+    sel_cmd: Optional[str] = "sel elist"
+    after_id: Optional[int] = None
+    info: Dict[str, str] = {}
+    if incremental:
+        info = parse_sel_info((await run(["sel info"]))[0])
+        sel_cmd, after_id = _plan_sel_read(cursor, info)
+
+    commands = ([sel_cmd] if sel_cmd else []) + ([sensor_cmd] if sensors else [])
+    outputs = await run(commands)
+    sel_out = outputs.pop(0) if sel_cmd else ""
+    logs = parse_ipmi_sel(sel_out, host=bmc_host, vendor=vendor, after_id=after_id)
+    ids = [rid for rid in map(sel_record_id, sel_out.splitlines()) if rid is not None]
+    if sel_cmd == "sel elist" and after_id is not None and ids and max(ids) <= after_id:
+        # Wrapped and the IDs restarted below our cursor: everything we read is new.
+        logs = parse_ipmi_sel(sel_out, host=bmc_host, vendor=vendor)
+    if sensors:
+        parse = parse_ipmi_sdr if sensor_cmd == "sdr elist" else parse_ipmi_sensor
+        samples.extend(parse(outputs[0], host=bmc_host))
+
+    if incremental:
+        if ids:
+            cursor.last_id = max(ids)
+        try:
+            cursor.entries = int(info.get("Entries", ""))
+        except ValueError:
+            cursor.entries = None
+        cursor.last_add, cursor.last_del = info.get("Last Add Time"), info.get("Last Del Time")
+        if cursors is None:
+            stage.commit()
+    return logs
+
+
+def parse_ipmi_sdr(sdr_output: str, *, host: str) -> List[sensor_store.SensorSample]:
+    """Numeric readings from ipmitool sdr elist output (same shape as ``parse_ipmi_sensor``).
+
+    Expected line example:
+    Fan1             | 41h | ok  |  7.1 | 3000 RPM
+    """
+    now = datetime.utcnow()
+    samples: List[sensor_store.SensorSample] = []
+    for line in sdr_output.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) < 5:
+            continue
+        value = _reading(parts[4])
+        if value is not None:
+            samples.append(sensor_store.SensorSample(timestamp=now, host=host, sensor=parts[0], value=value))
+    return samples
+
+
+IPMI_NATIVE = os.environ.get("TEMS_IPMI_NATIVE") == "1"
+IPMI_CIPHER_SUITE = int(os.environ.get("TEMS_IPMI_CIPHER_SUITE", "3"))
+# Tried in this order after TEMS_IPMI_CIPHER_SUITE when a BMC rejects it.
+IPMI_CIPHER_FALLBACK = (17, 3, 16, 15, 2, 1)
+
+
+def parse_ipmi_sel_raw(
+    raw: bytes,
+    *,
+    host: str,
+    vendor: str,
+    service: str = "ipmi",
+    sensor_names: Optional[Dict[int, str]] = None,
+) -> List[NormalizedLog]:
+    """Parse raw 16-byte SEL records (``sel writeraw`` dump or Get SEL Entry data) into normalized logs."""
+    return sel_decode.sel_to_logs(raw, host=host, vendor=vendor, service=service, sensor_names=sensor_names)
+
+
+async def _open_lan_client(
+    bmc_host: str, username: str, password: str, cipher_suite: Optional[int], deadline: Optional[float] = None
+) -> ipmi_lan.IpmiLanClient:
+    profiles = capabilities.get_profiles()
+    if cipher_suite is None:
+        known = profiles.get(bmc_host).cipher_suite
+        first = known or IPMI_CIPHER_SUITE
+        suites = [first] + [s for s in IPMI_CIPHER_FALLBACK if s != first]
+    else:
+        suites = [cipher_suite]
+    error: Optional[Exception] = None
+    for suite in suites:
+        try:
+            client = ipmi_lan.IpmiLanClient(bmc_host, username, password, cipher_suite=suite, deadline=deadline)
+            await client.connect()
+        except ipmi_lan.IpmiLanTimeout:
+            raise  # no answer at all: another suite will not help
+        except ipmi_lan.IpmiLanError as exc:
+            error = exc
+            continue
+        profiles.note(bmc_host, cipher_suite=suite)
+        return client
+    assert error is not None
+    raise error
+
+
+async def fetch_ipmi_lan_logs(
+    bmc_host: str,
+    username: str,
+    password: str,
+    vendor: str,
+    *,
+    sensors: bool = False,
+    incremental: bool = True,
+    cipher_suite: Optional[int] = None,
+    deadline: Optional[float] = None,
+    cursors: Optional[log_cursor.CursorStage] = None,
+    samples: Optional[List[sensor_store.SensorSample]] = None,
+) -> List[NormalizedLog]:
+    """Collect SEL logs (and optionally sensor readings into ``samples``) with the in-process RMCP+
+    client instead of ipmitool.
+
+    Incremental reads resume at the last seen record ID; a cleared SEL (erase time or entry count
+    went back) or a vanished cursor record triggers a full resync. Without an explicit
+    ``cipher_suite`` the one remembered in the host's capability profile is used, or
+    ``TEMS_IPMI_CIPHER_SUITE`` followed by ``IPMI_CIPHER_FALLBACK`` until one authenticates.
+    No request waits past ``deadline`` (event loop time): the client raises ``IpmiLanTimeout``.
+    """
+    stage = cursors or log_cursor.get_cursors().stage()
+    cursor = stage.get_sel(bmc_host) if incremental else log_cursor.SelCursor()
+    logs: List[NormalizedLog] = []
+    client = await _open_lan_client(bmc_host, username, password, cipher_suite, deadline)
+    try:
+        info = await client.get_sel_info()
+        last_add, last_del = str(info.last_add), str(info.last_erase)
+        after_id = cursor.last_id
+        if cursor.entries is None or last_del != cursor.last_del or info.entries < cursor.entries:
+            after_id = None  # first poll or SEL cleared: resync
+        unchanged = after_id is not None and info.entries == cursor.entries and last_add == cursor.last_add
+
+        records: List[bytes] = []
+        if info.entries and not unchanged:
+            try:
+                records = [r async for r in client.iter_sel(after_id or 0)]
+            except ipmi_lan.IpmiCommandError as exc:
+                if exc.code != ipmi_lan.CC_NOT_PRESENT or after_id is None:
+                    raise
+                records = [r async for r in client.iter_sel(0)]  # cursor record gone (wrap)
+        ids = [int.from_bytes(r[0:2], "little") for r in records]
+        fresh = [r for r, rid in zip(records, ids) if after_id is None or rid > after_id]
+        if records and after_id is not None and not fresh and last_add != cursor.last_add:
+            fresh = records  # IDs restarted below the cursor
+        names = {sensor.number: sensor.name for sensor in ipmi_lan.cached_sensors(bmc_host)}
+        logs.extend(parse_ipmi_sel_raw(b"".join(fresh), host=bmc_host, vendor=vendor, sensor_names=names))
+
+        if sensors and samples is not None:
+            now = datetime.utcnow()
+            samples.extend(
+                sensor_store.SensorSample(timestamp=now, host=bmc_host, sensor=sensor.name, value=value)
+                for sensor, value in await client.read_sensors()
             )
+    finally:
+        await client.close()
+
+    if incremental:
+        if ids:
+            cursor.last_id = max(ids)
+        cursor.entries, cursor.last_add, cursor.last_del = info.entries, last_add, last_del
+        if cursors is None:
+            stage.commit()
+    return logs
+
+
+COLLECT_HEDGE = os.environ.get("TEMS_COLLECT_HEDGE") == "1"
+# Also read sensors (through the SDR cache) on IPMI polls; they arrive as ``CollectResult.samples``.
+IPMI_SENSORS = os.environ.get("TEMS_IPMI_SENSORS") == "1"
+
+
+async def _attempt(
+    protocol: str,
+    *,
+    vendor: str,
+    bmc_host: str,
+    username: str,
+    password: str,
+    ipmi_shell: bool,
+    ipmi_native: bool,
+    ipmi_sensors: bool,
+    deadline: Optional[float],
+    cursors: log_cursor.CursorStage,
+    sink: Optional[PageSink] = None,
+    samples: Optional[List[sensor_store.SensorSample]] = None,
+) -> Tuple[log_batch.LogBatch, str]:
+    """One protocol attempt under the host's breaker; returns the logs and their completeness.
+
+    Cursor advances are staged in ``cursors``; the caller commits them only if it keeps the logs.
+    Redfish pages go straight to ``sink`` when one is given and are not part of the returned batch;
+    IPMI sensor readings go to ``samples``.
+    Success and definite rejections feed the host's capability profile. A BMC that has not answered
+    by ``deadline`` counts against its breaker only and raises ``asyncio.TimeoutError``; Redfish
+    services that timed out or failed make the result PARTIAL.
+    """
+    health = bmc_health.get_health()
+    profiles = capabilities.get_profiles()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        async with health.track(bmc_host, protocol):
+            try:
+                if protocol == "redfish":
+                    services: Dict[str, str] = {}
+                    logs = await fetch_redfish_logs(
+                        bmc_host,
+                        username,
+                        password,
+                        vendor,
+                        deadline=deadline,
+                        status=services,
+                        cursors=cursors,
+                        on_page=sink,
+                    )
+                    states = set(services.values())
+                    if states and states <= {TIMEOUT, ERROR}:
+                        raise BmcTimeout(f"{bmc_host} log services did not answer in time")
+                    state = COMPLETE if states <= {COMPLETE} else PARTIAL
+                else:
+                    if ipmi_native:
+                        fetch = fetch_ipmi_lan_logs(
+                            bmc_host,
+                            username,
+                            password,
+                            vendor,
+                            sensors=ipmi_sensors,
+                            deadline=deadline,
+                            cursors=cursors,
+                            samples=samples,
+                        )
+                    else:
+                        fetch = fetch_ipmi_logs(
+                            bmc_host,
+                            username,
+                            password,
+                            vendor,
+                            sensors=ipmi_sensors,
+                            use_shell=ipmi_shell,
+                            deadline=deadline,
+                            cursors=cursors,
+                            samples=samples,
+                        )
+                    logs, state = await asyncio.wait_for(fetch, _remaining(deadline)), COMPLETE
+            except asyncio.TimeoutError as exc:
+                raise BmcTimeout(f"{bmc_host} did not answer {protocol} in time") from exc
+    except asyncio.CancelledError:
+        raise
+    except (BmcTimeout, IpmiTimeout, ipmi_lan.IpmiLanTimeout) as exc:
+        raise asyncio.TimeoutError(str(exc)) from exc
+    except Exception as exc:
+        if _protocol_rejected(exc):
+            profiles.record(bmc_host, protocol, False)
+        raise
+    profiles.record(bmc_host, protocol, True)
+    if state == COMPLETE:
+        health.observe_latency(bmc_host, protocol, loop.time() - started)
+    return log_batch.LogBatch.from_records(logs), state
+
+
+def _protocol_rejected(exc: BaseException) -> bool:
+    """True if ``exc`` is the BMC saying the protocol does not work there (no Redfish service root,
+    IPMI command refused), as opposed to a timeout or an unreachable host."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        path = exc.request.url.path.rstrip("/")
+        return exc.response.status_code in (404, 405, 501) and path == "/redfish/v1"
+    if isinstance(exc, (IpmiError, ipmi_lan.IpmiLanError)):
+        return sdr_cache_mod.rejected(exc)
+    return False
+
+
+async def _race(
+    bmc_host: str,
+    protocols: List[str],
+    attempt: Callable[[str], Awaitable[Tuple[log_batch.LogBatch, str]]],
+    result: CollectResult,
+) -> bool:
+    """Hedged collection: start the host's preferred protocol, start the other one if the first has
+    not answered within its learned latency percentile (or failed), keep the first good result and
+    cancel the rest. Returns whether any protocol was attempted."""
+    health = bmc_health.get_health()
+    queue = health.order(bmc_host, protocols)
+    tasks: Dict[asyncio.Future, str] = {}
+    tried = False
+
+    def launch() -> None:
+        nonlocal tried
+        while queue:
+            protocol = queue.pop(0)
+            if health.allow(bmc_host, protocol):
+                tasks[asyncio.ensure_future(attempt(protocol))] = protocol
+                tried = True
+                return
+            result.sources[protocol] = SKIPPED
+
+    launch()
+    try:
+        while tasks:
+            # Attempts stop at the deadline on their own; only the hedge needs a timer.
+            hedge_after = health.hedge_delay(bmc_host, next(iter(tasks.values()))) if queue else None
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                protocol = tasks.pop(task)
+                try:
+                    logs, state = task.result()
+                except asyncio.TimeoutError:
+                    result.sources[protocol] = TIMEOUT
+                    continue
+                except Exception:
+                    result.sources[protocol] = ERROR
+                    continue
+                result.sources[protocol] = state
+                result.logs, result.protocol = logs, protocol
+                if state == COMPLETE:
+                    health.record_winner(bmc_host, protocol)
+                    capabilities.get_profiles().note(bmc_host, preferred=protocol)
+                return tried
+            if not tasks:
+                launch()  # first choice failed before the hedge fired: fall back now
+    finally:
+        for task, protocol in tasks.items():
+            task.cancel()
+            result.sources[protocol] = CANCELLED
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return tried
+
+
+async def collect(
+    *,
+    vendor: str,
+    bmc_host: str,
+    username: str,
+    password: str,
+    prefer_redfish: bool = True,
+    ipmi_shell: bool = IPMI_SHELL,
+    ipmi_native: bool = IPMI_NATIVE,
+    ipmi_sensors: bool = IPMI_SENSORS,
+    timeout: Optional[float] = None,
+    hedge: bool = COLLECT_HEDGE,
+    sink: Optional[PageSink] = None,
+    sample_sink: Optional[SampleSink] = None,
+) -> CollectResult:
+    """Collect via Redfish, falling back to IPMI, within an overall ``timeout`` (seconds).
+
+    The deadline is shared by both protocols. When it runs out, whatever was collected is
+    returned and ``CollectResult.sources`` marks the source PARTIAL or TIMEOUT. Protocols whose
+    per-host breaker is open (see ``bmc_health``) are SKIPPED without a network attempt; if
+    nothing may be tried, ``CircuitOpen`` is raised. Protocols the host's capability profile
+    (see ``capabilities``) knows to be unsupported are SKIPPED too, unless nothing else is left.
+    With ``hedge`` (``TEMS_COLLECT_HEDGE=1``) the protocols race instead of running strictly
+    one after the other (see ``_race``). With ``ipmi_sensors`` (``TEMS_IPMI_SENSORS=1``) IPMI
+    polls also read sensors through the SDR cache, into ``CollectResult.samples`` or, given a
+    ``sample_sink``, handed to it. If every attempt fails, the logs are empty and
+    ``sources`` says why; nothing is made up for an unreachable host.
+
+    With a ``sink`` the logs are not returned but handed to it, Redfish pages as soon as they are
+    read, so a large log is never held in memory at once; ``CollectResult.streamed`` counts them.
+    Pages that went out cannot be taken back, so a sink turns ``hedge`` off.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout if timeout else None
+    health = bmc_health.get_health()
+    profiles = capabilities.get_profiles()
+    result = CollectResult(logs=log_batch.LogBatch.empty())
+    protocols = (["redfish"] if prefer_redfish else []) + ["ipmi"]
+    usable = [p for p in protocols if profiles.usable(bmc_host, p)]
+    if usable:
+        for protocol in protocols:
+            if protocol not in usable:
+                result.sources[protocol] = SKIPPED
+        protocols = usable
+    preferred = profiles.get(bmc_host).preferred
+    if preferred and health.preferred(bmc_host) is None:
+        health.record_winner(bmc_host, preferred)
+
+    # One cursor stage per attempt: only the attempt whose logs are returned moves the cursors.
+    stages: Dict[str, log_cursor.CursorStage] = {}
+    readings: Dict[str, List[sensor_store.SensorSample]] = {}
+
+    async def deliver(batch: log_batch.LogBatch) -> None:
+        assert sink is not None
+        result.streamed += len(batch)
+        await sink(batch)
+
+    def attempt(protocol: str) -> Awaitable[Tuple[log_batch.LogBatch, str]]:
+        stages[protocol] = log_cursor.get_cursors().stage()
+        readings[protocol] = []
+        return _attempt(
+            protocol,
+            vendor=vendor,
+            bmc_host=bmc_host,
+            username=username,
+            password=password,
+            ipmi_shell=ipmi_shell,
+            ipmi_native=ipmi_native,
+            ipmi_sensors=ipmi_sensors,
+            deadline=deadline,
+            cursors=stages[protocol],
+            sink=deliver if sink is not None else None,
+            samples=readings[protocol],
         )
-    return normalized
+
+    tried = False
+    if hedge and sink is None and len(protocols) > 1:
+        tried = await _race(bmc_host, protocols, attempt, result)
+    else:
+        for protocol in protocols:
+            if not health.allow(bmc_host, protocol):
+                result.sources[protocol] = SKIPPED
+                continue
+            if _remaining(deadline) == 0:
+                health.release(bmc_host, protocol)
+                result.sources[protocol] = TIMEOUT
+                break
+            tried = True
+            try:
+                result.logs, result.sources[protocol] = await attempt(protocol)
+                result.protocol = protocol
+                break
+            except asyncio.TimeoutError:
+                result.sources[protocol] = TIMEOUT
+            except Exception:
+                # Fallback to IPMI if Redfish fails
+                result.sources[protocol] = ERROR
+    if result.protocol is not None:
+        if sink is not None and len(result.logs):
+            await deliver(result.logs)
+            result.logs = log_batch.LogBatch.empty()
+        result.samples = readings[result.protocol]
+        if sample_sink is not None and result.samples:
+            await sample_sink(result.samples)
+            result.samples = []
+        stages[result.protocol].commit()
+        return result
+    if not tried:
+        retry = min(health.retry_after(bmc_host, p) for p in protocols)
+        raise bmc_health.CircuitOpen(bmc_host, retry)
+    return result
 
 
 # Convenience wrapper to decide Redfish vs IPMI
@@ -162,18 +1144,26 @@ async def collect_logs(
     username: str,
     password: str,
     prefer_redfish: bool = True,
-) -> List[NormalizedLog]:
-    if prefer_redfish:
-        try:
-            return await fetch_redfish_logs(bmc_host, username, password, vendor)
-        except Exception:
-            # Fallback to IPMI if Redfish fails
-            pass
-    try:
-        sel_out = run_ipmitool(
-            ["ipmitool", "-I", "lanplus", "-H", bmc_host, "-U", username, "-P", password, "sel", "elist"]
-        )
-        return parse_ipmi_sel(sel_out, host=bmc_host, vendor=vendor)
-    except Exception:
-        sel_mock = "1 | 09/13/2024 | 12:34:56 | Critical | PSU1 input lost"
-        return parse_ipmi_sel(sel_mock, host=bmc_host, vendor=vendor)
+    ipmi_shell: bool = IPMI_SHELL,
+    ipmi_native: bool = IPMI_NATIVE,
+    timeout: Optional[float] = None,
+    hedge: bool = COLLECT_HEDGE,
+    sink: Optional[PageSink] = None,
+    sample_sink: Optional[SampleSink] = None,
+) -> log_batch.LogBatch:
+    """Logs only of ``collect`` (empty with a ``sink``); use ``collect`` when completeness matters.
+    IPMI sensor readings are dropped unless a ``sample_sink`` takes them."""
+    result = await collect(
+        vendor=vendor,
+        bmc_host=bmc_host,
+        username=username,
+        password=password,
+        prefer_redfish=prefer_redfish,
+        ipmi_shell=ipmi_shell,
+        ipmi_native=ipmi_native,
+        timeout=timeout,
+        hedge=hedge,
+        sink=sink,
+        sample_sink=sample_sink,
+    )
+    return result.logs
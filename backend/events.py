@@ -0,0 +1,184 @@
+"""
+Redfish EventService push receiver.
+
+Instead of polling every BMC, ``EventSubscriptions.subscribe`` registers a
+Redfish EventService subscription whose ``Destination`` points back at this
+API (``<base_url>/api/events/<context>``). The context is a random token per
+host: the receiving endpoint uses it to map a pushed batch to its BMC and
+rejects batches with unknown tokens. Pushed events are normalized through
+``collector.normalize_log`` and published to the same ``pipeline`` as polled
+logs, so alerts arrive in well under a second.
+
+Subscriptions we created earlier (same destination prefix) are deleted before
+subscribing again, so restarts do not pile up stale subscriptions on BMCs
+with only a handful of subscription slots.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+import collector
+import http_pool
+import redfish_session
+
+SUBSCRIPTIONS_PATH = "/redfish/v1/EventService/Subscriptions"
+# Pre-1.6 services need explicit EventTypes; newer ones ignore it in favour of RegistryPrefixes.
+DEFAULT_EVENT_TYPES = ["Alert", "StatusChange", "ResourceAdded", "ResourceRemoved"]
+
+
+@dataclass
+class Subscription:
+    host: str
+    vendor: str
+    username: str
+    password: str
+    context: str
+    location: Optional[str] = None
+
+
+def normalize_event(event: Dict[str, Any], *, host: str, vendor: str) -> collector.NormalizedLog:
+    """Normalize one entry of a Redfish Event ``Events`` array."""
+    ts = event.get("EventTimestamp")
+    try:
+        timestamp = datetime.fromisoformat(ts.replace("Z", "+00:00")) if ts else datetime.utcnow()
+    except ValueError:
+        timestamp = datetime.utcnow()
+    origin = event.get("OriginOfCondition")
+    if isinstance(origin, dict):
+        origin = origin.get("@odata.id")
+    sev = event.get("MessageSeverity") or event.get("Severity") or "OK"
+    msg = event.get("Message") or event.get("MessageId") or event.get("EventType") or "event"
+    # Events for a log entry link it (Event v1.4+): use its URI, the record id polling stores.
+    entry = event.get("LogEntry")
+    entry_id = entry.get("@odata.id") if isinstance(entry, dict) else None
+    return collector.normalize_log(
+        timestamp=timestamp,
+        host=host,
+        vendor=vendor,
+        service=str(origin or event.get("MessageId") or "event"),
+        severity=str(sev),
+        message=str(msg),
+        record_id=str(entry_id or event.get("EventId") or ""),
+    )
+
+
+class EventSubscriptions:
+    def __init__(self, base_url: Optional[str] = None) -> None:
+        self.base_url = (base_url or os.environ.get("TEMS_EVENT_BASE_URL", "")).rstrip("/")
+        self._by_context: Dict[str, Subscription] = {}
+
+    def destination(self, context: str) -> str:
+        return f"{self.base_url}/api/events/{context}"
+
+    def lookup(self, context: str) -> Optional[Subscription]:
+        return self._by_context.get(context)
+
+    async def _drop_stale(
+        self, pool: http_pool.ClientPool, host: str, username: str, password: str
+    ) -> None:
+        sessions = redfish_session.get_sessions()
+        res = await sessions.get(pool, f"https://{host}{SUBSCRIPTIONS_PATH}", username=username, password=password)
+        if res.status_code != 200:
+            return
+        prefix = f"{self.base_url}/api/events/"
+        for member in res.json().get("Members", []):
+            url = f"https://{host}{member['@odata.id']}"
+            detail = await sessions.get(pool, url, username=username, password=password)
+            if detail.status_code == 200 and str(detail.json().get("Destination", "")).startswith(prefix):
+                await sessions.request(pool, "DELETE", url, username=username, password=password)
+
+    async def subscribe(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        vendor: str,
+        *,
+        pool: Optional[http_pool.ClientPool] = None,
+    ) -> Subscription:
+        if not self.base_url:
+            raise ValueError("TEMS_EVENT_BASE_URL is not set; BMCs need a reachable destination")
+        client = pool or http_pool.get_pool()
+        sessions = redfish_session.get_sessions()
+        await self._drop_stale(client, host, username, password)
+        sub = Subscription(
+            host=host, vendor=vendor, username=username, password=password, context=secrets.token_urlsafe(16)
+        )
+        body = {
+            "Destination": self.destination(sub.context),
+            "Protocol": "Redfish",
+            "Context": sub.context,
+            "EventFormatType": "Event",
+        }
+        res = await sessions.request(
+            client, "POST", f"https://{host}{SUBSCRIPTIONS_PATH}", username=username, password=password, json=body
+        )
+        if res.status_code == 400:
+            # Older services (iLO 4/5, early iDRAC 9) insist on EventTypes and reject EventFormatType.
+            body.pop("EventFormatType")
+            body["EventTypes"] = DEFAULT_EVENT_TYPES
+            res = await sessions.request(
+                client, "POST", f"https://{host}{SUBSCRIPTIONS_PATH}", username=username, password=password, json=body
+            )
+        res.raise_for_status()
+        location = res.headers.get("Location")
+        if location and location.startswith("/"):
+            location = f"https://{host}{location}"
+        sub.location = location
+        for ctx in [c for c, s in self._by_context.items() if s.host == host]:
+            del self._by_context[ctx]
+        self._by_context[sub.context] = sub
+        return sub
+
+    async def unsubscribe_all(self, *, pool: Optional[http_pool.ClientPool] = None) -> None:
+        """Delete every subscription this process created."""
+        client = pool or http_pool.get_pool()
+        sessions = redfish_session.get_sessions()
+        subs, self._by_context = list(self._by_context.values()), {}
+        for sub in subs:
+            if not sub.location:
+                continue
+            try:
+                await sessions.request(client, "DELETE", sub.location, username=sub.username, password=sub.password)
+            except httpx.HTTPError:
+                pass
+
+    def receive(self, context: str, payload: Dict[str, Any]) -> List[collector.NormalizedLog]:
+        """Normalize a pushed Event document; raises KeyError for unknown contexts."""
+        sub = self._by_context[context]
+        events = payload.get("Events") or []
+        return [normalize_event(e, host=sub.host, vendor=sub.vendor) for e in events if isinstance(e, dict)]
+
+
+_subscriptions: Optional[EventSubscriptions] = None
+
+
+def get_subscriptions() -> EventSubscriptions:
+    global _subscriptions
+    if _subscriptions is None:
+        _subscriptions = EventSubscriptions()
+    return _subscriptions
+
+
+async def subscribe_many(
+    servers: List[Dict[str, str]], *, pool: Optional[http_pool.ClientPool] = None
+) -> List[Dict[str, Any]]:
+    """Subscribe every server concurrently; report per-host success or error."""
+    subs = get_subscriptions()
+
+    async def one(s: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            sub = await subs.subscribe(s["bmc_host"], s["username"], s["password"], s["vendor"], pool=pool)
+            return {"bmc_host": s["bmc_host"], "subscribed": True, "location": sub.location}
+        except Exception as exc:
+            return {"bmc_host": s["bmc_host"], "subscribed": False, "error": f"{type(exc).__name__}: {exc}"}
+
+    return list(await asyncio.gather(*(one(s) for s in servers)))
@@ -0,0 +1,127 @@
+"""
+Shared HTTP client pool for Redfish traffic.
+
+BMC web servers are slow to shake hands (300ms+ TLS on iLO/iDRAC), so all
+Redfish calls share one app-lifetime ``httpx.AsyncClient`` whose keep-alive
+connections are reused across polls and endpoints. httpx only limits
+connections globally, so the pool additionally caps in-flight requests per
+BMC host; with keep-alive that bounds the connections held open per host.
+The per-host cap is an AIMD limit (``bmc_health.AimdLimiter``) starting at
+``per_host``: it halves when a BMC times out or answers 429/503 and creeps
+back up as requests succeed.
+
+The FastAPI lifespan opens the default pool on startup and closes it on
+shutdown. Scripts that import ``collector`` directly get a lazily created
+pool and should call ``close_pool()`` when done.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+import bmc_health
+
+OVERLOAD_STATUS = {429, 503}
+
+
+class ClientPool:
+    def __init__(
+        self,
+        *,
+        max_connections: int = 512,
+        max_keepalive: int = 256,
+        per_host: int = 4,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 10.0,
+        verify: bool = False,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.verify = verify
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, bmc_health.AimdLimiter] = {}
+
+    @classmethod
+    def from_env(cls) -> "ClientPool":
+        return cls(
+            max_connections=int(os.environ.get("TEMS_HTTP_MAX_CONNECTIONS", "512")),
+            max_keepalive=int(os.environ.get("TEMS_HTTP_MAX_KEEPALIVE", "256")),
+            per_host=int(os.environ.get("TEMS_HTTP_PER_HOST", "4")),
+            keepalive_expiry=float(os.environ.get("TEMS_HTTP_KEEPALIVE_EXPIRY", "60")),
+            timeout=float(os.environ.get("TEMS_HTTP_TIMEOUT", "10")),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(verify=self.verify, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def open(self) -> None:
+        _ = self.client
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._host_slots.clear()
+
+    def limiter(self, host: str) -> bmc_health.AimdLimiter:
+        lim = self._host_slots.get(host)
+        if lim is None:
+            lim = self._host_slots[host] = bmc_health.AimdLimiter(initial=self.per_host, maximum=self.per_host)
+        return lim
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        lim = self.limiter(httpx.URL(url).host)
+        async with lim.slot():
+            try:
+                res = await self.client.request(method, url, **kwargs)
+            except httpx.TimeoutException:
+                lim.on_overload()
+                raise
+        if res.status_code in OVERLOAD_STATUS:
+            lim.on_overload()
+        else:
+            lim.on_success()
+        return res
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+
+_pool: Optional[ClientPool] = None
+
+
+def get_pool() -> ClientPool:
+    """Return the process-wide pool, creating it from env on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ClientPool.from_env()
+    return _pool
+
+
+def set_pool(pool: ClientPool) -> None:
+    global _pool
+    _pool = pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,533 @@
+"""
+In-process asyncio IPMI v2.0 (RMCP+) LAN client.
+
+Forking ``ipmitool`` per query caps a collector box at a few dozen concurrent
+IPMI polls. This client speaks RMCP+ over UDP directly, so one process can
+poll thousands of hosts. It covers only what collection needs:
+
+- session setup: Open Session, RAKP 1-4, Set Session Privilege, Close Session
+- Get SEL Info / Get SEL Entry (whole 16-byte records)
+- Reserve SDR Repository / Get SDR (chunked reads)
+- Get Sensor Reading, with full-sensor-record linearization for display
+
+Supported cipher suites: 1, 2, 3 (HMAC-SHA1) and 15, 16, 17 (HMAC-SHA256).
+Suites with AES-CBC-128 confidentiality (3, 17) need the ``cryptography``
+package; without it only integrity-only suites can be used.
+
+Decoded SDR sensor lists are cached per host for the life of the process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import os
+import struct
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # pragma: no cover - optional dependency
+    Cipher = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+RMCP_HEADER = b"\x06\x00\xff\x07"
+AUTH_RMCPP = 0x06
+
+PAYLOAD_IPMI = 0x00
+PAYLOAD_OPEN_SESSION_REQ = 0x10
+PAYLOAD_OPEN_SESSION_RSP = 0x11
+PAYLOAD_RAKP1 = 0x12
+PAYLOAD_RAKP2 = 0x13
+PAYLOAD_RAKP3 = 0x14
+PAYLOAD_RAKP4 = 0x15
+
+NETFN_SENSOR = 0x04
+NETFN_APP = 0x06
+NETFN_STORAGE = 0x0A
+
+BMC_ADDR = 0x20
+CONSOLE_ADDR = 0x81
+
+PRIV_USER = 0x02
+PRIV_ADMIN = 0x04
+
+# cipher suite -> (authentication, integrity, confidentiality) algorithm numbers
+CIPHER_SUITES: Dict[int, Tuple[int, int, int]] = {
+    1: (1, 0, 0),
+    2: (1, 1, 0),
+    3: (1, 1, 1),
+    15: (3, 0, 0),
+    16: (3, 4, 0),
+    17: (3, 4, 1),
+}
+_AUTH_HASH = {1: hashlib.sha1, 3: hashlib.sha256}
+_RAKP4_ICV_LEN = {1: 12, 3: 16}
+_INTEGRITY = {1: (hashlib.sha1, 12), 4: (hashlib.sha256, 16)}
+
+CC_RESERVATION_CANCELLED = 0xC5
+CC_CANNOT_RETURN_BYTES = 0xCA
+CC_NOT_PRESENT = 0xCB
+
+LAST_RECORD = 0xFFFF
+
+
+class IpmiLanError(RuntimeError):
+    pass
+
+
+class IpmiLanTimeout(IpmiLanError):
+    """The BMC did not answer after all retries."""
+
+
+class IpmiCommandError(IpmiLanError):
+    def __init__(self, netfn: int, cmd: int, code: int) -> None:
+        super().__init__(f"IPMI netfn 0x{netfn:02x} cmd 0x{cmd:02x} failed: completion code 0x{code:02x}")
+        self.netfn = netfn
+        self.cmd = cmd
+        self.code = code
+
+
+def checksum(data: bytes) -> int:
+    return (-sum(data)) & 0xFF
+
+
+def _hmac(hash_fn: Callable, key: bytes, data: bytes) -> bytes:
+    return hmac.new(key, data, hash_fn).digest()
+
+
+@dataclass
+class SelInfo:
+    version: int
+    entries: int
+    free_space: int
+    last_add: int  # seconds since epoch (0xFFFFFFFF = never)
+    last_erase: int
+
+
+@dataclass
+class SdrSensor:
+    record_id: int
+    number: int
+    lun: int
+    name: str
+    sensor_type: int
+    reading_type: int
+    unit: str
+    analog: bool
+    signed: int  # 0 unsigned, 1 one's complement, 2 two's complement
+    m: int = 1
+    b: int = 0
+    b_exp: int = 0
+    r_exp: int = 0
+
+    def convert(self, raw: int) -> float:
+        if self.signed == 1 and raw & 0x80:
+            raw = -((~raw) & 0x7F)
+        elif self.signed == 2 and raw & 0x80:
+            raw -= 0x100
+        return (self.m * raw + self.b * 10 ** self.b_exp) * 10 ** self.r_exp
+
+
+UNITS = {1: "degrees C", 2: "degrees F", 3: "degrees K", 4: "Volts", 5: "Amps", 6: "Watts", 7: "Joules", 18: "RPM", 19: "Hz"}
+
+
+def _signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+def parse_sdr_sensor(record: bytes) -> Optional[SdrSensor]:
+    """Decode a full (type 01h) or compact (type 02h) sensor record; other types return None."""
+    if len(record) < 5:
+        return None
+    record_id, rtype = struct.unpack_from("<H", record)[0], record[3]
+    if rtype == 0x01 and len(record) >= 48:
+        units1 = record[20]
+        fmt = (units1 >> 6) & 0x03
+        name = record[48 : 48 + (record[47] & 0x1F)].decode("ascii", "replace")
+        return SdrSensor(
+            record_id=record_id,
+            number=record[7],
+            lun=record[6] & 0x03,
+            name=name,
+            sensor_type=record[12],
+            reading_type=record[13],
+            unit=UNITS.get(record[21], ""),
+            analog=fmt != 0x03,
+            signed=fmt if fmt != 0x03 else 0,
+            m=_signed(record[24] | ((record[25] & 0xC0) << 2), 10),
+            b=_signed(record[26] | ((record[27] & 0xC0) << 2), 10),
+            r_exp=_signed(record[29] >> 4, 4),
+            b_exp=_signed(record[29] & 0x0F, 4),
+        )
+    if rtype == 0x02 and len(record) >= 32:
+        name = record[32 : 32 + (record[31] & 0x1F)].decode("ascii", "replace")
+        return SdrSensor(
+            record_id=record_id,
+            number=record[7],
+            lun=record[6] & 0x03,
+            name=name,
+            sensor_type=record[12],
+            reading_type=record[13],
+            unit=UNITS.get(record[21], ""),
+            analog=False,
+            signed=0,
+        )
+    return None
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.queue.put_nowait(data)
+
+
+class IpmiLanClient:
+    """One RMCP+ session to one BMC; use as an async context manager."""
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        *,
+        port: int = 623,
+        cipher_suite: int = 3,
+        privilege: int = PRIV_ADMIN,
+        kg: Optional[bytes] = None,
+        timeout: float = 2.0,
+        retries: int = 3,
+        deadline: Optional[float] = None,
+    ) -> None:
+        if cipher_suite not in CIPHER_SUITES:
+            raise IpmiLanError(f"unsupported cipher suite {cipher_suite}")
+        self.auth_alg, self.integrity_alg, self.conf_alg = CIPHER_SUITES[cipher_suite]
+        if self.conf_alg and Cipher is None:
+            raise IpmiLanError(f"cipher suite {cipher_suite} needs the 'cryptography' package (AES-CBC-128)")
+        self.host = host
+        self.port = port
+        self.username = username.encode()
+        self.password = password.encode()
+        self.kg = kg
+        self.privilege = privilege
+        self.timeout = timeout
+        self.retries = retries
+        self.deadline = deadline  # event loop time; no request waits past it
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._protocol: Optional[_Protocol] = None
+        self._lock = asyncio.Lock()
+        self._rq_seq = 0
+        self._session_seq = 0
+        self._session_id = 0
+        self._active = False
+        self._k1 = b""
+        self._aes_key = b""
+
+    async def __aenter__(self) -> "IpmiLanClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    # -- transport ---------------------------------------------------------
+
+    async def connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, self._protocol = await loop.create_datagram_endpoint(
+            _Protocol, remote_addr=(self.host, self.port)
+        )
+        try:
+            await self._open_session()
+        except BaseException:
+            self._transport.close()
+            raise
+
+    async def close(self) -> None:
+        if self._active:
+            try:
+                await self.raw(NETFN_APP, 0x3C, struct.pack("<I", self._session_id))
+            except IpmiLanError:
+                pass
+            self._active = False
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def _exchange(self, build: Callable[[], bytes], accept: Callable[[bytes], Optional[T]]) -> T:
+        """Send ``build()`` and wait for a datagram ``accept`` maps to a result; retry on timeout."""
+        assert self._transport is not None and self._protocol is not None
+        queue = self._protocol.queue
+        loop = asyncio.get_running_loop()
+        for _ in range(self.retries):
+            if self.deadline is not None and loop.time() >= self.deadline:
+                break
+            self._transport.sendto(build())
+            deadline = loop.time() + self.timeout
+            if self.deadline is not None:
+                deadline = min(deadline, self.deadline)
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    packet = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                try:
+                    result = accept(packet)
+                except (IndexError, struct.error, ValueError):
+                    continue  # malformed or stale datagram
+                if result is not None:
+                    return result
+        raise IpmiLanTimeout(f"no IPMI response from {self.host}")
+
+    # -- framing -----------------------------------------------------------
+
+    def _ipmi_message(self, netfn: int, cmd: int, data: bytes, lun: int) -> bytes:
+        self._rq_seq = (self._rq_seq + 1) & 0x3F
+        head = bytes([BMC_ADDR, (netfn << 2) | (lun & 0x03)])
+        body = bytes([CONSOLE_ADDR, self._rq_seq << 2, cmd]) + data
+        return head + bytes([checksum(head)]) + body + bytes([checksum(body)])
+
+    def _encrypt(self, payload: bytes) -> bytes:
+        iv = os.urandom(16)
+        pad = (16 - (len(payload) + 1) % 16) % 16
+        data = payload + bytes(range(1, pad + 1)) + bytes([pad])
+        enc = Cipher(algorithms.AES(self._aes_key), modes.CBC(iv)).encryptor()
+        return iv + enc.update(data) + enc.finalize()
+
+    def _decrypt(self, payload: bytes) -> bytes:
+        dec = Cipher(algorithms.AES(self._aes_key), modes.CBC(payload[:16])).decryptor()
+        data = dec.update(payload[16:]) + dec.finalize()
+        return data[: -1 - data[-1]]
+
+    def _wrap(self, payload_type: int, payload: bytes) -> bytes:
+        """RMCP+ packet; IPMI payloads inside an active session are signed/encrypted per cipher suite."""
+        in_session = self._active and payload_type == PAYLOAD_IPMI
+        encrypted = in_session and bool(self.conf_alg)
+        authenticated = in_session and bool(self.integrity_alg)
+        if encrypted:
+            payload = self._encrypt(payload)
+        if in_session:
+            self._session_seq = (self._session_seq + 1) & 0xFFFFFFFF or 1
+        ptype = payload_type | (0x80 if encrypted else 0) | (0x40 if authenticated else 0)
+        msg = struct.pack(
+            "<BBIIH",
+            AUTH_RMCPP,
+            ptype,
+            self._session_id if in_session else 0,
+            self._session_seq if in_session else 0,
+            len(payload),
+        ) + payload
+        if authenticated:
+            pad = (4 - (len(msg) + 2) % 4) % 4
+            msg += b"\xff" * pad + bytes([pad, 0x07])
+            hash_fn, length = _INTEGRITY[self.integrity_alg]
+            msg += _hmac(hash_fn, self._k1, msg)[:length]
+        return RMCP_HEADER + msg
+
+    def _unwrap(self, packet: bytes) -> Tuple[int, bytes]:
+        if packet[3] != 0x07 or packet[4] != AUTH_RMCPP:
+            raise ValueError("not an RMCP+ packet")
+        ptype, plen = packet[5], struct.unpack_from("<H", packet, 14)[0]
+        payload = packet[16 : 16 + plen]
+        if ptype & 0x40:
+            hash_fn, length = _INTEGRITY[self.integrity_alg]
+            signed, code = packet[4:-length], packet[-length:]
+            if not hmac.compare_digest(_hmac(hash_fn, self._k1, signed)[:length], code):
+                raise ValueError("integrity check failed")
+        if ptype & 0x80:
+            payload = self._decrypt(payload)
+        return ptype & 0x3F, payload
+
+    # -- session setup -----------------------------------------------------
+
+    async def _open_session(self) -> None:
+        hash_fn = _AUTH_HASH[self.auth_alg]
+        console_sid = struct.unpack("<I", os.urandom(4))[0] or 1
+        tag = os.urandom(1)[0]
+
+        def algo(kind: int, alg: int) -> bytes:
+            return bytes([kind, 0, 0, 8, alg, 0, 0, 0])
+
+        open_req = (
+            struct.pack("<BBHI", tag, self.privilege, 0, console_sid)
+            + algo(0, self.auth_alg)
+            + algo(1, self.integrity_alg)
+            + algo(2, self.conf_alg)
+        )
+
+        def accept_open(packet: bytes) -> Optional[bytes]:
+            ptype, payload = self._unwrap(packet)
+            return payload if ptype == PAYLOAD_OPEN_SESSION_RSP and payload[0] == tag else None
+
+        rsp = await self._exchange(lambda: self._wrap(PAYLOAD_OPEN_SESSION_REQ, open_req), accept_open)
+        if rsp[1] != 0:
+            raise IpmiLanError(f"open session rejected by {self.host}: status 0x{rsp[1]:02x}")
+        managed_sid = struct.unpack_from("<I", rsp, 8)[0]
+
+        rm = os.urandom(16)
+        role = self.privilege | 0x10  # name-only lookup
+        user = bytes([role, len(self.username)]) + self.username
+        rakp1 = struct.pack("<B3xI", tag, managed_sid) + rm + bytes([role, 0, 0, len(self.username)]) + self.username
+
+        def accept_rakp(expected: int) -> Callable[[bytes], Optional[bytes]]:
+            def accept(packet: bytes) -> Optional[bytes]:
+                ptype, payload = self._unwrap(packet)
+                return payload if ptype == expected and payload[0] == tag else None
+
+            return accept
+
+        rakp2 = await self._exchange(lambda: self._wrap(PAYLOAD_RAKP1, rakp1), accept_rakp(PAYLOAD_RAKP2))
+        if rakp2[1] != 0:
+            raise IpmiLanError(f"RAKP2 from {self.host}: status 0x{rakp2[1]:02x} (bad user or cipher suite?)")
+        rc, guid = rakp2[8:24], rakp2[24:40]
+        expected = _hmac(hash_fn, self.password, struct.pack("<II", console_sid, managed_sid) + rm + rc + guid + user)
+        if not hmac.compare_digest(rakp2[40 : 40 + len(expected)], expected):
+            raise IpmiLanError(f"RAKP2 auth code mismatch from {self.host} (wrong password?)")
+
+        sik = _hmac(hash_fn, self.kg or self.password, rm + rc + user)
+        digest = hash_fn().digest_size
+        self._k1 = _hmac(hash_fn, sik, b"\x01" * digest)
+        self._aes_key = _hmac(hash_fn, sik, b"\x02" * digest)[:16]
+
+        rakp3 = struct.pack("<BB2xI", tag, 0, managed_sid) + _hmac(
+            hash_fn, self.password, rc + struct.pack("<I", console_sid) + user
+        )
+        rakp4 = await self._exchange(lambda: self._wrap(PAYLOAD_RAKP3, rakp3), accept_rakp(PAYLOAD_RAKP4))
+        if rakp4[1] != 0:
+            raise IpmiLanError(f"RAKP4 from {self.host}: status 0x{rakp4[1]:02x}")
+        icv_len = _RAKP4_ICV_LEN[self.auth_alg]
+        icv = _hmac(hash_fn, sik, rm + struct.pack("<I", managed_sid) + guid)[:icv_len]
+        if not hmac.compare_digest(rakp4[8 : 8 + icv_len], icv):
+            raise IpmiLanError(f"RAKP4 integrity check failed for {self.host}")
+
+        self._session_id = managed_sid
+        self._session_seq = 0
+        self._active = True
+        await self.raw(NETFN_APP, 0x3B, bytes([self.privilege]))  # Set Session Privilege Level
+
+    # -- commands ----------------------------------------------------------
+
+    async def raw(self, netfn: int, cmd: int, data: bytes = b"", *, lun: int = 0) -> bytes:
+        """Send one IPMI request in the session; return response data after the completion code."""
+        async with self._lock:
+            message = self._ipmi_message(netfn, cmd, data, lun)
+            seq = self._rq_seq
+
+            def accept(packet: bytes) -> Optional[bytes]:
+                ptype, msg = self._unwrap(packet)
+                if ptype != PAYLOAD_IPMI or msg[4] >> 2 != seq or msg[5] != cmd:
+                    return None
+                return msg[6:-1]
+
+            rsp = await self._exchange(lambda: self._wrap(PAYLOAD_IPMI, message), accept)
+        if rsp[0] != 0:
+            raise IpmiCommandError(netfn, cmd, rsp[0])
+        return rsp[1:]
+
+    async def get_sel_info(self) -> SelInfo:
+        data = await self.raw(NETFN_STORAGE, 0x40)
+        version, entries, free, last_add, last_erase = struct.unpack_from("<BHHII", data)
+        return SelInfo(version, entries, free, last_add, last_erase)
+
+    async def get_sel_entry(self, record_id: int, reservation: int = 0) -> Tuple[int, bytes]:
+        """Return ``(next_record_id, 16-byte record)``."""
+        data = await self.raw(NETFN_STORAGE, 0x43, struct.pack("<HHBB", reservation, record_id, 0, 0xFF))
+        return struct.unpack_from("<H", data)[0], data[2:18]
+
+    async def iter_sel(self, start: int = 0) -> AsyncIterator[bytes]:
+        """Yield raw SEL records from ``start`` (0 = first) to the end of the log."""
+        record_id = start
+        while True:
+            next_id, record = await self.get_sel_entry(record_id)
+            yield record
+            if next_id == LAST_RECORD or next_id == record_id:
+                return
+            record_id = next_id
+
+    async def reserve_sdr(self) -> int:
+        return struct.unpack_from("<H", await self.raw(NETFN_STORAGE, 0x22))[0]
+
+    async def get_sdr(self, record_id: int, *, chunk: int = 16) -> Tuple[int, bytes]:
+        """Return ``(next_record_id, full SDR record)``, reading in ``chunk``-byte pieces."""
+        reservation = await self.reserve_sdr()
+        offset, record, length = 0, b"", 5
+        next_id = LAST_RECORD
+        while offset < length:
+            size = min(chunk, length - offset) if offset else 5
+            try:
+                data = await self.raw(
+                    NETFN_STORAGE, 0x23, struct.pack("<HHBB", reservation, record_id, offset, size)
+                )
+            except IpmiCommandError as exc:
+                if exc.code == CC_RESERVATION_CANCELLED:
+                    reservation = await self.reserve_sdr()
+                    continue
+                if exc.code == CC_CANNOT_RETURN_BYTES and chunk > 4:
+                    chunk //= 2
+                    continue
+                raise
+            next_id = struct.unpack_from("<H", data)[0]
+            record += data[2:]
+            offset += len(data) - 2
+            if offset == 5 and length == 5:
+                length = 5 + record[4]
+        return next_id, record
+
+    async def iter_sdr(self) -> AsyncIterator[bytes]:
+        record_id = 0
+        while True:
+            next_id, record = await self.get_sdr(record_id)
+            yield record
+            if next_id == LAST_RECORD or next_id == record_id:
+                return
+            record_id = next_id
+
+    async def get_sensor_reading(self, number: int, *, lun: int = 0) -> Optional[Tuple[int, int]]:
+        """Return ``(raw reading, state bits)`` or None if the reading is unavailable."""
+        data = await self.raw(NETFN_SENSOR, 0x2D, bytes([number]), lun=lun)
+        flags = data[1]
+        if flags & 0x20 or not flags & 0x40:  # reading unavailable / scanning disabled
+            return None
+        state = data[2] | (data[3] << 8) if len(data) >= 4 else (data[2] if len(data) >= 3 else 0)
+        return data[0], state
+
+    async def sensors(self, *, refresh: bool = False) -> List[SdrSensor]:
+        """SDR sensor list for this host, read once per process and cached."""
+        if refresh or self.host not in _SDR_CACHE:
+            found: List[SdrSensor] = []
+            async for record in self.iter_sdr():
+                sensor = parse_sdr_sensor(record)
+                if sensor is not None:
+                    found.append(sensor)
+            _SDR_CACHE[self.host] = found
+        return _SDR_CACHE[self.host]
+
+    async def read_sensors(self) -> List[Tuple[SdrSensor, float]]:
+        """Current reading of every analog sensor, converted to engineering units."""
+        readings: List[Tuple[SdrSensor, float]] = []
+        for sensor in await self.sensors():
+            if not sensor.analog:
+                continue
+            try:
+                reading = await self.get_sensor_reading(sensor.number, lun=sensor.lun)
+            except IpmiCommandError:
+                continue
+            if reading is not None:
+                readings.append((sensor, sensor.convert(reading[0])))
+        return readings
+
+
+_SDR_CACHE: Dict[str, List[SdrSensor]] = {}
+
+
+def cached_sensors(host: str) -> List[SdrSensor]:
+    """SDR sensors already read for ``host`` (empty if never read); does not touch the network."""
+    return _SDR_CACHE.get(host, [])
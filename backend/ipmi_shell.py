@@ -0,0 +1,230 @@
+"""
+Persistent ``ipmitool shell`` sessions.
+
+Every ``ipmitool -I lanplus`` invocation negotiates a fresh RMCP+ session, so
+collecting SEL, sensors and FRU as three processes pays three session setups.
+An ``IpmiShell`` keeps one ``ipmitool ... shell`` process per host and pipes
+commands through its stdin. After each command we send ``echo <marker>``
+(ipmitool's built-in echo) and read stdout up to that marker, which splits the
+stream back into per-command output. Diagnostics are split the same way: an
+unknown command makes ipmitool print "Invalid command: <name>" on stderr, so a
+deliberately unknown marker command ends each command's stderr. A command that
+prints nothing but diagnostics raises ``IpmiError``.
+
+The password is handed over through ``IPMI_PASSWORD`` (``-E``) rather than
+argv, since these processes live for minutes. Shells idle for longer than
+``idle_timeout`` are closed by ``ShellPool.reap()``; the pool also caps the
+number of live shells (``TEMS_IPMI_MAX_SHELLS``) and evicts the least recently
+used idle one when full. A shell still running a command is only closed once
+that command is done.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PROMPT = "ipmitool> "
+MARKER = "__TEMS_END_{}__"
+ERR_MARKER = "__TEMS_ERR_{}__"
+
+
+class IpmiError(RuntimeError):
+    """ipmitool exited non-zero (or was killed), or a shell command failed; ``stderr`` holds its diagnostics."""
+
+    def __init__(self, message: str, *, returncode: Optional[int] = None, stderr: str = "") -> None:
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class ShellError(IpmiError):
+    """The shell process exited or its output went out of sync."""
+
+
+def _strip_prompt(line: str) -> str:
+    while line.startswith(PROMPT):
+        line = line[len(PROMPT):]
+    return line
+
+
+class IpmiShell:
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        *,
+        interface: str = "lanplus",
+        extra_args: Sequence[str] = (),
+    ) -> None:
+        self.host = host
+        self.extra_args = tuple(extra_args)
+        self.args = ["ipmitool", "-I", interface, "-H", host, "-U", username, "-E", *self.extra_args, "shell"]
+        self._env = {**os.environ, "IPMI_PASSWORD": password}
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._stderr: List[str] = []  # recent diagnostics, for error messages
+        self._lock = asyncio.Lock()
+        self._seq = itertools.count()
+        self._retired = False
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def start(self) -> None:
+        self._proc = await asyncio.create_subprocess_exec(
+            *self.args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._env,
+        )
+
+    async def _exited(self) -> ShellError:
+        assert self._proc is not None and self._proc.stderr is not None
+        try:
+            rest = await asyncio.wait_for(self._proc.stderr.read(), timeout=1)
+        except asyncio.TimeoutError:
+            rest = b""
+        self._stderr.extend(rest.decode(errors="replace").splitlines())
+        tail = self._stderr[-3:]
+        return ShellError(f"ipmitool shell exited: {' | '.join(tail)}", returncode=self._proc.returncode, stderr="\n".join(tail))
+
+    async def _read_until(self, marker: str) -> str:
+        assert self._proc is not None and self._proc.stdout is not None
+        lines: List[str] = []
+        while True:
+            raw = await self._proc.stdout.readline()
+            if not raw:
+                raise await self._exited()
+            line = _strip_prompt(raw.decode(errors="replace").rstrip("\n"))
+            if line.strip() == marker:
+                return "\n".join(lines) + ("\n" if lines else "")
+            lines.append(line)
+
+    async def _read_errors(self, marker: str) -> List[str]:
+        assert self._proc is not None and self._proc.stderr is not None
+        lines: List[str] = []
+        while True:
+            raw = await self._proc.stderr.readline()
+            if not raw:
+                raise await self._exited()
+            line = raw.decode(errors="replace").rstrip()
+            if marker in line:
+                self._stderr = (self._stderr + lines)[-50:]
+                return lines
+            lines.append(line)
+
+    async def _read_command(self, marker: str, err_marker: str) -> Tuple[str, List[str]]:
+        return await self._read_until(marker), await self._read_errors(err_marker)
+
+    async def run_many(self, commands: Sequence[str], *, timeout: float = 60.0) -> List[str]:
+        """Pipe ``commands`` in one write and return their outputs in order.
+
+        Raises ``IpmiError`` for the first command that printed only diagnostics.
+        """
+        async with self._lock:
+            if not self.alive:
+                await self.start()
+            assert self._proc is not None and self._proc.stdin is not None
+            seqs = [next(self._seq) for _ in commands]
+            script = "".join(
+                f"{cmd}\necho {MARKER.format(n)}\n{ERR_MARKER.format(n)}\n" for cmd, n in zip(commands, seqs)
+            )
+            try:
+                self._proc.stdin.write(script.encode())
+                await self._proc.stdin.drain()
+                results = [
+                    await asyncio.wait_for(self._read_command(MARKER.format(n), ERR_MARKER.format(n)), timeout=timeout)
+                    for n in seqs
+                ]
+            except (asyncio.TimeoutError, asyncio.CancelledError, ShellError, ConnectionError):
+                # Output stream is out of sync now; drop the process and let the next call restart it.
+                await self.close()
+                raise
+            finally:
+                if self._retired:
+                    await self.close()  # evicted from the pool while in use
+            self.last_used = time.monotonic()
+        for cmd, (out, errors) in zip(commands, results):
+            if errors and not out.strip():
+                raise IpmiError(f"ipmitool {cmd} failed: {errors[-1]}", stderr="\n".join(errors))
+        return [out for out, _ in results]
+
+    async def run(self, command: str, *, timeout: float = 60.0) -> str:
+        return (await self.run_many([command], timeout=timeout))[0]
+
+    async def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.returncode is None:
+            try:
+                assert proc.stdin is not None
+                proc.stdin.write(b"exit\n")
+                await proc.stdin.drain()
+                await asyncio.wait_for(proc.wait(), timeout=2)
+            except (asyncio.TimeoutError, ConnectionError):
+                proc.kill()
+                await proc.wait()
+
+    async def retire(self) -> None:
+        """Close once the command in flight (if any) is done. A caller still holding the shell
+        gets a fresh process for each later call, closed again right after it."""
+        self._retired = True
+        async with self._lock:
+            await self.close()
+
+
+class ShellPool:
+    def __init__(self, *, max_shells: int = 64, idle_timeout: float = 300.0) -> None:
+        self.max_shells = max(1, max_shells)
+        self.idle_timeout = idle_timeout
+        self._shells: Dict[Tuple[str, str], IpmiShell] = {}
+
+    async def get(self, host: str, username: str, password: str, *, extra_args: Sequence[str] = ()) -> IpmiShell:
+        """Shell for ``host``; restarted if ``extra_args`` (e.g. ``-S <sdr file>``) changed."""
+        key = (host, username)
+        shell = self._shells.get(key)
+        if shell is not None and shell.extra_args == tuple(extra_args):
+            return shell
+        if shell is not None:
+            await self._shells.pop(key).retire()
+        if len(self._shells) >= self.max_shells:
+            # Prefer an idle shell; if every one is busy, the evicted one closes when its command is done.
+            idle = [k for k, s in self._shells.items() if not s.busy] or list(self._shells)
+            lru_key = min(idle, key=lambda k: self._shells[k].last_used)
+            await self._shells.pop(lru_key).retire()
+        shell = self._shells[key] = IpmiShell(host, username, password, extra_args=extra_args)
+        return shell
+
+    async def reap(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, s in self._shells.items() if not s.busy and now - s.last_used > self.idle_timeout]:
+            await self._shells.pop(key).retire()
+
+    async def close_all(self) -> None:
+        shells, self._shells = self._shells, {}
+        await asyncio.gather(*(s.close() for s in shells.values()), return_exceptions=True)
+
+
+_pool: Optional[ShellPool] = None
+
+
+def get_shells() -> ShellPool:
+    global _pool
+    if _pool is None:
+        _pool = ShellPool(
+            max_shells=int(os.environ.get("TEMS_IPMI_MAX_SHELLS", "64")),
+            idle_timeout=float(os.environ.get("TEMS_IPMI_SHELL_IDLE", "300")),
+        )
+    return _pool
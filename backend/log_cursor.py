@@ -0,0 +1,213 @@
+"""
+Persisted per-host Redfish log and IPMI SEL cursors.
+
+A cursor remembers, per (host, log service), the newest ``Created`` timestamp
+seen and the entry ``Id``s at exactly that timestamp (several entries often
+share one second). Collection uses it to ask the BMC only for newer entries
+(``$filter`` or ``$skip``) and to cut off already-seen entries client-side
+when the BMC ignores or rejects query options.
+
+IPMI SEL cursors track the last record ID plus the ``sel info`` counters
+(entry count, last add/delete time), which is how clears and wraps are
+detected.
+
+Cursors are kept in a small JSON file (``TEMS_CURSOR_PATH``) so a restart does
+not re-ingest every Lifecycle/IML entry. Commits rewrite it at most every
+``save_interval`` seconds (``TEMS_CURSOR_SAVE_INTERVAL``), from a worker thread
+when an event loop is running; ``save`` on shutdown writes the rest. Entries
+read after the last write are fetched again after a crash and dropped by the
+log store's de-duplication.
+
+A collection attempt reads and advances cursors through a ``CursorStage``
+(copies of the stored cursors) and only ``commit``s it if its logs are used.
+A hedged attempt that loses the race is dropped together with its stage, so
+the entries it had read are fetched again on the next poll.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "state" / "cursors.json"
+
+
+def as_utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+@dataclass
+class LogCursor:
+    created: Optional[str] = None  # ISO timestamp (UTC) of the newest entry seen
+    ids: List[str] = field(default_factory=list)  # entry Ids seen at ``created``
+    count: Optional[int] = None  # Members@odata.count at the last full read
+    ascending: Optional[bool] = None  # collection order (oldest-first?) if known
+    supports_filter: Optional[bool] = None
+    supports_skip: Optional[bool] = None
+
+    @property
+    def created_dt(self) -> Optional[datetime]:
+        return datetime.fromisoformat(self.created) if self.created else None
+
+    def is_new(self, created: datetime, entry_id: str) -> bool:
+        last = self.created_dt
+        if last is None:
+            return True
+        created = as_utc(created)
+        if created != last:
+            return created > last
+        return entry_id not in self.ids
+
+    def advance(self, seen: Iterable[Tuple[datetime, str]]) -> None:
+        """Move the cursor past every (created, id) in ``seen``."""
+        last = self.created_dt
+        ids = set(self.ids)
+        for created, entry_id in seen:
+            created = as_utc(created)
+            if last is None or created > last:
+                last, ids = created, {entry_id}
+            elif created == last:
+                ids.add(entry_id)
+        if last is not None:
+            self.created = last.isoformat()
+            self.ids = sorted(ids)
+
+    def reset(self) -> None:
+        self.created, self.ids, self.count, self.ascending = None, [], None, None
+
+
+@dataclass
+class SelCursor:
+    last_id: Optional[int] = None  # highest SEL record ID seen
+    entries: Optional[int] = None  # ``sel info`` Entries at the last poll
+    last_add: Optional[str] = None  # ``sel info`` Last Add Time
+    last_del: Optional[str] = None  # ``sel info`` Last Del Time
+
+    def reset(self) -> None:
+        self.last_id = None
+
+
+class CursorStore:
+    def __init__(self, path: Optional[Path] = None, *, save_interval: float = 10.0) -> None:
+        self.path = Path(path or os.environ.get("TEMS_CURSOR_PATH") or DEFAULT_PATH)
+        self.save_interval = save_interval
+        self._cursors: Dict[str, LogCursor] = {}
+        self._sel: Dict[str, SelCursor] = {}
+        self._dirty = False
+        self._saved_at = float("-inf")
+        self._seq = 0  # snapshots taken
+        self._written = 0  # newest snapshot on disk
+        self._write_lock = threading.Lock()
+        self._writing: Optional[asyncio.Future] = None
+        self._load()
+
+    @staticmethod
+    def _key(host: str, service: str) -> str:
+        return f"{host}|{service}"
+
+    def _load(self) -> None:
+        try:
+            raw = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        for key, value in raw.get("redfish", {}).items():
+            self._cursors[key] = LogCursor(**value)
+        for key, value in raw.get("sel", {}).items():
+            self._sel[key] = SelCursor(**value)
+
+    def get(self, host: str, service: str) -> LogCursor:
+        return self._cursors.setdefault(self._key(host, service), LogCursor())
+
+    def get_sel(self, host: str) -> SelCursor:
+        return self._sel.setdefault(host, SelCursor())
+
+    def stage(self) -> "CursorStage":
+        return CursorStage(self)
+
+    def _snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        self._seq += 1
+        self._dirty, self._saved_at = False, time.monotonic()
+        data = {
+            "redfish": {k: asdict(v) for k, v in self._cursors.items()},
+            "sel": {k: asdict(v) for k, v in self._sel.items()},
+        }
+        return self._seq, data
+
+    def _write(self, seq: int, data: Dict[str, Any]) -> None:
+        with self._write_lock:
+            if seq <= self._written:
+                return  # a newer snapshot is already on disk
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".cursors-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+            self._written = seq
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self._writing is not None and not self._writing.done():
+            return
+        if time.monotonic() - self._saved_at < self.save_interval:
+            return
+        seq, data = self._snapshot()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(seq, data)
+            return
+        self._writing = loop.create_task(asyncio.to_thread(self._write, seq, data))
+
+    def save(self) -> None:
+        """Atomically rewrite the cursor file now if anything changed since the last write."""
+        if self._dirty:
+            self._write(*self._snapshot())
+
+
+class CursorStage:
+    """Private copies of the cursors one collection attempt touches."""
+
+    def __init__(self, store: CursorStore) -> None:
+        self.store = store
+        self._cursors: Dict[str, LogCursor] = {}
+        self._sel: Dict[str, SelCursor] = {}
+
+    def get(self, host: str, service: str) -> LogCursor:
+        key = self.store._key(host, service)
+        cur = self._cursors.get(key)
+        if cur is None:
+            cur = self._cursors[key] = copy.deepcopy(self.store.get(host, service))
+        return cur
+
+    def get_sel(self, host: str) -> SelCursor:
+        cur = self._sel.get(host)
+        if cur is None:
+            cur = self._sel[host] = copy.deepcopy(self.store.get_sel(host))
+        return cur
+
+    def commit(self) -> None:
+        """Publish the staged cursors to the store, which saves them in the background."""
+        if not self._cursors and not self._sel:
+            return
+        self.store._cursors.update(self._cursors)
+        self.store._sel.update(self._sel)
+        self.store._changed()
+
+
+_store: Optional[CursorStore] = None
+
+
+def get_cursors() -> CursorStore:
+    global _store
+    if _store is None:
+        _store = CursorStore(save_interval=float(os.environ.get("TEMS_CURSOR_SAVE_INTERVAL", "10")))
+    return _store
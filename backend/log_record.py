@@ -0,0 +1,63 @@
+"""
+Compact normalized log record.
+
+Every collector path (Redfish, IPMI, SEL decode, pushed events) produces
+``LogRecord`` tuples instead of per-entry dicts. A record is a fixed 7-slot
+tuple with no per-instance ``__dict__``; host, vendor and service are
+interned and severity is a ``Severity`` member, so a buffered log costs one
+small tuple plus its message while the low-cardinality values are shared by
+all records.
+Records travel as-is through ``collector``, ``pipeline`` and ``scheduler``.
+Only the API edge turns them into pydantic models or JSON dicts
+(``to_dict``). Timestamps read back from a ``LogBatch`` or the stores are
+naive UTC; the API edge marks them UTC again (``utc``), so responses carry
+an explicit offset as they did before batching.
+
+Severity is mapped from vendor free text (Redfish ``Severity``/``EntryType``,
+ipmitool columns, ...) exactly once, at ingestion (``collector.severity_of``);
+everything downstream compares and counts the integer codes.
+"""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Any, Dict, NamedTuple
+
+intern = sys.intern
+
+
+def utc(ts: datetime) -> datetime:
+    """``ts`` as an aware UTC datetime; naive values are taken as UTC."""
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+class Severity(IntEnum):
+    """Canonical severity, ordered so that ``>= ERROR`` selects problems."""
+
+    INFO = 0
+    WARN = 1
+    ERROR = 2
+    CRITICAL = 3
+
+
+class LogRecord(NamedTuple):
+    timestamp: datetime
+    host: str
+    vendor: str
+    service: str
+    severity: Severity
+    message: str
+    record_id: str = ""  # BMC-side identity (Redfish entry URI, SEL record ID, EventId); "" if none
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": utc(self.timestamp),
+            "host": self.host,
+            "vendor": self.vendor,
+            "service": self.service,
+            "severity": self.severity.name,
+            "message": self.message,
+        }
+
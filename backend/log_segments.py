@@ -0,0 +1,477 @@
+"""
+Append-only, time-partitioned log segments for long retention.
+
+Logs are partitioned by UTC day and host shard (``crc32(host) % shards``).
+New rows are buffered per partition, and all pending partitions are sealed
+into immutable segment files ``<dir>/<YYYY-MM-DD>/<shard>-<seq>.seg`` once
+``segment_rows`` rows are pending, once the oldest pending row is
+``flush_interval`` seconds old, or on ``flush``. Files are never rewritten;
+whole days older than ``retention`` are deleted. Scans include pending rows.
+
+Pending rows are not lost on a crash: ``ingest`` stores every batch in
+``log_store`` first and appends only the rows that store did not have, along
+with its last rowid. After a seal the store learns that everything up to
+that rowid is in segments (``LogStore.mark_sealed``), and ``attach`` on
+startup appends the rows after that point again. Segment files and their
+directories are fsync-ed before the store is told, so a power loss in the
+middle of a seal can duplicate that seal's rows, never lose them.
+
+Segment layout (little-endian, every column 8-byte aligned, rows sorted by
+time)::
+
+    ts int64[n] | severity uint8[n] | host/vendor/service int32[n] each
+    | message offsets int64[n + 1] | message bytes
+    | record_id offsets int64[n + 1] | record_id bytes
+    | footer JSON | footer length uint32 | MAGIC
+
+The footer holds the time range, a severity bitmap and per-severity counts,
+the host/vendor/service dictionaries and the column offsets. Footers are read
+once at startup, so a range scan skips a segment by its day, shard, time
+range, severity bitmap or host/vendor dictionary without touching its data.
+Segments that are read are ``mmap``-ed and viewed with ``np.frombuffer``: only
+the time slice found by binary search is filtered, and only matching rows are
+copied out. The mapping (and its file descriptor) is closed as soon as that
+segment has been scanned, so open descriptors do not grow with the number of
+segments. Severity counts of segments that lie wholly inside the range come
+straight from the footer.
+
+Settings: ``TEMS_SEGMENT_DIR``, ``TEMS_SEGMENT_SHARDS`` (16),
+``TEMS_SEGMENT_ROWS`` (65536), ``TEMS_SEGMENT_FLUSH`` (300 s),
+``TEMS_SEGMENT_RETENTION_DAYS`` (365).
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+import numpy as np
+
+import log_batch
+import log_record
+import log_store
+
+DEFAULT_DIR = Path(__file__).resolve().parent / "state" / "segments"
+MAGIC = b"TEMSSEG1"
+_TRAILER = struct.Struct("<I8s")
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+_LEVELS = len(log_record.Severity)
+T = TypeVar("T")
+
+
+def _micros(ts: datetime) -> int:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // _US
+
+
+def _day_of(micros: int) -> date:
+    return (_EPOCH + timedelta(microseconds=micros)).date()
+
+
+@dataclass
+class Segment:
+    path: Path
+    day: date
+    shard: int
+    footer: Dict[str, Any]
+
+    @property
+    def rows(self) -> int:
+        return self.footer["rows"]
+
+    @property
+    def min_ts(self) -> int:
+        return self.footer["min_ts"]
+
+    @property
+    def max_ts(self) -> int:
+        return self.footer["max_ts"]
+
+    def _view(self, buf: mmap.mmap, name: str, dtype: Any) -> np.ndarray:
+        offset, count = self.footer["columns"][name]
+        return np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+
+    def _text(self, buf: mmap.mmap, name: str) -> log_batch.Text:
+        start, length = self.footer["columns"][name]
+        return log_batch.Text(self._view(buf, f"{name}_offsets", np.int64), memoryview(buf)[start : start + length])
+
+    def scan(self, fn: Callable[[log_batch.LogBatch], T]) -> T:
+        """Call ``fn`` with the whole segment as a ``LogBatch`` of views into a read-only mapping
+        (nothing is copied). The mapping is closed when ``fn`` returns, so ``fn`` must return
+        copies (``take``), not views."""
+        with open(self.path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return fn(
+                log_batch.LogBatch(
+                    self._view(buf, "ts", np.int64).view("datetime64[us]"),
+                    {c: self._view(buf, c, np.int32) for c in log_batch.COLUMNS},
+                    {c: self.footer[c] for c in log_batch.COLUMNS},
+                    self._view(buf, "severity", np.uint8),
+                    self._text(buf, "message"),
+                    self._text(buf, "record_id"),
+                )
+            )
+        finally:
+            try:
+                buf.close()
+            except BufferError:
+                pass  # a view outlived ``fn`` (e.g. held by a traceback); closed when collected
+
+    @classmethod
+    def open(cls, path: Path) -> "Segment":
+        with open(path, "rb") as f:
+            f.seek(-_TRAILER.size, os.SEEK_END)
+            length, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a log segment")
+            f.seek(-_TRAILER.size - length, os.SEEK_END)
+            footer = json.loads(f.read(length))
+        shard = int(path.stem.split("-", 1)[0])
+        return cls(path, date.fromisoformat(path.parent.name), shard, footer)
+
+
+def _fsync_dir(path: Path) -> None:
+    if os.name == "nt":
+        return  # directories cannot be opened for fsync there
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_segment(path: Path, batch: log_batch.LogBatch) -> Dict[str, Any]:
+    """Write ``batch`` (already sorted by time) as a sealed segment, durably; returns its footer."""
+    ts = batch.timestamps.view(np.int64)
+    counts = np.bincount(batch.severity, minlength=_LEVELS)
+    # (name, data, count): element count for arrays, byte length for string buffers.
+    parts: List[Tuple[str, bytes, int]] = [
+        ("ts", ts.tobytes(), len(ts)),
+        ("severity", batch.severity.tobytes(), len(ts)),
+        *((c, batch.codes[c].astype(np.int32).tobytes(), len(ts)) for c in log_batch.COLUMNS),
+    ]
+    for name, text in (("message", batch.messages), ("record_id", batch.record_ids)):
+        data = bytes(text.buffer)
+        parts.append((f"{name}_offsets", text.offsets.astype(np.int64).tobytes(), len(text.offsets)))
+        parts.append((name, data, len(data)))
+    columns: Dict[str, List[int]] = {}
+    footer: Dict[str, Any] = {
+        "rows": len(batch),
+        "min_ts": int(ts[0]),
+        "max_ts": int(ts[-1]),
+        "severity_mask": sum(1 << i for i, n in enumerate(counts.tolist()) if n),
+        "severity_counts": counts.tolist(),
+        **{c: batch.dictionaries[c] for c in log_batch.COLUMNS},
+        "columns": columns,
+    }
+    new_dir = not path.parent.exists()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".seg-")
+    with os.fdopen(fd, "wb") as f:
+        pos = 0
+        for name, data, count in parts:
+            pad = -pos % 8
+            f.write(b"\0" * pad)
+            pos += pad
+            columns[name] = [pos, count]
+            f.write(data)
+            pos += len(data)
+        raw = json.dumps(footer, separators=(",", ":")).encode()
+        f.write(raw)
+        f.write(_TRAILER.pack(len(raw), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+    if new_dir:
+        _fsync_dir(path.parent.parent)
+    return footer
+
+
+class SegmentStore:
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        *,
+        shards: int = 16,
+        segment_rows: int = 65536,
+        flush_interval: float = 300.0,
+        retention_days: int = 365,
+    ) -> None:
+        self.directory = Path(directory or os.environ.get("TEMS_SEGMENT_DIR", DEFAULT_DIR))
+        self.shards = max(1, shards)
+        self.segment_rows = max(1, segment_rows)
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self._segments: List[Segment] = []
+        self._pending: Dict[Tuple[date, int], List[log_batch.LogBatch]] = {}
+        self._pending_rows = 0
+        self._pending_since = 0.0  # monotonic time of the oldest pending row
+        self._through: Optional[int] = None
+        self.on_seal: Optional[Callable[[int], None]] = None
+        self._seq: Dict[Tuple[date, int], int] = {}
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+        self._loaded = False
+
+    def shard_of(self, host: str) -> int:
+        return zlib.crc32(host.encode()) % self.shards
+
+    def load(self) -> None:
+        """Read the footers of every segment on disk."""
+        with self._lock:
+            self._segments = []
+            for path in sorted(self.directory.glob("*/*.seg")):
+                try:
+                    seg = Segment.open(path)
+                except (OSError, ValueError):
+                    continue
+                self._segments.append(seg)
+                key = (seg.day, seg.shard)
+                self._seq[key] = max(self._seq.get(key, 0), int(path.stem.split("-", 1)[1]) + 1)
+            self._loaded = True
+
+    def attach(self, store: log_store.LogStore) -> None:
+        """Report seals to ``store`` and take over its rows that were never sealed (crash, restart)."""
+        self.on_seal = store.mark_sealed
+        unsealed, through = store.unsealed()
+        self.append(unsealed, through=through)
+
+    def ingest(self, store: log_store.LogStore, batch: log_batch.LogBatch, source: str = "poll") -> None:
+        """Store ``batch`` in ``store`` and append the rows it did not have yet."""
+        # One batch at a time: every row up to ``through`` must be pending when it is passed.
+        with self._ingest_lock:
+            new = store.ingest_new(batch, source)
+            self.append(new, through=store.last_rowid)
+
+    def append(self, batch: log_batch.LogBatch, *, through: Optional[int] = None) -> None:
+        """Buffer ``batch`` into its (day, shard) partitions and seal if due; ``through`` is the
+        ``log_store`` rowid up to which every stored row is now in segments or pending."""
+        if not self._loaded:
+            self.load()
+        parts: List[Tuple[Tuple[date, int], log_batch.LogBatch]] = []
+        if len(batch):
+            days = batch.timestamps.astype("datetime64[D]").view(np.int64)
+            shard_of_code = np.asarray([self.shard_of(h) for h in batch.dictionaries["host"]], dtype=np.int64)
+            keys = days * self.shards + shard_of_code[batch.codes["host"]]
+            uniq, inverse = np.unique(keys, return_inverse=True)
+            for i, key in enumerate(uniq.tolist()):
+                part = (date(1970, 1, 1) + timedelta(days=key // self.shards), key % self.shards)
+                parts.append((part, batch.take(np.flatnonzero(inverse == i))))
+        with self._lock:
+            if parts and not self._pending_rows:
+                self._pending_since = time.monotonic()
+            for part, rows in parts:
+                self._pending.setdefault(part, []).append(rows)
+                self._pending_rows += len(rows)
+            if through is not None:
+                self._through = max(through, self._through or 0)
+        self._seal(force=False)
+
+    def flush(self) -> None:
+        """Seal every pending partition."""
+        self._seal(force=True)
+
+    def _seal(self, *, force: bool) -> None:
+        with self._lock:
+            if not self._pending_rows or not (
+                force
+                or self._pending_rows >= self.segment_rows
+                or time.monotonic() - self._pending_since >= self.flush_interval
+            ):
+                return
+            # All partitions at once, so "sealed through rowid N" holds for the whole store.
+            for part, batches in sorted(self._pending.items()):
+                rows = log_batch.LogBatch.concat(batches)
+                rows = rows.take(np.argsort(rows.timestamps, kind="stable"))
+                for start in range(0, len(rows), self.segment_rows):
+                    seq = self._seq.get(part, 0)
+                    self._seq[part] = seq + 1
+                    day, shard = part
+                    path = self.directory / day.isoformat() / f"{shard:02d}-{seq:06d}.seg"
+                    footer = write_segment(path, rows.take(slice(start, start + self.segment_rows)))
+                    self._segments.append(Segment(path, day, shard, footer))
+            self._pending.clear()
+            self._pending_rows = 0
+            if self.on_seal is not None and self._through is not None:
+                self.on_seal(self._through)
+            self._expire()
+
+    def _expire(self) -> None:
+        if self.retention_days <= 0:
+            return
+        cutoff = datetime.utcnow().date() - timedelta(days=self.retention_days)
+        old = {s.day for s in self._segments if s.day < cutoff}
+        if not old:
+            return
+        self._segments = [s for s in self._segments if s.day not in old]
+        for day in old:
+            shutil.rmtree(self.directory / day.isoformat(), ignore_errors=True)
+
+    def _candidates(
+        self,
+        host: Optional[str],
+        vendor: Optional[str],
+        start: Optional[int],
+        end: Optional[int],
+        min_severity: Optional[log_record.Severity],
+    ) -> Iterator[Union[Segment, log_batch.LogBatch]]:
+        """Sealed segments and pending batches that may hold matching rows."""
+        if not self._loaded:
+            self.load()
+        shard = self.shard_of(host) if host is not None else None
+        first_day = _day_of(start) if start is not None else None
+        last_day = _day_of(end) if end is not None else None
+        wanted = ~0 if min_severity is None else ~((1 << int(min_severity)) - 1)
+        with self._lock:
+            segments = list(self._segments)
+            pending = [(part, b) for part, batches in self._pending.items() for b in batches]
+        for seg in segments:
+            if shard is not None and seg.shard != shard:
+                continue
+            if (first_day and seg.day < first_day) or (last_day and seg.day > last_day):
+                continue
+            if (start is not None and seg.max_ts < start) or (end is not None and seg.min_ts > end):
+                continue
+            if not seg.footer["severity_mask"] & wanted:
+                continue
+            if (host is not None and host not in seg.footer["host"]) or (
+                vendor is not None and vendor not in seg.footer["vendor"]
+            ):
+                continue
+            yield seg
+        for (_, part_shard), b in pending:
+            if shard is not None and part_shard != shard:
+                continue
+            yield b
+
+    @staticmethod
+    def _select(
+        batch: log_batch.LogBatch,
+        host: Optional[str],
+        vendor: Optional[str],
+        start: Optional[int],
+        end: Optional[int],
+        min_severity: Optional[log_record.Severity],
+        ordered: bool,
+    ) -> np.ndarray:
+        """Positions of matching rows; on time-ordered (segment) batches only the time slice is scanned."""
+        ts = batch.timestamps.view(np.int64)
+        if ordered:
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+            hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="right"))
+        else:
+            lo, hi = 0, len(ts)
+        keep = np.ones(hi - lo, dtype=bool)
+        if not ordered:
+            if start is not None:
+                keep &= ts >= start
+            if end is not None:
+                keep &= ts <= end
+        if min_severity is not None and min_severity > log_record.Severity.INFO:
+            keep &= batch.severity[lo:hi] >= min_severity
+        for column, value in (("host", host), ("vendor", vendor)):
+            if value is not None:
+                dictionary = batch.dictionaries[column]
+                code = dictionary.index(value) if value in dictionary else -1
+                keep &= batch.codes[column][lo:hi] == code
+        return lo + np.flatnonzero(keep)
+
+    def query(
+        self,
+        *,
+        host: Optional[str] = None,
+        vendor: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        min_severity: Optional[log_record.Severity] = None,
+        limit: int = 1000,
+    ) -> log_batch.LogBatch:
+        """Matching logs, newest first; only the newest ``limit`` matches per source are copied."""
+        lo = _micros(start) if start is not None else None
+        hi = _micros(end) if end is not None else None
+
+        def newest(batch: log_batch.LogBatch, ordered: bool) -> log_batch.LogBatch:
+            index = self._select(batch, host, vendor, lo, hi, min_severity, ordered)
+            if not ordered:
+                index = index[np.argsort(batch.timestamps[index], kind="stable")]
+            return batch.take(index[-limit:])
+
+        found = [
+            source.scan(lambda b: newest(b, True)) if isinstance(source, Segment) else newest(source, False)
+            for source in self._candidates(host, vendor, lo, hi, min_severity)
+        ]
+        rows = log_batch.LogBatch.concat(found)
+        order = np.argsort(rows.timestamps, kind="stable")[::-1][:limit]
+        return rows.take(order)
+
+    def severity_counts(
+        self,
+        *,
+        host: Optional[str] = None,
+        vendor: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[log_record.Severity, int]:
+        """Matching record count per severity (all levels present)."""
+        lo = _micros(start) if start is not None else None
+        hi = _micros(end) if end is not None else None
+        counts = np.zeros(_LEVELS, dtype=np.int64)
+
+        def count(batch: log_batch.LogBatch, ordered: bool) -> np.ndarray:
+            index = self._select(batch, host, vendor, lo, hi, None, ordered)
+            return np.bincount(batch.severity[index], minlength=_LEVELS)
+
+        for source in self._candidates(host, vendor, lo, hi, None):
+            if not isinstance(source, Segment):
+                counts += count(source, False)
+            elif (
+                host is None
+                and vendor is None
+                and (lo is None or source.min_ts >= lo)
+                and (hi is None or source.max_ts <= hi)
+            ):
+                counts += source.footer["severity_counts"]  # whole segment in range: data is not read
+            else:
+                counts += source.scan(lambda b: count(b, True))
+        return {sev: int(counts[sev]) for sev in log_record.Severity}
+
+    def stats(self) -> Dict[str, Any]:
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "records": sum(s.rows for s in self._segments),
+                "pending": self._pending_rows,
+                "days": len({s.day for s in self._segments}),
+            }
+
+
+_store: Optional[SegmentStore] = None
+
+
+def get_segments() -> SegmentStore:
+    global _store
+    if _store is None:
+        _store = SegmentStore(
+            shards=int(os.environ.get("TEMS_SEGMENT_SHARDS", "16")),
+            segment_rows=int(os.environ.get("TEMS_SEGMENT_ROWS", "65536")),
+            flush_interval=float(os.environ.get("TEMS_SEGMENT_FLUSH", "300")),
+            retention_days=int(os.environ.get("TEMS_SEGMENT_RETENTION_DAYS", "365")),
+        )
+    return _store
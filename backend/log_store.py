@@ -0,0 +1,336 @@
+"""
+Persistent SQLite log store.
+
+Every batch published to ``pipeline`` is written here first; ``ingest_new``
+returns the rows that were not stored before, and only those are appended to
+the long-term ``log_segments`` that the logs and analysis endpoints scan.
+The table is short-term storage: it is the crash-safe copy of rows that are
+not sealed into segments yet (``unsealed``) and the dedupe index for recent
+records. Once segments report a seal (``mark_sealed``), sealed rows older
+than ``dedupe_window`` (``TEMS_LOG_DEDUPE_DAYS``, default 7) are deleted. The
+database runs in WAL mode with ``synchronous=NORMAL``: readers
+never block the writer, and a commit costs one WAL append rather than an
+fsync of the main file.
+
+Ingest takes a whole ``log_batch.LogBatch``: rows are built from the batch
+columns and written with one ``executemany`` per ``chunk_size`` rows, one
+transaction per chunk. ``INSERT OR IGNORE`` against the unique
+(host, record_id, ts) index drops records that were already stored, whichever
+pipeline source ("poll"/"event", kept in ``source``) brought them: a pushed
+event and the polled log entry it points at share the entry's URI as
+``record_id`` (``events.normalize_event``). The timestamp is part of the key
+because BMC ids are reused: SEL record ids restart after a clear or
+wraparound. Records without an id (sensor readings) use a digest of their
+timestamp and message instead. Two indexes cover the
+read paths:
+
+- ``(host, ts, severity)`` for per-host time ranges and their severity counts;
+- ``(severity, ts, host)`` for fleet-wide "problems since" queries.
+
+Timestamps are stored as integer microseconds since the epoch (UTC).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import log_batch
+import log_record
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "state" / "logs.db"
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    ts INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    source TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    service TEXT NOT NULL,
+    severity INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+DROP INDEX IF EXISTS logs_identity;
+CREATE UNIQUE INDEX IF NOT EXISTS logs_record_ts ON logs (host, record_id, ts);
+CREATE INDEX IF NOT EXISTS logs_host_ts ON logs (host, ts, severity);
+CREATE INDEX IF NOT EXISTS logs_severity_ts ON logs (severity, ts, host);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+_INSERT = (
+    "INSERT OR IGNORE INTO logs (ts, host, source, record_id, vendor, service, severity, message)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _micros(ts: datetime) -> int:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // _US
+
+
+def _content_id(ts: int, message: str) -> str:
+    return "~" + hashlib.blake2b(f"{ts}|{message}".encode(), digest_size=8).hexdigest()
+
+
+class LogStore:
+    def __init__(
+        self, path: Optional[Path] = None, *, chunk_size: int = 50000, dedupe_window: float = 7 * 86400.0
+    ) -> None:
+        self.path = Path(path or os.environ.get("TEMS_LOG_DB", DEFAULT_PATH))
+        self.chunk_size = max(1, chunk_size)
+        self.dedupe_window = dedupe_window
+        self.last_rowid = 0  # highest rowid after the last ingest
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        return conn
+
+    def open(self) -> None:
+        if self._writer is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = self._connect()
+        self._migrate(self._writer)
+        self._writer.executescript(SCHEMA)
+        self._reader = self._connect()
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Older databases keyed records per source: keep the first copy of each record."""
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'logs_identity_ts'").fetchone():
+            conn.executescript(
+                "BEGIN;"
+                "DELETE FROM logs WHERE rowid NOT IN (SELECT MIN(rowid) FROM logs GROUP BY host, record_id, ts);"
+                "DROP INDEX logs_identity_ts;"
+                "COMMIT;"
+            )
+
+    def close(self) -> None:
+        with self._write_lock, self._read_lock:
+            for conn in (self._writer, self._reader):
+                if conn is not None:
+                    conn.close()
+            self._writer = self._reader = None
+
+    def ingest(self, batch: log_batch.LogBatch, source: str = "poll") -> int:
+        """Store ``batch``; returns how many records were new."""
+        return self._insert(batch, source, track=False)[0] if len(batch) else 0
+
+    def ingest_new(self, batch: log_batch.LogBatch, source: str = "poll") -> log_batch.LogBatch:
+        """Store ``batch`` and return only the rows that were not stored before."""
+        if not len(batch):
+            return batch
+        added, mask = self._insert(batch, source, track=True)
+        return batch if added == len(batch) else batch.take(mask)
+
+    def _insert(
+        self, batch: log_batch.LogBatch, source: str, *, track: bool
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """Insert ``batch``; returns the number of new rows and, with ``track``, their mask."""
+        n = len(batch)
+        self.open()
+        ts = batch.micros()
+        hosts = batch.column("host")
+        messages = batch.messages.values()
+        ids = batch.record_ids.values()
+        for i, rid in enumerate(ids):
+            if not rid:
+                ids[i] = _content_id(ts[i], messages[i])
+        rows = list(
+            zip(
+                ts,
+                hosts,
+                [source] * n,
+                ids,
+                batch.column("vendor"),
+                batch.column("service"),
+                batch.severity.tolist(),
+                messages,
+            )
+        )
+        with self._write_lock:
+            conn = self._writer
+            assert conn is not None
+            before = conn.total_changes
+            (last_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM logs").fetchone()
+            for i in range(0, n, self.chunk_size):
+                self._write(conn, rows[i : i + self.chunk_size])
+            added = conn.total_changes - before
+            (self.last_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM logs").fetchone()
+            if not track or added in (0, n):
+                return added, None if not track else np.full(n, added == n)
+            new = conn.execute(
+                "SELECT host, record_id, ts FROM logs WHERE rowid > ? ORDER BY rowid", (last_rowid,)
+            ).fetchall()
+        # New rows were inserted in batch order, so they are a subsequence of the batch.
+        mask = np.zeros(n, dtype=bool)
+        j = 0
+        for i in range(n):
+            if j == len(new):
+                break
+            if (hosts[i], ids[i], ts[i]) == new[j]:
+                mask[i] = True
+                j += 1
+        return added, mask
+
+    def sealed_through(self) -> int:
+        rows = self._fetch("SELECT value FROM meta WHERE key = 'sealed_through'", [])
+        return rows[0][0] if rows else 0
+
+    def unsealed(self) -> Tuple[log_batch.LogBatch, int]:
+        """Rows stored after the last ``mark_sealed`` (in insert order) and the highest rowid."""
+        rows = self._fetch(
+            "SELECT rowid, ts, host, vendor, service, severity, message, record_id FROM logs"
+            " WHERE rowid > ? ORDER BY rowid",
+            [self.sealed_through()],
+        )
+        through = rows[-1][0] if rows else self.sealed_through()
+        return self._batch([r[1:] for r in rows]), through
+
+    def mark_sealed(self, through: int) -> int:
+        """Record that rows up to rowid ``through`` are in segments, and delete those older than
+        ``dedupe_window``; returns how many rows were deleted."""
+        self.open()
+        horizon = _micros(datetime.utcnow()) - int(self.dedupe_window * 1_000_000)
+        levels = ",".join(str(int(sev)) for sev in log_record.Severity)
+        with self._write_lock:
+            conn = self._writer
+            assert conn is not None
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('sealed_through', ?)"
+                    " ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                    (through,),
+                )
+                # severity IN (...) lets the (severity, ts, host) index find old rows without a table scan.
+                deleted = conn.execute(
+                    f"DELETE FROM logs WHERE severity IN ({levels}) AND ts < ? AND rowid <= ?", (horizon, through)
+                ).rowcount
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return deleted
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, rows: List[Tuple[Any, ...]]) -> None:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(_INSERT, rows)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _where(
+        host: Optional[str],
+        vendor: Optional[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        min_severity: Optional[log_record.Severity],
+    ) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if host is not None:
+            clauses.append("host = ?")
+            params.append(host)
+        if vendor is not None:
+            clauses.append("vendor = ?")
+            params.append(vendor)
+        if min_severity is not None and min_severity > log_record.Severity.INFO:
+            clauses.append("severity >= ?")
+            params.append(int(min_severity))
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_micros(start))
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(_micros(end))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Tuple[Any, ...]]:
+        self.open()
+        with self._read_lock:
+            assert self._reader is not None
+            return self._reader.execute(sql, params).fetchall()
+
+    def query(
+        self,
+        *,
+        host: Optional[str] = None,
+        vendor: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        min_severity: Optional[log_record.Severity] = None,
+        limit: int = 1000,
+    ) -> log_batch.LogBatch:
+        """Stored logs matching the filters, newest first."""
+        where, params = self._where(host, vendor, start, end, min_severity)
+        rows = self._fetch(
+            "SELECT ts, host, vendor, service, severity, message, record_id FROM logs"
+            f"{where} ORDER BY ts DESC LIMIT ?",
+            params + [max(1, limit)],
+        )
+        return self._batch(rows)
+
+    @staticmethod
+    def _batch(rows: List[Tuple[Any, ...]]) -> log_batch.LogBatch:
+        levels = tuple(log_record.Severity)
+        intern = log_record.intern
+        return log_batch.LogBatch.from_records(
+            log_record.LogRecord(
+                _EPOCH + timedelta(microseconds=ts), intern(h), intern(v), intern(svc), levels[sev], msg,
+                "" if rid.startswith("~") else rid,  # content digests are the store's own, not BMC ids
+            )
+            for ts, h, v, svc, sev, msg, rid in rows
+        )
+
+    def severity_counts(
+        self,
+        *,
+        host: Optional[str] = None,
+        vendor: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[log_record.Severity, int]:
+        """Stored record count per severity (all levels present)."""
+        where, params = self._where(host, vendor, start, end, None)
+        counts = {sev: 0 for sev in log_record.Severity}
+        for sev, n in self._fetch(f"SELECT severity, COUNT(*) FROM logs{where} GROUP BY severity", params):
+            counts[log_record.Severity(sev)] = n
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        ((count,),) = self._fetch("SELECT COUNT(*) FROM logs", [])
+        return {"records": count, "sealed_through": self.sealed_through(), "path": str(self.path)}
+
+
+_store: Optional[LogStore] = None
+
+
+def get_log_store() -> LogStore:
+    global _store
+    if _store is None:
+        _store = LogStore(dedupe_window=float(os.environ.get("TEMS_LOG_DEDUPE_DAYS", "7")) * 86400)
+    return _store
@@ -0,0 +1,103 @@
+"""
+Log ingestion pipeline shared by polling and pushed events.
+
+Everything that produces normalized logs - ``/api/connect`` with real fetch,
+fleet sweeps and Redfish EventService pushes - publishes them here. The
+pipeline keeps a bounded buffer of recent logs and fans each batch out to the
+registered sinks (storage, live consumers, ...) as one columnar
+``log_batch.LogBatch``. A failing sink is skipped so one bad consumer cannot
+stall collection. Numeric sensor samples
+(``sensor_store.SensorSample``) travel the same way through the sample sinks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Iterable, List, Optional, Union
+
+import numpy as np
+
+import collector
+import log_batch
+
+if TYPE_CHECKING:
+    from sensor_store import SensorSample
+
+Sink = Callable[[log_batch.LogBatch, str], Union[Awaitable[Any], Any]]
+SampleSink = Callable[[List["SensorSample"], str], Union[Awaitable[Any], Any]]
+
+logger = logging.getLogger(__name__)
+
+
+class LogPipeline:
+    def __init__(self, *, recent: int = 10000) -> None:
+        self._recent: Deque[log_batch.LogBatch] = deque()
+        self._recent_rows = 0
+        self._recent_limit = recent
+        self._sinks: List[Sink] = []
+        self._sample_sinks: List[SampleSink] = []
+
+    def add_sink(self, sink: Sink) -> None:
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: Sink) -> None:
+        if sink in self._sinks:
+            self._sinks.remove(sink)
+
+    def add_sample_sink(self, sink: SampleSink) -> None:
+        self._sample_sinks.append(sink)
+
+    def remove_sample_sink(self, sink: SampleSink) -> None:
+        if sink in self._sample_sinks:
+            self._sample_sinks.remove(sink)
+
+    @staticmethod
+    async def _fan_out(sinks: List[Any], batch: Any, source: str) -> None:
+        for sink in list(sinks):
+            try:
+                res = sink(batch, source)
+                if asyncio.iscoroutine(res):
+                    await res
+            except Exception:
+                logger.exception("sink %r failed", sink)
+
+    async def publish(
+        self, logs: Union[log_batch.LogBatch, Iterable[collector.NormalizedLog]], *, source: str = "poll"
+    ) -> None:
+        """Buffer ``logs`` and hand them to every sink; ``source`` is "poll" or "event"."""
+        batch = log_batch.LogBatch.from_records(logs)
+        if not len(batch):
+            return
+        self._recent.append(batch)
+        self._recent_rows += len(batch)
+        while self._recent_rows - len(self._recent[0]) >= self._recent_limit:
+            self._recent_rows -= len(self._recent.popleft())
+        await self._fan_out(self._sinks, batch, source)
+
+    async def publish_samples(self, samples: Iterable["SensorSample"], *, source: str = "poll") -> None:
+        """Hand numeric sensor samples to every sample sink."""
+        batch = list(samples)
+        if batch:
+            await self._fan_out(self._sample_sinks, batch, source)
+
+    def recent(self, *, host: Optional[str] = None, limit: int = 100) -> List[collector.NormalizedLog]:
+        """Most recent buffered logs, newest first."""
+        out: List[collector.NormalizedLog] = []
+        for batch in reversed(self._recent):
+            rows = np.arange(len(batch)) if host is None else np.flatnonzero(batch.mask("host", (host,)))
+            out.extend(reversed(batch.take(rows[-(limit - len(out)) :]).records()))
+            if len(out) >= limit:
+                break
+        return out
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def get_pipeline() -> LogPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline()
+    return _pipeline
@@ -0,0 +1,183 @@
+"""
+Per-host Redfish service discovery cache.
+
+Discovery walks ServiceRoot -> Systems/Managers/Chassis -> LogServices once
+per host (member LogServices concurrently) and keeps the result for ``ttl``
+seconds (``TEMS_DISCOVERY_TTL``), together with the query options the service
+advertises in ``ProtocolFeaturesSupported``. Steady state polls then go
+straight to the log ``Entries`` URLs: no priming GET and no serial probing of
+vendor-specific paths (``/Systems/1`` vs ``System.Embedded.1``, iLO IEL on the
+Manager, ...).
+
+All paths are stored relative to ``/redfish/v1`` (e.g. ``/Systems/1``), the
+same form as ``collector.VENDOR_LOG_PATHS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+import http_pool
+import redfish_session
+
+REDFISH_ROOT = "/redfish/v1"
+
+
+def relative_path(odata_id: str) -> str:
+    """``/redfish/v1/Systems/1`` -> ``/Systems/1``."""
+    path = odata_id.split("?", 1)[0].rstrip("/")
+    return path[len(REDFISH_ROOT):] if path.startswith(REDFISH_ROOT) else path
+
+
+@dataclass
+class ProtocolFeatures:
+    """Query options from ``ProtocolFeaturesSupported``; None means not advertised."""
+
+    expand: Optional[bool] = None
+    filter: Optional[bool] = None
+    top_skip: Optional[bool] = None
+    select: Optional[bool] = None
+
+    @classmethod
+    def from_root(cls, root: Dict[str, Any]) -> "ProtocolFeatures":
+        pfs = root.get("ProtocolFeaturesSupported")
+        if not isinstance(pfs, dict):
+            return cls()
+        expand = pfs.get("ExpandQuery")
+        return cls(
+            expand=bool(expand.get("ExpandAll") or expand.get("Levels")) if isinstance(expand, dict) else None,
+            filter=pfs.get("FilterQuery"),
+            top_skip=pfs.get("TopSkipQuery"),
+            select=pfs.get("SelectQuery"),
+        )
+
+
+@dataclass
+class ServiceInfo:
+    service_root: Dict[str, Any]
+    system_paths: List[str]
+    log_services: List[str]  # LogService paths; entries live at ``<path>/Entries``
+    features: ProtocolFeatures
+    manager_paths: List[str] = field(default_factory=list)
+    chassis_paths: List[str] = field(default_factory=list)
+    discovered_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def redfish_version(self) -> Optional[str]:
+        return self.service_root.get("RedfishVersion")
+
+    def entries_paths(self) -> List[str]:
+        return [f"{p}/Entries" for p in self.log_services]
+
+
+class DiscoveryCache:
+    def __init__(self, *, ttl: float = 3600.0) -> None:
+        self.ttl = ttl
+        self._info: Dict[str, ServiceInfo] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _get_json(
+        self, pool: http_pool.ClientPool, host: str, path: str, *, username: str, password: str
+    ) -> Dict[str, Any]:
+        res = await redfish_session.get_sessions().get(
+            pool, f"https://{host}{REDFISH_ROOT}{path}", username=username, password=password
+        )
+        res.raise_for_status()
+        return res.json()
+
+    async def _members(
+        self, pool: http_pool.ClientPool, host: str, path: str, *, username: str, password: str
+    ) -> List[str]:
+        data = await self._get_json(pool, host, path, username=username, password=password)
+        return [relative_path(m["@odata.id"]) for m in data.get("Members", []) if "@odata.id" in m]
+
+    async def _collection(
+        self, pool: http_pool.ClientPool, host: str, root: Dict[str, Any], name: str, *, username: str, password: str
+    ) -> List[str]:
+        link = (root.get(name) or {}).get("@odata.id")
+        if not link:
+            return []
+        try:
+            return await self._members(pool, host, relative_path(link), username=username, password=password)
+        except httpx.HTTPStatusError:
+            return []
+
+    async def _log_services(
+        self, pool: http_pool.ClientPool, host: str, resource: str, *, username: str, password: str
+    ) -> List[str]:
+        try:
+            return await self._members(pool, host, f"{resource}/LogServices", username=username, password=password)
+        except httpx.HTTPStatusError:
+            return []  # resource without LogServices
+
+    async def discover(
+        self, pool: http_pool.ClientPool, host: str, *, username: str, password: str
+    ) -> ServiceInfo:
+        root = await self._get_json(pool, host, "", username=username, password=password)
+        systems, managers, chassis = await asyncio.gather(
+            *(
+                self._collection(pool, host, root, name, username=username, password=password)
+                for name in ("Systems", "Managers", "Chassis")
+            )
+        )
+        per_resource = await asyncio.gather(
+            *(
+                self._log_services(pool, host, resource, username=username, password=password)
+                for resource in [*systems, *managers, *chassis]
+            )
+        )
+        info = ServiceInfo(
+            service_root=root,
+            system_paths=systems,
+            log_services=[path for paths in per_resource for path in paths],
+            features=ProtocolFeatures.from_root(root),
+            manager_paths=managers,
+            chassis_paths=chassis,
+        )
+        self._info[host] = info
+        return info
+
+    async def get(
+        self,
+        pool: http_pool.ClientPool,
+        host: str,
+        *,
+        username: str,
+        password: str,
+        force: bool = False,
+    ) -> ServiceInfo:
+        info = self._info.get(host)
+        if info is not None and not force and time.monotonic() - info.discovered_at < self.ttl:
+            return info
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            info = self._info.get(host)
+            if info is not None and not force and time.monotonic() - info.discovered_at < self.ttl:
+                return info
+            return await self.discover(pool, host, username=username, password=password)
+
+    def prime(self, host: str, info: ServiceInfo) -> None:
+        """Install a known result (e.g. from a persisted profile) without walking the service."""
+        self._info[host] = info
+
+    def peek(self, host: str) -> Optional[ServiceInfo]:
+        return self._info.get(host)
+
+    def invalidate(self, host: str) -> None:
+        self._info.pop(host, None)
+
+
+_cache: Optional[DiscoveryCache] = None
+
+
+def get_discovery() -> DiscoveryCache:
+    global _cache
+    if _cache is None:
+        _cache = DiscoveryCache(ttl=float(os.environ.get("TEMS_DISCOVERY_TTL", "3600")))
+    return _cache
@@ -0,0 +1,180 @@
+"""
+Redfish SessionService token cache.
+
+Basic auth re-runs the credential check on every request, which is slow on
+iLO/iDRAC and sometimes rate-limited. Instead we log in once per
+(host, username) via ``POST /redfish/v1/SessionService/Sessions`` and reuse
+the ``X-Auth-Token`` across polls and endpoints. Redfish sessions expire
+after ``SessionTimeout`` seconds of inactivity (read from the host's
+SessionService after login, ``ttl`` if it does not say), so a token is
+considered stale once it has been idle for longer than that minus a safety
+margin. A 401 on a cached token triggers one transparent re-login and retry;
+concurrent requests that hit the same 401 share that one login, and the
+replaced session is deleted so it does not hold one of the BMC's few slots.
+
+BMCs that do not implement SessionService (old firmware) are remembered and
+served with basic auth.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+import http_pool
+
+SESSION_SERVICE_PATH = "/redfish/v1/SessionService"
+SESSIONS_PATH = f"{SESSION_SERVICE_PATH}/Sessions"
+
+
+@dataclass
+class SessionToken:
+    token: str
+    location: Optional[str]
+    last_used: float
+    ttl: float
+
+
+class SessionCache:
+    def __init__(self, *, ttl: float = 1800.0, margin: float = 60.0) -> None:
+        self.ttl = ttl
+        self.margin = margin
+        self._tokens: Dict[Tuple[str, str], SessionToken] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._basic_only: set[str] = set()
+        self._timeouts: Dict[str, float] = {}  # host -> SessionService.SessionTimeout
+
+    def _fresh(self, tok: SessionToken) -> bool:
+        return time.monotonic() - tok.last_used < tok.ttl - min(self.margin, tok.ttl / 2)
+
+    async def _session_timeout(self, pool: http_pool.ClientPool, host: str, token: str) -> float:
+        """The host's ``SessionTimeout`` in seconds, asked once per host; ``ttl`` if unknown."""
+        if host not in self._timeouts:
+            ttl = self.ttl
+            try:
+                res = await pool.get(f"https://{host}{SESSION_SERVICE_PATH}", headers={"X-Auth-Token": token})
+                if res.status_code == 200:
+                    ttl = float(res.json().get("SessionTimeout") or ttl)
+            except (httpx.HTTPError, ValueError, TypeError, AttributeError):
+                pass
+            self._timeouts[host] = ttl
+        return self._timeouts[host]
+
+    async def _delete(self, pool: http_pool.ClientPool, tok: SessionToken) -> None:
+        if not tok.location:
+            return
+        try:
+            await pool.delete(tok.location, headers={"X-Auth-Token": tok.token})
+        except httpx.HTTPError:
+            pass
+
+    async def login(
+        self, pool: http_pool.ClientPool, host: str, username: str, password: str
+    ) -> Optional[SessionToken]:
+        """Create a session; return None if the BMC has no usable SessionService."""
+        res = await pool.post(
+            f"https://{host}{SESSIONS_PATH}",
+            json={"UserName": username, "Password": password},
+        )
+        if res.status_code in (404, 405, 501):
+            self._basic_only.add(host)
+            return None
+        res.raise_for_status()
+        token = res.headers.get("X-Auth-Token")
+        if not token:
+            self._basic_only.add(host)
+            return None
+        location = res.headers.get("Location")
+        if location and location.startswith("/"):
+            location = f"https://{host}{location}"
+        ttl = await self._session_timeout(pool, host, token)
+        tok = SessionToken(token=token, location=location, last_used=time.monotonic(), ttl=ttl)
+        self._tokens[(host, username)] = tok
+        return tok
+
+    async def token(
+        self,
+        pool: http_pool.ClientPool,
+        host: str,
+        username: str,
+        password: str,
+        *,
+        failed: Optional[SessionToken] = None,
+    ) -> Optional[SessionToken]:
+        """A fresh token for (host, username), logging in if needed.
+
+        ``failed`` is a token the BMC just rejected; a new session is created only if it is
+        still the cached one, so callers that raced on the same 401 reuse one re-login.
+        """
+        key = (host, username)
+        if host in self._basic_only:
+            return None
+        tok = self._tokens.get(key)
+        if tok is not None and tok is not failed and self._fresh(tok):
+            return tok
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            tok = self._tokens.get(key)
+            if tok is not None and tok is not failed and self._fresh(tok):
+                return tok
+            old = self._tokens.pop(key, None)
+            if old is not None:
+                await self._delete(pool, old)
+            return await self.login(pool, host, username, password)
+
+    async def request(
+        self,
+        pool: http_pool.ClientPool,
+        method: str,
+        url: str,
+        *,
+        username: str,
+        password: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send an authenticated request, re-logging in once on 401."""
+        host = httpx.URL(url).host
+        tok = await self.token(pool, host, username, password)
+        if tok is None:
+            return await pool.request(method, url, auth=(username, password), **kwargs)
+        headers = {**kwargs.pop("headers", {}), "X-Auth-Token": tok.token}
+        res = await pool.request(method, url, headers=headers, **kwargs)
+        if res.status_code == 401:
+            tok = await self.token(pool, host, username, password, failed=tok)
+            if tok is None:
+                return await pool.request(method, url, auth=(username, password), **kwargs)
+            headers["X-Auth-Token"] = tok.token
+            res = await pool.request(method, url, headers=headers, **kwargs)
+        tok.last_used = time.monotonic()
+        return res
+
+    async def get(
+        self, pool: http_pool.ClientPool, url: str, *, username: str, password: str, **kwargs: Any
+    ) -> httpx.Response:
+        return await self.request(pool, "GET", url, username=username, password=password, **kwargs)
+
+    def invalidate(self, host: str) -> None:
+        for key in [k for k in self._tokens if k[0] == host]:
+            del self._tokens[key]
+        self._basic_only.discard(host)
+        self._timeouts.pop(host, None)
+
+    async def logout_all(self, pool: http_pool.ClientPool) -> None:
+        """Delete every cached session; BMCs have only a handful of session slots."""
+        tokens, self._tokens = self._tokens, {}
+        for tok in tokens.values():
+            await self._delete(pool, tok)
+
+
+_sessions: Optional[SessionCache] = None
+
+
+def get_sessions() -> SessionCache:
+    global _sessions
+    if _sessions is None:
+        _sessions = SessionCache()
+    return _sessions
@@ -0,0 +1,268 @@
+"""
+Fleet-wide collection scheduler.
+
+Polls a whole BMC inventory through ``collector.collect_logs`` concurrently,
+bounded by a global concurrency limit and optional per-vendor limits (fragile
+iLO/iDRAC web servers usually want a lower cap than the rest). A host waits
+for its vendor slot before it takes a global one, so hosts held back by
+their vendor cap do not starve other vendors. Within a sweep, host starts are
+spread at ``start_rate`` hosts per second, and between sweeps the scheduler
+sleeps for a jittered interval, so a large fleet does not hit every BMC at
+the same second.
+
+With ``TEMS_FLEET_INVENTORY`` pointing at a JSON list of servers (``vendor``,
+``bmc_host``, ``username``, ``password``), the app runs ``run`` in the
+background for its whole lifetime; the file is re-read before every sweep.
+
+Collected logs are published to ``pipeline`` page by page as they are read
+(``collect_logs(sink=...)``), so a sweep never holds a host's whole log. Each
+sweep returns a ``SweepReport`` with the wall-clock sweep duration and
+per-host latency, which is what we watch to keep full sweeps in minutes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import collector
+import log_batch
+import pipeline
+from sensor_store import SensorSample
+
+CollectFn = Callable[..., Awaitable[log_batch.LogBatch]]
+
+
+@dataclass
+class FleetHost:
+    vendor: str
+    bmc_host: str
+    username: str
+    password: str
+
+
+@dataclass
+class HostResult:
+    bmc_host: str
+    vendor: str
+    latency: float  # seconds spent collecting (excludes queue wait)
+    waited: float  # seconds spent waiting for a concurrency slot
+    logs: int = 0  # entries published
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+@dataclass
+class SweepReport:
+    started_at: datetime
+    duration: float
+    results: List[HostResult]
+
+    @property
+    def failed(self) -> List[HostResult]:
+        return [r for r in self.results if not r.ok]
+
+    def latency_stats(self) -> Dict[str, float]:
+        values = sorted(r.latency for r in self.results)
+        return {
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1] if values else 0.0,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration": round(self.duration, 3),
+            "hosts": len(self.results),
+            "failed": len(self.failed),
+            "logs": sum(r.logs for r in self.results),
+            "latency": {k: round(v, 3) for k, v in self.latency_stats().items()},
+            "per_host": [
+                {
+                    "bmc_host": r.bmc_host,
+                    "vendor": r.vendor,
+                    "latency": round(r.latency, 3),
+                    "waited": round(r.waited, 3),
+                    "logs": r.logs,
+                    "error": r.error,
+                }
+                for r in self.results
+            ],
+        }
+
+
+def load_inventory(path: Path) -> List[FleetHost]:
+    """Read a JSON list of servers; a missing or unreadable file is an empty inventory."""
+    try:
+        raw = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return []
+    names = ("vendor", "bmc_host", "username", "password")
+    return [FleetHost(**{k: s[k] for k in names}) for s in raw if all(k in s for k in names)]
+
+
+def parse_vendor_limits(spec: str) -> Dict[str, int]:
+    """Parse ``"dell=16,hpe=16"`` style vendor limits."""
+    limits: Dict[str, int] = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        vendor, value = item.split("=", 1)
+        limits[vendor.strip()] = max(1, int(value))
+    return limits
+
+
+class FleetScheduler:
+    """Concurrent sweeper over an inventory of BMCs."""
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 64,
+        vendor_limits: Optional[Dict[str, int]] = None,
+        interval: float = 300.0,
+        jitter: float = 0.1,
+        start_rate: float = 50.0,
+        collect: Optional[CollectFn] = None,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.vendor_limits = {v: max(1, n) for v, n in (vendor_limits or {}).items()}
+        self.interval = interval
+        self.jitter = jitter
+        self.start_rate = start_rate  # host starts per second within a sweep; 0 = all at once
+        self._collect = collect or collector.collect_logs
+        self._stop = asyncio.Event()
+        self.last_report: Optional[SweepReport] = None
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "FleetScheduler":
+        """Build a scheduler from ``TEMS_FLEET_*`` environment variables."""
+        kwargs: Dict[str, Any] = {
+            "concurrency": int(os.environ.get("TEMS_FLEET_CONCURRENCY", "64")),
+            "vendor_limits": parse_vendor_limits(os.environ.get("TEMS_FLEET_VENDOR_LIMITS", "")),
+            "interval": float(os.environ.get("TEMS_FLEET_INTERVAL", "300")),
+            "jitter": float(os.environ.get("TEMS_FLEET_JITTER", "0.1")),
+            "start_rate": float(os.environ.get("TEMS_FLEET_START_RATE", "50")),
+        }
+        kwargs.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**kwargs)
+
+    def next_delay(self) -> float:
+        """Sweep interval with +/- ``jitter`` fraction applied."""
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+    def start_offsets(self, n: int) -> List[float]:
+        """Per-host start delays for a sweep of ``n`` hosts: one every ``1/start_rate`` s, jittered."""
+        if self.start_rate <= 0:
+            return [0.0] * n
+        return [(i + random.random()) / self.start_rate for i in range(n)]
+
+    async def _poll(
+        self,
+        host: FleetHost,
+        global_sem: asyncio.Semaphore,
+        vendor_sems: Dict[str, asyncio.Semaphore],
+        delay: float = 0.0,
+    ) -> HostResult:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        queued = time.perf_counter()
+        published = 0
+
+        async def publish(batch: log_batch.LogBatch) -> None:
+            nonlocal published
+            published += len(batch)
+            await pipeline.get_pipeline().publish(batch, source="poll")
+
+        async def publish_samples(samples: List[SensorSample]) -> None:
+            await pipeline.get_pipeline().publish_samples(samples, source="poll")
+
+        vendor_sem = vendor_sems.get(host.vendor)
+        if vendor_sem is not None:
+            await vendor_sem.acquire()
+        try:
+            async with global_sem:
+                started = time.perf_counter()
+                try:
+                    rest = await self._collect(
+                        vendor=host.vendor,
+                        bmc_host=host.bmc_host,
+                        username=host.username,
+                        password=host.password,
+                        prefer_redfish=True,
+                        sink=publish,
+                        sample_sink=publish_samples,
+                    )
+                    error = None
+                    if len(rest):
+                        await publish(rest)  # a collect function that does not stream
+                except Exception as exc:  # one bad host must not abort the sweep
+                    error = f"{type(exc).__name__}: {exc}"
+                finished = time.perf_counter()
+        finally:
+            if vendor_sem is not None:
+                vendor_sem.release()
+        return HostResult(
+            bmc_host=host.bmc_host,
+            vendor=host.vendor,
+            latency=finished - started,
+            waited=started - queued,
+            logs=published,
+            error=error,
+        )
+
+    async def sweep(self, hosts: Iterable[FleetHost]) -> SweepReport:
+        """Poll every host once and return the sweep report."""
+        global_sem = asyncio.Semaphore(self.concurrency)
+        vendor_sems = {v: asyncio.Semaphore(n) for v, n in self.vendor_limits.items()}
+        hosts = list(hosts)
+        started_at = datetime.utcnow()
+        t0 = time.perf_counter()
+        offsets = self.start_offsets(len(hosts))
+        results = await asyncio.gather(
+            *(self._poll(h, global_sem, vendor_sems, delay) for h, delay in zip(hosts, offsets))
+        )
+        report = SweepReport(started_at=started_at, duration=time.perf_counter() - t0, results=list(results))
+        self.last_report = report
+        return report
+
+    async def run(
+        self,
+        inventory: Callable[[], Iterable[FleetHost]],
+        on_report: Optional[Callable[[SweepReport], Any]] = None,
+    ) -> None:
+        """Sweep ``inventory()`` repeatedly until ``stop()`` is called."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            report = await self.sweep(list(inventory()))
+            if on_report is not None:
+                res = on_report(report)
+                if asyncio.iscoroutine(res):
+                    await res
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.next_delay())
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
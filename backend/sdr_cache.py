@@ -0,0 +1,135 @@
+"""
+Managed per-host IPMI SDR cache.
+
+``ipmitool sensor`` re-reads the whole SDR repository from the BMC on every
+call, which takes 10-60s on Supermicro boards. We dump the repository once
+with ``sdr dump <file>`` and pass the file to later calls with ``-S <file>``,
+so ``sdr elist`` only fetches readings (about a second).
+
+Cache files are keyed by host and BMC firmware revision (from ``mc info``);
+a firmware change selects a new file and the stale ones are removed. The
+firmware revision itself is re-checked every ``recheck`` seconds
+(``TEMS_SDR_RECHECK``). Hosts whose BMC rejects the dump (invalid or
+unsupported command) are remembered and served without a cache; any other
+failure (timeout, lost session) only skips the cache for ``retry`` seconds
+(``TEMS_SDR_RETRY``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_DIR = Path(__file__).resolve().parent / "state" / "sdr"
+
+Runner = Callable[[List[str]], Awaitable[str]]
+
+_FW_RE = re.compile(r"^\s*Firmware Revision\s*:\s*(\S+)", re.MULTILINE)
+# ipmitool's wording for completion codes that mean "this BMC will never do it".
+_REJECTED_RE = re.compile(
+    r"invalid command|not supported|command not available|illegal command|insufficient privilege"
+    r"|\b0x(c1|c9|d4|d5)\b",
+    re.IGNORECASE,
+)
+
+
+def parse_firmware_revision(mc_info: str) -> Optional[str]:
+    m = _FW_RE.search(mc_info)
+    return m.group(1) if m else None
+
+
+def rejected(exc: BaseException) -> bool:
+    """True if ``exc`` (from the runner) says the BMC refused the command rather than failed to answer."""
+    return bool(_REJECTED_RE.search(f"{exc} {getattr(exc, 'stderr', '')}"))
+
+
+def _safe(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", value)
+
+
+class SdrCache:
+    def __init__(self, directory: Optional[Path] = None, *, recheck: float = 3600.0, retry: float = 300.0) -> None:
+        self.directory = Path(directory or os.environ.get("TEMS_SDR_DIR") or DEFAULT_DIR)
+        self.recheck = recheck
+        self.retry = retry
+        self._firmware: Dict[str, Tuple[str, float]] = {}
+        self._unsupported: set[str] = set()
+        self._retry_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def path(self, host: str, firmware: str) -> Path:
+        return self.directory / f"{_safe(host)}--{_safe(firmware)}.sdr"
+
+    async def firmware(self, host: str, base_args: List[str], run: Runner) -> str:
+        cached = self._firmware.get(host)
+        if cached is not None and time.monotonic() - cached[1] < self.recheck:
+            return cached[0]
+        fw = parse_firmware_revision(await run(base_args + ["mc", "info"])) or "unknown"
+        self._firmware[host] = (fw, time.monotonic())
+        return fw
+
+    def _drop_stale(self, host: str, keep: Path) -> None:
+        for old in self.directory.glob(f"{_safe(host)}--*.sdr"):
+            if old != keep:
+                old.unlink(missing_ok=True)
+
+    async def ensure(self, host: str, base_args: List[str], run: Runner) -> Optional[Path]:
+        """Return the SDR cache file for ``host``, dumping it first if needed.
+
+        None if the BMC rejects the dump, or while backing off after it failed otherwise.
+        """
+        if host in self._unsupported or time.monotonic() < self._retry_at.get(host, 0.0):
+            return None
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            tmp: Optional[Path] = None
+            try:
+                fw = await self.firmware(host, base_args, run)
+                path = self.path(host, fw)
+                if path.exists() and path.stat().st_size > 0:
+                    return path
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                await run(base_args + ["sdr", "dump", str(tmp)])
+            except Exception as exc:
+                if tmp is not None:
+                    tmp.unlink(missing_ok=True)
+                if rejected(exc):
+                    self._unsupported.add(host)
+                else:
+                    self._retry_at[host] = time.monotonic() + self.retry
+                return None
+            self._retry_at.pop(host, None)
+            os.replace(tmp, path)
+            self._drop_stale(host, path)
+            return path
+
+    def rejects(self, host: str) -> bool:
+        """True once the BMC has refused ``sdr dump`` (not merely failed to answer)."""
+        return host in self._unsupported
+
+    def invalidate(self, host: str) -> None:
+        """Forget the firmware revision and cached SDRs (e.g. after readings stop matching)."""
+        self._firmware.pop(host, None)
+        self._unsupported.discard(host)
+        self._retry_at.pop(host, None)
+        if self.directory.exists():
+            for old in self.directory.glob(f"{_safe(host)}--*.sdr"):
+                old.unlink(missing_ok=True)
+
+
+_cache: Optional[SdrCache] = None
+
+
+def get_sdr_cache() -> SdrCache:
+    global _cache
+    if _cache is None:
+        _cache = SdrCache(
+            recheck=float(os.environ.get("TEMS_SDR_RECHECK", "3600")),
+            retry=float(os.environ.get("TEMS_SDR_RETRY", "300")),
+        )
+    return _cache
@@ -0,0 +1,501 @@
+"""
+Raw IPMI SEL record decoding.
+
+Decodes 16-byte SEL records (``ipmitool sel writeraw`` dumps or records from
+``ipmi_lan.IpmiLanClient``) without going through ipmitool's ``elist`` text.
+A buffer of records is viewed as a NumPy structured array and decoded column
+by column; sensor type / event offset descriptions and severities come from
+lookup tables built once at import. Message strings are formatted once per
+distinct (sensor, event) combination rather than once per record, which is
+what keeps large dumps in the hundreds of thousands of records per second.
+
+Without NumPy the same tables are used from a ``struct.iter_unpack`` loop.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import log_record
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+RECORD_SIZE = 16
+RECORD_STRUCT = struct.Struct("<HBIHBBBBBBB")
+
+if np is not None:
+    SEL_DTYPE = np.dtype(
+        [
+            ("record_id", "<u2"),
+            ("record_type", "u1"),
+            ("timestamp", "<u4"),
+            ("generator", "<u2"),
+            ("evm_rev", "u1"),
+            ("sensor_type", "u1"),
+            ("sensor_number", "u1"),
+            ("event", "u1"),
+            ("data1", "u1"),
+            ("data2", "u1"),
+            ("data3", "u1"),
+        ]
+    )
+
+# Timestamps below this are "seconds since BMC init", not wall clock (IPMI spec 37.1).
+PRE_INIT_TIMESTAMP = 0x20000000
+
+SENSOR_TYPES: Dict[int, str] = {
+    0x01: "Temperature",
+    0x02: "Voltage",
+    0x03: "Current",
+    0x04: "Fan",
+    0x05: "Physical Security",
+    0x06: "Platform Security",
+    0x07: "Processor",
+    0x08: "Power Supply",
+    0x09: "Power Unit",
+    0x0A: "Cooling Device",
+    0x0B: "Other Units-based Sensor",
+    0x0C: "Memory",
+    0x0D: "Drive Slot",
+    0x0E: "POST Memory Resize",
+    0x0F: "System Firmware Progress",
+    0x10: "Event Logging Disabled",
+    0x11: "Watchdog 1",
+    0x12: "System Event",
+    0x13: "Critical Interrupt",
+    0x14: "Button/Switch",
+    0x15: "Module/Board",
+    0x16: "Microcontroller",
+    0x17: "Add-in Card",
+    0x18: "Chassis",
+    0x19: "Chip Set",
+    0x1A: "Other FRU",
+    0x1B: "Cable/Interconnect",
+    0x1C: "Terminator",
+    0x1D: "System Boot Initiated",
+    0x1E: "Boot Error",
+    0x1F: "OS Boot",
+    0x20: "OS Critical Stop",
+    0x21: "Slot/Connector",
+    0x22: "System ACPI Power State",
+    0x23: "Watchdog 2",
+    0x24: "Platform Alert",
+    0x25: "Entity Presence",
+    0x26: "Monitor ASIC",
+    0x27: "LAN",
+    0x28: "Management Subsystem Health",
+    0x29: "Battery",
+    0x2A: "Session Audit",
+    0x2B: "Version Change",
+    0x2C: "FRU State",
+}
+
+# Severity of an asserted event; deassertions of Warning/Critical events are reported as OK.
+OK, INFO, WARNING, CRITICAL = "OK", "Info", "Warning", "Critical"
+SEVERITIES = (OK, INFO, WARNING, CRITICAL)
+# ``log_record.Severity`` of each entry of SEVERITIES.
+CANONICAL = (log_record.Severity.INFO, log_record.Severity.INFO, log_record.Severity.WARN, log_record.Severity.CRITICAL)
+
+# event/reading type 01h (threshold), offset -> (description, severity)
+THRESHOLD_EVENTS: Dict[int, Tuple[str, str]] = {
+    0x0: ("Lower Non-critical going low", WARNING),
+    0x1: ("Lower Non-critical going high", WARNING),
+    0x2: ("Lower Critical going low", CRITICAL),
+    0x3: ("Lower Critical going high", CRITICAL),
+    0x4: ("Lower Non-recoverable going low", CRITICAL),
+    0x5: ("Lower Non-recoverable going high", CRITICAL),
+    0x6: ("Upper Non-critical going low", WARNING),
+    0x7: ("Upper Non-critical going high", WARNING),
+    0x8: ("Upper Critical going low", CRITICAL),
+    0x9: ("Upper Critical going high", CRITICAL),
+    0xA: ("Upper Non-recoverable going low", CRITICAL),
+    0xB: ("Upper Non-recoverable going high", CRITICAL),
+}
+
+# generic event/reading types 02h-0Ch, (event type, offset) -> (description, severity)
+GENERIC_EVENTS: Dict[Tuple[int, int], Tuple[str, str]] = {
+    (0x02, 0x0): ("Transition to Idle", INFO),
+    (0x02, 0x1): ("Transition to Active", INFO),
+    (0x02, 0x2): ("Transition to Busy", INFO),
+    (0x03, 0x0): ("State Deasserted", INFO),
+    (0x03, 0x1): ("State Asserted", INFO),
+    (0x04, 0x0): ("Predictive Failure deasserted", OK),
+    (0x04, 0x1): ("Predictive Failure asserted", WARNING),
+    (0x05, 0x0): ("Limit Not Exceeded", OK),
+    (0x05, 0x1): ("Limit Exceeded", WARNING),
+    (0x06, 0x0): ("Performance Met", OK),
+    (0x06, 0x1): ("Performance Lags", WARNING),
+    (0x07, 0x0): ("Transition to OK", OK),
+    (0x07, 0x1): ("Transition to Non-Critical from OK", WARNING),
+    (0x07, 0x2): ("Transition to Critical from less severe", CRITICAL),
+    (0x07, 0x3): ("Transition to Non-recoverable from less severe", CRITICAL),
+    (0x07, 0x4): ("Transition to Non-Critical from more severe", WARNING),
+    (0x07, 0x5): ("Transition to Critical from Non-recoverable", CRITICAL),
+    (0x07, 0x6): ("Transition to Non-recoverable", CRITICAL),
+    (0x07, 0x7): ("Monitor", INFO),
+    (0x07, 0x8): ("Informational", INFO),
+    (0x08, 0x0): ("Device Absent", WARNING),
+    (0x08, 0x1): ("Device Present", INFO),
+    (0x09, 0x0): ("Device Disabled", WARNING),
+    (0x09, 0x1): ("Device Enabled", INFO),
+    (0x0A, 0x0): ("Transition to Running", INFO),
+    (0x0A, 0x1): ("Transition to In Test", INFO),
+    (0x0A, 0x2): ("Transition to Power Off", INFO),
+    (0x0A, 0x3): ("Transition to On Line", INFO),
+    (0x0A, 0x4): ("Transition to Off Line", WARNING),
+    (0x0A, 0x5): ("Transition to Off Duty", INFO),
+    (0x0A, 0x6): ("Transition to Degraded", WARNING),
+    (0x0A, 0x7): ("Transition to Power Save", INFO),
+    (0x0A, 0x8): ("Install Error", CRITICAL),
+    (0x0B, 0x0): ("Fully Redundant", OK),
+    (0x0B, 0x1): ("Redundancy Lost", CRITICAL),
+    (0x0B, 0x2): ("Redundancy Degraded", WARNING),
+    (0x0B, 0x3): ("Non-redundant: Sufficient from Redundant", WARNING),
+    (0x0B, 0x4): ("Non-redundant: Sufficient from Insufficient", WARNING),
+    (0x0B, 0x5): ("Non-redundant: Insufficient Resources", CRITICAL),
+    (0x0B, 0x6): ("Redundancy Degraded from Fully Redundant", WARNING),
+    (0x0B, 0x7): ("Redundancy Degraded from Non-redundant", WARNING),
+    (0x0C, 0x0): ("D0 Power State", INFO),
+    (0x0C, 0x1): ("D1 Power State", INFO),
+    (0x0C, 0x2): ("D2 Power State", INFO),
+    (0x0C, 0x3): ("D3 Power State", INFO),
+}
+
+# sensor-specific event type 6Fh, (sensor type, offset) -> (description, severity)
+SENSOR_SPECIFIC_EVENTS: Dict[Tuple[int, int], Tuple[str, str]] = {
+    (0x05, 0x0): ("General Chassis intrusion", WARNING),
+    (0x05, 0x1): ("Drive Bay intrusion", WARNING),
+    (0x05, 0x4): ("LAN Leash Lost", WARNING),
+    (0x07, 0x0): ("IERR", CRITICAL),
+    (0x07, 0x1): ("Thermal Trip", CRITICAL),
+    (0x07, 0x2): ("FRB1/BIST failure", CRITICAL),
+    (0x07, 0x3): ("FRB2/Hang in POST failure", CRITICAL),
+    (0x07, 0x4): ("FRB3/Processor Startup/Initialization failure", CRITICAL),
+    (0x07, 0x5): ("Configuration Error", CRITICAL),
+    (0x07, 0x6): ("SM BIOS Uncorrectable CPU-complex Error", CRITICAL),
+    (0x07, 0x7): ("Presence detected", INFO),
+    (0x07, 0x8): ("Disabled", WARNING),
+    (0x07, 0x9): ("Terminator presence detected", INFO),
+    (0x07, 0xA): ("Throttled", WARNING),
+    (0x07, 0xB): ("Uncorrectable machine check exception", CRITICAL),
+    (0x07, 0xC): ("Correctable machine check error", WARNING),
+    (0x08, 0x0): ("Presence detected", INFO),
+    (0x08, 0x1): ("Failure detected", CRITICAL),
+    (0x08, 0x2): ("Predictive failure", WARNING),
+    (0x08, 0x3): ("Power Supply AC lost", CRITICAL),
+    (0x08, 0x4): ("AC lost or out-of-range", CRITICAL),
+    (0x08, 0x5): ("AC out-of-range, but present", WARNING),
+    (0x08, 0x6): ("Configuration error", CRITICAL),
+    (0x08, 0x7): ("Power Supply Inactive", WARNING),
+    (0x09, 0x0): ("Power off/down", INFO),
+    (0x09, 0x1): ("Power cycle", INFO),
+    (0x09, 0x2): ("240VA power down", WARNING),
+    (0x09, 0x3): ("Interlock power down", WARNING),
+    (0x09, 0x4): ("AC lost", CRITICAL),
+    (0x09, 0x5): ("Soft-power control failure", CRITICAL),
+    (0x09, 0x6): ("Failure detected", CRITICAL),
+    (0x09, 0x7): ("Predictive failure", WARNING),
+    (0x0C, 0x0): ("Correctable ECC", WARNING),
+    (0x0C, 0x1): ("Uncorrectable ECC", CRITICAL),
+    (0x0C, 0x2): ("Parity", CRITICAL),
+    (0x0C, 0x3): ("Memory Scrub Failed", CRITICAL),
+    (0x0C, 0x4): ("Memory Device Disabled", WARNING),
+    (0x0C, 0x5): ("Correctable ECC logging limit reached", WARNING),
+    (0x0C, 0x6): ("Presence Detected", INFO),
+    (0x0C, 0x7): ("Configuration Error", CRITICAL),
+    (0x0C, 0x8): ("Spare", INFO),
+    (0x0C, 0x9): ("Throttled", WARNING),
+    (0x0C, 0xA): ("Critical Overtemperature", CRITICAL),
+    (0x0D, 0x0): ("Drive Present", INFO),
+    (0x0D, 0x1): ("Drive Fault", CRITICAL),
+    (0x0D, 0x2): ("Predictive Failure", WARNING),
+    (0x0D, 0x3): ("Hot Spare", INFO),
+    (0x0D, 0x4): ("Parity Check In Progress", INFO),
+    (0x0D, 0x5): ("In Critical Array", CRITICAL),
+    (0x0D, 0x6): ("In Failed Array", CRITICAL),
+    (0x0D, 0x7): ("Rebuild in progress", WARNING),
+    (0x0D, 0x8): ("Rebuild aborted", CRITICAL),
+    (0x0F, 0x0): ("System Firmware Error", CRITICAL),
+    (0x0F, 0x1): ("System Firmware Hang", CRITICAL),
+    (0x0F, 0x2): ("System Firmware Progress", INFO),
+    (0x10, 0x0): ("Correctable memory error logging disabled", WARNING),
+    (0x10, 0x1): ("Event logging disabled", WARNING),
+    (0x10, 0x2): ("Log area reset/cleared", INFO),
+    (0x10, 0x3): ("All event logging disabled", WARNING),
+    (0x10, 0x4): ("Log full", WARNING),
+    (0x10, 0x5): ("Log almost full", WARNING),
+    (0x12, 0x0): ("System Reconfigured", INFO),
+    (0x12, 0x1): ("OEM System boot event", INFO),
+    (0x12, 0x2): ("Undetermined system hardware failure", CRITICAL),
+    (0x12, 0x3): ("Entry added to auxiliary log", INFO),
+    (0x12, 0x4): ("PEF Action", INFO),
+    (0x12, 0x5): ("Timestamp Clock Sync", INFO),
+    (0x13, 0x0): ("Front Panel NMI/Diagnostic Interrupt", CRITICAL),
+    (0x13, 0x1): ("Bus Timeout", CRITICAL),
+    (0x13, 0x2): ("I/O channel check NMI", CRITICAL),
+    (0x13, 0x3): ("Software NMI", WARNING),
+    (0x13, 0x4): ("PCI PERR", CRITICAL),
+    (0x13, 0x5): ("PCI SERR", CRITICAL),
+    (0x13, 0x7): ("Bus Correctable Error", WARNING),
+    (0x13, 0x8): ("Bus Uncorrectable Error", CRITICAL),
+    (0x13, 0x9): ("Fatal NMI", CRITICAL),
+    (0x13, 0xA): ("Bus Fatal Error", CRITICAL),
+    (0x13, 0xB): ("Bus Degraded", WARNING),
+    (0x14, 0x0): ("Power Button pressed", INFO),
+    (0x14, 0x1): ("Sleep Button pressed", INFO),
+    (0x14, 0x2): ("Reset Button pressed", INFO),
+    (0x1E, 0x0): ("No bootable media", WARNING),
+    (0x1E, 0x1): ("Non-bootable diskette left in drive", WARNING),
+    (0x1E, 0x2): ("PXE Server not found", WARNING),
+    (0x1E, 0x3): ("Invalid boot sector", CRITICAL),
+    (0x1E, 0x4): ("Timeout waiting for user selection of boot source", WARNING),
+    (0x20, 0x0): ("Critical stop during OS load", CRITICAL),
+    (0x20, 0x1): ("Run-time critical stop", CRITICAL),
+    (0x20, 0x2): ("OS graceful stop", INFO),
+    (0x20, 0x3): ("OS graceful shutdown", INFO),
+    (0x23, 0x0): ("Timer expired", WARNING),
+    (0x23, 0x1): ("Hard reset", CRITICAL),
+    (0x23, 0x2): ("Power down", CRITICAL),
+    (0x23, 0x3): ("Power cycle", CRITICAL),
+    (0x25, 0x0): ("Entity Present", INFO),
+    (0x25, 0x1): ("Entity Absent", WARNING),
+    (0x25, 0x2): ("Entity Disabled", WARNING),
+    (0x29, 0x0): ("Battery low", WARNING),
+    (0x29, 0x1): ("Battery failed", CRITICAL),
+    (0x29, 0x2): ("Battery presence detected", INFO),
+    (0x2A, 0x0): ("Session Activated", INFO),
+    (0x2A, 0x1): ("Session Deactivated", INFO),
+    (0x2A, 0x2): ("Invalid Username or Password", WARNING),
+    (0x2A, 0x3): ("Invalid password disable", WARNING),
+}
+
+
+def _build_tables() -> Tuple[List[str], List[int], Dict[Tuple[int, int, int], int]]:
+    """Flatten the event tables into description/severity lists and a (event type, sensor type, offset) index."""
+    descriptions: List[str] = ["Unknown event"]
+    severities: List[int] = [SEVERITIES.index(INFO)]
+    index: Dict[Tuple[int, int, int], int] = {}
+
+    def add(key: Tuple[int, int, int], entry: Tuple[str, str]) -> None:
+        index[key] = len(descriptions)
+        descriptions.append(entry[0])
+        severities.append(SEVERITIES.index(entry[1]))
+
+    for offset, entry in THRESHOLD_EVENTS.items():
+        add((0x01, -1, offset), entry)
+    for (etype, offset), entry in GENERIC_EVENTS.items():
+        add((etype, -1, offset), entry)
+    for (stype, offset), entry in SENSOR_SPECIFIC_EVENTS.items():
+        add((0x6F, stype, offset), entry)
+    return descriptions, severities, index
+
+
+DESCRIPTIONS, _SEVERITY_CODES, _EVENT_INDEX = _build_tables()
+
+# ipmitool ``elist`` text -> the same tables: (sensor type or -1 for any, casefolded description) -> code.
+_TEXT_INDEX: Dict[Tuple[int, str], int] = {
+    (stype, DESCRIPTIONS[code].casefold()): code for (_etype, stype, _offset), code in _EVENT_INDEX.items()
+}
+# Sensor type names, longest first, to recognise the type at the start of an elist sensor column.
+_TYPE_NAMES = sorted(((name.casefold(), stype) for stype, name in SENSOR_TYPES.items()), key=lambda t: -len(t[0]))
+
+
+def elist_severity(sensor: str, description: str, direction: str) -> Optional[log_record.Severity]:
+    """Severity of one ``ipmitool sel elist`` event, from the tables raw records are decoded with.
+
+    ``sensor`` is the sensor column ("Power Supply PSU1"), ``description`` the event text and
+    ``direction`` "Asserted" or "Deasserted". Returns None for events the tables do not know.
+    """
+    label = sensor.strip().casefold()
+    stype = next((t for name, t in _TYPE_NAMES if label.startswith(name)), -1)
+    text = description.strip().casefold()
+    code = _TEXT_INDEX.get((stype, text)) or _TEXT_INDEX.get((-1, text))
+    if code is None:
+        return None
+    severity = _SEVERITY_CODES[code]
+    if direction.strip().casefold() == "deasserted" and severity >= SEVERITIES.index(WARNING):
+        severity = SEVERITIES.index(OK)  # a deasserted Warning/Critical condition is a recovery
+    return CANONICAL[severity]
+
+
+def event_code(event_type: int, sensor_type: int, offset: int) -> int:
+    """Index into ``DESCRIPTIONS`` for one event (0 = unknown)."""
+    if event_type == 0x6F:
+        return _EVENT_INDEX.get((0x6F, sensor_type, offset), 0)
+    return _EVENT_INDEX.get((event_type, -1, offset), 0)
+
+
+if np is not None:
+    # Dense lookup: [event type (0-127)][sensor type (0-255)][offset (0-15)] -> description index.
+    _EVENT_LUT = np.zeros((128, 256, 16), dtype=np.uint16)
+    for (_etype, _stype, _offset), _code in _EVENT_INDEX.items():
+        if _stype < 0:
+            _EVENT_LUT[_etype, :, _offset] = _code
+        else:
+            _EVENT_LUT[_etype, _stype, _offset] = _code
+    _SEVERITY_LUT = np.array(_SEVERITY_CODES, dtype=np.uint8)
+
+
+@dataclass
+class SelBatch:
+    """Decoded SEL records, one entry per record in every list/array."""
+
+    record_id: Sequence[int]
+    record_type: Sequence[int]
+    timestamp: Sequence[int]
+    sensor_type: Sequence[int]
+    sensor_number: Sequence[int]
+    deasserted: Sequence[bool]
+    event_code: Sequence[int]  # index into DESCRIPTIONS
+    severity_code: Sequence[int]  # index into SEVERITIES
+    oem: Sequence[bytes]  # payload of OEM records (b"" for system events)
+
+    def __len__(self) -> int:
+        return len(self.record_id)
+
+
+def decode_sel(buf: bytes) -> SelBatch:
+    """Decode concatenated 16-byte SEL records (trailing partial record ignored)."""
+    buf = buf[: len(buf) - len(buf) % RECORD_SIZE]
+    if np is not None:
+        return _decode_numpy(buf)
+    return _decode_struct(buf)
+
+
+def _decode_numpy(buf: bytes) -> SelBatch:
+    rec = np.frombuffer(buf, dtype=SEL_DTYPE)
+    system = rec["record_type"] == 0x02
+    event_type = (rec["event"] & 0x7F).astype(np.intp)
+    offset = (rec["data1"] & 0x0F).astype(np.intp)
+    codes = _EVENT_LUT[np.minimum(event_type, 127), rec["sensor_type"], offset]
+    codes = np.where(system, codes, 0)
+    deasserted = system & ((rec["event"] & 0x80) != 0)
+    severity = _SEVERITY_LUT[codes]
+    # A deasserted Warning/Critical condition is a recovery.
+    severity = np.where(deasserted & (severity >= SEVERITIES.index(WARNING)), SEVERITIES.index(OK), severity)
+    timestamps = np.where(rec["record_type"] < 0xE0, rec["timestamp"], 0)
+    raw = np.frombuffer(buf, dtype=np.uint8).reshape(-1, RECORD_SIZE)
+    oem_rows = np.flatnonzero(~system)
+    oem: List[bytes] = [b""] * len(rec)
+    for i in oem_rows.tolist():
+        oem[i] = raw[i, 3:].tobytes()
+    return SelBatch(
+        record_id=rec["record_id"],
+        record_type=rec["record_type"],
+        timestamp=timestamps,
+        sensor_type=rec["sensor_type"],
+        sensor_number=rec["sensor_number"],
+        deasserted=deasserted,
+        event_code=codes,
+        severity_code=severity,
+        oem=oem,
+    )
+
+
+def _decode_struct(buf: bytes) -> SelBatch:
+    cols: Tuple[List, ...] = ([], [], [], [], [], [], [], [], [])
+    ok, warn = SEVERITIES.index(OK), SEVERITIES.index(WARNING)
+    for i, fields in enumerate(RECORD_STRUCT.iter_unpack(buf)):
+        rid, rtype, ts, _gen, _rev, stype, snum, event, data1, _d2, _d3 = fields
+        system = rtype == 0x02
+        code = event_code(event & 0x7F, stype, data1 & 0x0F) if system else 0
+        deasserted = system and bool(event & 0x80)
+        severity = _SEVERITY_CODES[code]
+        if deasserted and severity >= warn:
+            severity = ok
+        for col, value in zip(
+            cols,
+            (
+                rid,
+                rtype,
+                ts if rtype < 0xE0 else 0,
+                stype,
+                snum,
+                deasserted,
+                code,
+                severity,
+                b"" if system else buf[i * RECORD_SIZE + 3 : (i + 1) * RECORD_SIZE],
+            ),
+        ):
+            col.append(value)
+    return SelBatch(*cols)
+
+
+def sel_to_logs(
+    buf: bytes,
+    *,
+    host: str,
+    vendor: str,
+    service: str = "ipmi",
+    sensor_names: Optional[Dict[int, str]] = None,
+) -> List[log_record.LogRecord]:
+    """Decode raw SEL records straight into ``log_record.LogRecord`` tuples.
+
+    ``sensor_names`` (sensor number -> SDR name) replaces the generic "<type> #0xNN" label.
+    """
+    batch = decode_sel(buf)
+    n = len(batch)
+    if not n:
+        return []
+    names = sensor_names or {}
+    now = datetime.utcnow()
+    if np is not None:
+        stype = np.asarray(batch.sensor_type, dtype=np.uint64)
+        snum = np.asarray(batch.sensor_number, dtype=np.uint64)
+        code = np.asarray(batch.event_code, dtype=np.uint64)
+        dea = np.asarray(batch.deasserted, dtype=np.uint64)
+        sev = np.asarray(batch.severity_code, dtype=np.uint64)
+        keys = (((stype << 24) | (snum << 16) | (code << 2) | (dea << 1)) << 2) | sev
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.tolist()
+        ts_list = np.asarray(batch.timestamp).tolist()
+    else:
+        keys_list = [
+            (((s << 24) | (m << 16) | (c << 2) | (int(d) << 1)) << 2) | v
+            for s, m, c, d, v in zip(
+                batch.sensor_type, batch.sensor_number, batch.event_code, batch.deasserted, batch.severity_code
+            )
+        ]
+        uniq = sorted(set(keys_list))
+        pos = {k: i for i, k in enumerate(uniq)}
+        inverse = [pos[k] for k in keys_list]
+        ts_list = list(batch.timestamp)
+
+    messages: List[str] = []
+    severities: List[log_record.Severity] = []
+    for key in (int(k) for k in uniq):
+        sev = key & 0x3
+        key >>= 2
+        dea = (key >> 1) & 0x1
+        code = (key >> 2) & 0x3FFF
+        snum = (key >> 16) & 0xFF
+        stype = (key >> 24) & 0xFF
+        label = names.get(snum) or f"{SENSOR_TYPES.get(stype, f'Sensor type 0x{stype:02x}')} #0x{snum:02x}"
+        messages.append(f"{label} | {DESCRIPTIONS[code]} | {'Deasserted' if dea else 'Asserted'}")
+        severities.append(CANONICAL[sev])
+
+    host, vendor, service = log_record.intern(host), log_record.intern(vendor), log_record.intern(service)
+    record = log_record.LogRecord
+    times: Dict[int, datetime] = {}
+    logs: List[log_record.LogRecord] = []
+    rtypes = list(batch.record_type) if np is None else np.asarray(batch.record_type).tolist()
+    rids = list(batch.record_id) if np is None else np.asarray(batch.record_id).tolist()
+    for i in range(n):
+        ts = ts_list[i]
+        when = times.get(ts)
+        if when is None:
+            when = times[ts] = (
+                datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None) if ts >= PRE_INIT_TIMESTAMP else now
+            )
+        if rtypes[i] == 0x02:
+            message, severity = messages[inverse[i]], severities[inverse[i]]
+        else:
+            message, severity = f"OEM record type 0x{rtypes[i]:02x}: {batch.oem[i].hex()}", log_record.Severity.INFO
+        logs.append(record(when, host, vendor, service, severity, message, f"sel:{rids[i]:x}"))
+    return logs
@@ -0,0 +1,442 @@
+"""
+Compressed numeric sensor time-series store.
+
+Samples are kept per (host, sensor) series. New samples go into an open head
+(``array`` of int seconds and doubles); every ``chunk_size`` samples the head is
+sealed into an immutable chunk encoded Gorilla-style:
+
+- timestamps: first value, then delta-of-delta in 1/9/12/16/36-bit buckets
+  (per-minute polling is almost always the single ``0`` bit). A jump too big
+  for the 32-bit bucket (a BMC clock reset to a far date) seals the head and
+  starts a new chunk, whose first timestamp is stored in full;
+- values: first value, then XOR with the previous value, storing only the
+  meaningful bits and reusing the previous leading/trailing-zero window.
+
+Steady fan/temperature/PSU readings compress to about 1-2 bytes per sample,
+so 90 days of per-minute data for a fleet stays in the low GB. Chunks older
+than ``retention`` are dropped as new ones are sealed. Range reads decode only
+the chunks overlapping the range; ``downsample`` aggregates with NumPy.
+
+The store is kept in a single file (``TEMS_SENSOR_PATH``), rewritten at most
+every ``save_interval`` seconds (``TEMS_SENSOR_SAVE_INTERVAL``) as samples come
+in, from a worker thread when an event loop is running, and on shutdown. Open
+heads are written as extra chunks without sealing them, so a crash loses at
+most one interval of readings.
+
+Samples arrive as ``SensorSample`` from Redfish telemetry and IPMI sensor reads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import calendar
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "state" / "sensors.bin"
+MAGIC = b"TEMSTS1\n"
+_SERIES_HEADER = struct.Struct("<HHI")
+_CHUNK_HEADER = struct.Struct("<qqIII")
+_F64 = struct.Struct(">d")
+_U64 = struct.Struct(">Q")
+
+# Delta-of-delta buckets: (prefix, prefix bits, value bits); the last one is the catch-all.
+_DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12), (0b1111, 4, 32))
+_DOD_MIN, _DOD_MAX = -(1 << 31), (1 << 31) - 1
+
+SeriesKey = Tuple[str, str]
+
+
+@dataclass
+class SensorSample:
+    timestamp: datetime
+    host: str
+    sensor: str
+    value: float
+
+
+def epoch_seconds(ts: datetime) -> int:
+    """Naive datetimes are taken as UTC, like the rest of the collector."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return calendar.timegm(ts.timetuple())
+
+
+class _BitWriter:
+    __slots__ = ("acc", "n")
+
+    def __init__(self) -> None:
+        self.acc = 0
+        self.n = 0
+
+    def write(self, value: int, bits: int) -> None:
+        self.acc = (self.acc << bits) | (value & ((1 << bits) - 1))
+        self.n += bits
+
+    def getvalue(self) -> bytes:
+        pad = -self.n % 8
+        return (self.acc << pad).to_bytes((self.n + pad) // 8, "big")
+
+
+class _BitReader:
+    __slots__ = ("bits", "pos")
+
+    def __init__(self, data: bytes) -> None:
+        self.bits = format(int.from_bytes(data, "big"), f"0{len(data) * 8}b") if data else ""
+        self.pos = 0
+
+    def read(self, n: int) -> int:
+        p = self.pos
+        self.pos = p + n
+        return int(self.bits[p : p + n], 2)
+
+    def bit(self) -> bool:
+        p = self.pos
+        self.pos = p + 1
+        return self.bits[p] == "1"
+
+    def signed(self, n: int) -> int:
+        v = self.read(n)
+        return v - (1 << n) if v >= 1 << (n - 1) else v
+
+
+def encode_timestamps(ts: Iterable[int]) -> bytes:
+    """Raises ``ValueError`` for a delta-of-delta outside 32 bits (see ``SensorStore.add``)."""
+    w = _BitWriter()
+    it = iter(ts)
+    prev = next(it, None)
+    if prev is None:
+        return b""
+    w.write(prev, 64)
+    delta = 0
+    for t in it:
+        new_delta = t - prev
+        dod = new_delta - delta
+        if dod == 0:
+            w.write(0, 1)
+        elif not _DOD_MIN <= dod <= _DOD_MAX:
+            raise ValueError(f"timestamp delta-of-delta {dod} does not fit in 32 bits")
+        else:
+            for prefix, plen, vbits in _DOD_BUCKETS:
+                if -(1 << (vbits - 1)) <= dod < (1 << (vbits - 1)) or vbits == 32:
+                    w.write(prefix, plen)
+                    w.write(dod, vbits)
+                    break
+        prev, delta = t, new_delta
+    return w.getvalue()
+
+
+def decode_timestamps(data: bytes, count: int) -> List[int]:
+    if not count:
+        return []
+    r = _BitReader(data)
+    prev = r.read(64)
+    out = [prev]
+    delta = 0
+    for _ in range(count - 1):
+        if r.bit():
+            vbits = 32
+            for _prefix, _plen, bucket_bits in _DOD_BUCKETS[:-1]:
+                if not r.bit():
+                    vbits = bucket_bits
+                    break
+            delta += r.signed(vbits)
+        prev += delta
+        out.append(prev)
+    return out
+
+
+def encode_values(values: Iterable[float]) -> bytes:
+    w = _BitWriter()
+    it = iter(values)
+    first = next(it, None)
+    if first is None:
+        return b""
+    prev = _U64.unpack(_F64.pack(first))[0]
+    w.write(prev, 64)
+    lead_prev, trail_prev = -1, 0  # no window yet
+    for v in it:
+        cur = _U64.unpack(_F64.pack(v))[0]
+        x = cur ^ prev
+        if x == 0:
+            w.write(0, 1)
+        else:
+            lead = min(64 - x.bit_length(), 31)
+            trail = (x & -x).bit_length() - 1
+            if lead_prev >= 0 and lead >= lead_prev and trail >= trail_prev:
+                w.write(0b10, 2)
+                w.write(x >> trail_prev, 64 - lead_prev - trail_prev)
+            else:
+                sig = 64 - lead - trail
+                w.write(0b11, 2)
+                w.write(lead, 5)
+                w.write(sig - 1, 6)
+                w.write(x >> trail, sig)
+                lead_prev, trail_prev = lead, trail
+        prev = cur
+    return w.getvalue()
+
+
+def decode_values(data: bytes, count: int) -> List[float]:
+    if not count:
+        return []
+    r = _BitReader(data)
+    prev = r.read(64)
+    out = [prev]
+    lead, trail = 0, 0
+    for _ in range(count - 1):
+        if r.bit():
+            if r.bit():
+                lead = r.read(5)
+                sig = r.read(6) + 1
+                trail = 64 - lead - sig
+            prev ^= r.read(64 - lead - trail) << trail
+        out.append(prev)
+    return list(struct.unpack(f">{count}d", struct.pack(f">{count}Q", *out)))
+
+
+class Chunk:
+    __slots__ = ("start", "end", "count", "ts_data", "val_data")
+
+    def __init__(self, start: int, end: int, count: int, ts_data: bytes, val_data: bytes) -> None:
+        self.start = start
+        self.end = end
+        self.count = count
+        self.ts_data = ts_data
+        self.val_data = val_data
+
+    @classmethod
+    def encode(cls, ts: array, values: array) -> "Chunk":
+        return cls(ts[0], ts[-1], len(ts), encode_timestamps(ts), encode_values(values))
+
+    def decode(self) -> Tuple[List[int], List[float]]:
+        return decode_timestamps(self.ts_data, self.count), decode_values(self.val_data, self.count)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.ts_data) + len(self.val_data)
+
+
+class Series:
+    __slots__ = ("chunks", "head_ts", "head_values")
+
+    def __init__(self) -> None:
+        self.chunks: List[Chunk] = []
+        self.head_ts = array("q")
+        self.head_values = array("d")
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        if self.head_ts:
+            return self.head_ts[-1]
+        return self.chunks[-1].end if self.chunks else None
+
+    def seal(self) -> None:
+        if self.head_ts:
+            self.chunks.append(Chunk.encode(self.head_ts, self.head_values))
+            self.head_ts = array("q")
+            self.head_values = array("d")
+
+    def read(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        ts: List[int] = []
+        values: List[float] = []
+        for chunk in self.chunks:
+            if chunk.end >= start and chunk.start <= end:
+                t, v = chunk.decode()
+                ts.extend(t)
+                values.extend(v)
+        ts.extend(self.head_ts)
+        values.extend(self.head_values)
+        t_arr = np.asarray(ts, dtype=np.int64)
+        v_arr = np.asarray(values, dtype=np.float64)
+        mask = (t_arr >= start) & (t_arr <= end)
+        return t_arr[mask], v_arr[mask]
+
+
+class SensorStore:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        chunk_size: int = 120,
+        retention: float = 90 * 86400,
+        save_interval: float = 300.0,
+    ) -> None:
+        self.path = Path(path or os.environ.get("TEMS_SENSOR_PATH", DEFAULT_PATH))
+        self.chunk_size = max(2, chunk_size)
+        self.retention = retention
+        self.save_interval = save_interval
+        self._series: Dict[SeriesKey, Series] = {}
+        self._dirty = False
+        self._saved_at = float("-inf")
+        self._seq = 0  # snapshots taken
+        self._written = 0  # newest snapshot on disk
+        self._write_lock = threading.Lock()
+        self._writing: Optional[asyncio.Future] = None
+
+    def add(self, host: str, sensor: str, timestamp: datetime, value: float) -> bool:
+        """Append one sample; out-of-order or duplicate timestamps are dropped."""
+        series = self._series.get((host, sensor))
+        if series is None:
+            series = self._series[(host, sensor)] = Series()
+        ts = epoch_seconds(timestamp)
+        last = series.last_ts
+        if last is not None and ts <= last:
+            return False
+        if series.head_ts:
+            prev_delta = series.head_ts[-1] - series.head_ts[-2] if len(series.head_ts) > 1 else 0
+            if not _DOD_MIN <= (ts - series.head_ts[-1]) - prev_delta <= _DOD_MAX:
+                series.seal()  # too big a jump to encode: start a new chunk at ``ts``
+        series.head_ts.append(ts)
+        series.head_values.append(value)
+        self._dirty = True
+        if len(series.head_ts) >= self.chunk_size:
+            series.seal()
+            cutoff = ts - self.retention
+            while series.chunks and series.chunks[0].end < cutoff:
+                series.chunks.pop(0)
+        return True
+
+    def ingest(self, samples: Iterable[SensorSample], source: str = "poll") -> int:
+        """Pipeline sample sink: store ``SensorSample``s, saving in the background now and then."""
+        added = sum(self.add(s.host, s.sensor, s.timestamp, s.value) for s in samples)
+        if added:
+            self._changed()
+        return added
+
+    def sensors(self, host: Optional[str] = None) -> List[SeriesKey]:
+        return sorted(k for k in self._series if host is None or k[0] == host)
+
+    def query(
+        self, host: str, sensor: str, start: datetime, end: datetime
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw samples in ``[start, end]`` as (epoch seconds, values) arrays."""
+        series = self._series.get((host, sensor))
+        if series is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return series.read(epoch_seconds(start), epoch_seconds(end))
+
+    def downsample(
+        self, host: str, sensor: str, start: datetime, end: datetime, step: int
+    ) -> List[Dict[str, float]]:
+        """Per-``step``-seconds min/max/avg buckets over ``[start, end]``."""
+        ts, values = self.query(host, sensor, start, end)
+        if not len(ts):
+            return []
+        step = max(1, int(step))
+        buckets = (ts - ts[0] + (ts[0] % step)) // step
+        edges = np.flatnonzero(np.diff(buckets)) + 1
+        starts = np.concatenate(([0], edges))
+        counts = np.diff(np.concatenate((starts, [len(ts)])))
+        sums = np.add.reduceat(values, starts)
+        mins = np.minimum.reduceat(values, starts)
+        maxs = np.maximum.reduceat(values, starts)
+        bucket_ts = ts[starts] - ts[starts] % step
+        return [
+            {"t": int(t), "min": float(lo), "max": float(hi), "avg": float(s / c), "count": int(c)}
+            for t, lo, hi, s, c in zip(bucket_ts, mins, maxs, sums, counts)
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        samples = sum(c.count for s in self._series.values() for c in s.chunks)
+        head = sum(len(s.head_ts) for s in self._series.values())
+        return {
+            "series": len(self._series),
+            "samples": samples + head,
+            "compressed_bytes": sum(c.nbytes for s in self._series.values() for c in s.chunks),
+            "head_samples": head,
+        }
+
+    def _snapshot(self) -> Tuple[int, List[Tuple[SeriesKey, List[Chunk]]]]:
+        """Chunk lists of every series, open heads encoded as one more chunk (heads stay open)."""
+        self._seq += 1
+        self._dirty, self._saved_at = False, time.monotonic()
+        data = []
+        for key, series in self._series.items():
+            chunks = list(series.chunks)
+            if series.head_ts:
+                chunks.append(Chunk.encode(series.head_ts, series.head_values))
+            data.append((key, chunks))
+        return self._seq, data
+
+    def _write(self, seq: int, data: List[Tuple[SeriesKey, List[Chunk]]]) -> None:
+        with self._write_lock:
+            if seq <= self._written:
+                return  # a newer snapshot is already on disk
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".sensors-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                for (host, sensor), chunks in data:
+                    h, s = host.encode(), sensor.encode()
+                    f.write(_SERIES_HEADER.pack(len(h), len(s), len(chunks)))
+                    f.write(h + s)
+                    for c in chunks:
+                        f.write(_CHUNK_HEADER.pack(c.start, c.end, c.count, len(c.ts_data), len(c.val_data)))
+                        f.write(c.ts_data + c.val_data)
+            os.replace(tmp, self.path)
+            self._written = seq
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self._writing is not None and not self._writing.done():
+            return
+        if time.monotonic() - self._saved_at < self.save_interval:
+            return
+        seq, data = self._snapshot()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(seq, data)
+            return
+        self._writing = loop.create_task(asyncio.to_thread(self._write, seq, data))
+
+    def save(self) -> None:
+        """Atomically rewrite the store file now if anything changed since the last write."""
+        if self._dirty:
+            self._write(*self._snapshot())
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        if not data.startswith(MAGIC):
+            return
+        pos = len(MAGIC)
+        while pos < len(data):
+            hlen, slen, nchunks = _SERIES_HEADER.unpack_from(data, pos)
+            pos += _SERIES_HEADER.size
+            host = data[pos : pos + hlen].decode()
+            sensor = data[pos + hlen : pos + hlen + slen].decode()
+            pos += hlen + slen
+            series = self._series.setdefault((host, sensor), Series())
+            for _ in range(nchunks):
+                start, end, count, tlen, vlen = _CHUNK_HEADER.unpack_from(data, pos)
+                pos += _CHUNK_HEADER.size
+                ts_data, val_data = data[pos : pos + tlen], data[pos + tlen : pos + tlen + vlen]
+                pos += tlen + vlen
+                series.chunks.append(Chunk(start, end, count, ts_data, val_data))
+
+
+_store: Optional[SensorStore] = None
+
+
+def get_sensor_store() -> SensorStore:
+    global _store
+    if _store is None:
+        _store = SensorStore(
+            chunk_size=int(os.environ.get("TEMS_SENSOR_CHUNK", "120")),
+            retention=float(os.environ.get("TEMS_SENSOR_RETENTION_DAYS", "90")) * 86400,
+            save_interval=float(os.environ.get("TEMS_SENSOR_SAVE_INTERVAL", "300")),
+        )
+    return _store
@@ -0,0 +1,238 @@
+"""
+Redfish TelemetryService sensor ingestion.
+
+BMCs that implement TelemetryService publish MetricReports: one document with
+every fan, temperature, power and PSU reading of the host (hundreds of
+``MetricValues``). ``fetch_metric_reports`` reads all reports of a host in a
+single ``$expand`` request when the service supports it, and
+``TelemetryStreams`` keeps an SSE connection per host open
+(``EventService.ServerSentEventUri`` filtered to MetricReport events) so
+readings arrive as the BMC produces them.
+
+Readings are kept numeric (``SensorSample``) instead of being rendered into
+log messages, and are published to ``pipeline`` sample sinks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+import http_pool
+import pipeline
+import redfish_discovery
+import redfish_session
+import sensor_store
+
+logger = logging.getLogger(__name__)
+
+METRIC_REPORT_FILTER = "EventFormatType eq 'MetricReport'"
+
+
+SensorSample = sensor_store.SensorSample
+
+
+def _parse_time(value: Optional[str], default: datetime) -> datetime:
+    if not value:
+        return default
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return default
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def _sensor_name(mv: Dict[str, Any]) -> Optional[str]:
+    prop = mv.get("MetricProperty")
+    if prop:
+        # "/redfish/v1/Chassis/1/Thermal#/Fans/0/Reading" -> "/Chassis/1/Thermal#/Fans/0/Reading"
+        root = redfish_discovery.REDFISH_ROOT
+        return prop[len(root):] if prop.startswith(root) else prop
+    metric_id = mv.get("MetricId")
+    # iDRAC reports carry the device (e.g. "Fan.Embedded.1A") in Oem.Dell.ContextID instead.
+    for oem in (mv.get("Oem") or {}).values():
+        if isinstance(oem, dict) and oem.get("ContextID") and metric_id:
+            return f"{oem['ContextID']}:{metric_id}"
+    return metric_id
+
+
+def parse_metric_report(report: Dict[str, Any], *, host: str) -> List[SensorSample]:
+    """Numeric ``MetricValues`` of one MetricReport; non-numeric values are skipped."""
+    default = _parse_time(report.get("Timestamp"), datetime.utcnow())
+    samples: List[SensorSample] = []
+    for mv in report.get("MetricValues") or []:
+        if not isinstance(mv, dict):
+            continue
+        name = _sensor_name(mv)
+        try:
+            value = float(mv.get("MetricValue"))
+        except (TypeError, ValueError):
+            continue
+        if name is None or value != value:  # skip unnamed and NaN readings
+            continue
+        samples.append(
+            SensorSample(timestamp=_parse_time(mv.get("Timestamp"), default), host=host, sensor=name, value=value)
+        )
+    return samples
+
+
+async def fetch_metric_reports(
+    host: str,
+    username: str,
+    password: str,
+    *,
+    pool: Optional[http_pool.ClientPool] = None,
+) -> List[SensorSample]:
+    """All current MetricReport readings of ``host``; empty if it has no TelemetryService."""
+    client = pool or http_pool.get_pool()
+    sessions = redfish_session.get_sessions()
+    info = await redfish_discovery.get_discovery().get(client, host, username=username, password=password)
+    link = (info.service_root.get("TelemetryService") or {}).get("@odata.id")
+    if not link:
+        return []
+    base = f"https://{host}{link.rstrip('/')}/MetricReports"
+    params = {"$expand": ".($levels=1)"} if info.features.expand else None
+    res = await sessions.get(client, base, username=username, password=password, params=params)
+    if res.status_code == 404:
+        return []
+    res.raise_for_status()
+    members = res.json().get("Members", [])
+    reports = [m for m in members if "MetricValues" in m]
+    missing = [m["@odata.id"] for m in members if "MetricValues" not in m and "@odata.id" in m]
+    if missing:
+        responses = await asyncio.gather(
+            *(sessions.get(client, f"https://{host}{path}", username=username, password=password) for path in missing)
+        )
+        reports.extend(r.json() for r in responses if r.status_code == 200)
+    return [sample for report in reports for sample in parse_metric_report(report, host=host)]
+
+
+async def _sse_documents(res: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    data: List[str] = []
+    async for line in res.aiter_lines():
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif not line and data:
+            try:
+                yield json.loads("\n".join(data))
+            except ValueError:
+                pass
+            data = []
+
+
+async def stream_metric_reports(
+    host: str,
+    username: str,
+    password: str,
+    *,
+    pool: Optional[http_pool.ClientPool] = None,
+) -> AsyncIterator[List[SensorSample]]:
+    """Yield the samples of each MetricReport pushed over the host's SSE stream.
+
+    The stream holds one connection for as long as it runs, so it bypasses the
+    pool's per-host request slots. A 401 when opening it re-authenticates through
+    ``redfish_session`` and reconnects once.
+    """
+    client = pool or http_pool.get_pool()
+    sessions = redfish_session.get_sessions()
+    res = await sessions.get(
+        client, f"https://{host}/redfish/v1/EventService", username=username, password=password
+    )
+    res.raise_for_status()
+    uri = res.json().get("ServerSentEventUri")
+    if not uri:
+        raise ValueError(f"{host} does not offer an SSE event stream")
+    url = uri if uri.startswith("http") else f"https://{host}{uri}"
+    tok = await sessions.token(client, host, username, password)
+    for retry in (True, False):
+        kwargs: Dict[str, Any] = {"headers": {"Accept": "text/event-stream"}, "timeout": httpx.Timeout(10.0, read=None)}
+        if tok is None:
+            kwargs["auth"] = (username, password)
+        else:
+            kwargs["headers"]["X-Auth-Token"] = tok.token
+        async with client.client.stream("GET", url, params={"$filter": METRIC_REPORT_FILTER}, **kwargs) as stream:
+            if stream.status_code == 401 and tok is not None and retry:
+                # Session expired or was dropped by the BMC: log in again (shared with other requests) once.
+                tok = await sessions.token(client, host, username, password, failed=tok)
+                continue
+            stream.raise_for_status()
+            async for doc in _sse_documents(stream):
+                if "MetricValues" in doc:
+                    yield parse_metric_report(doc, host=host)
+            return
+
+
+class TelemetryStreams:
+    """One background SSE reader per host, reconnecting with capped backoff."""
+
+    def __init__(self, *, max_backoff: float = 300.0) -> None:
+        self.max_backoff = max_backoff
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def _run(self, host: str, username: str, password: str) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async for samples in stream_metric_reports(host, username, password):
+                    delay = 1.0
+                    await pipeline.get_pipeline().publish_samples(samples, source="event")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("telemetry stream %s failed: %s", host, exc)
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, self.max_backoff)
+
+    def start(self, host: str, username: str, password: str) -> None:
+        task = self._tasks.get(host)
+        if task is not None and not task.done():
+            return
+        self._tasks[host] = asyncio.create_task(self._run(host, username, password))
+
+    def hosts(self) -> List[str]:
+        return [h for h, t in self._tasks.items() if not t.done()]
+
+    async def stop(self, host: str) -> None:
+        task = self._tasks.pop(host, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def stop_all(self) -> None:
+        tasks, self._tasks = list(self._tasks.values()), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_streams: Optional[TelemetryStreams] = None
+
+
+def get_streams() -> TelemetryStreams:
+    global _streams
+    if _streams is None:
+        _streams = TelemetryStreams(max_backoff=float(os.environ.get("TEMS_TELEMETRY_MAX_BACKOFF", "300")))
+    return _streams
+
+
+async def collect_many(
+    servers: List[Dict[str, str]], *, pool: Optional[http_pool.ClientPool] = None
+) -> List[Dict[str, Any]]:
+    """Fetch MetricReports from every server concurrently and publish the samples."""
+
+    async def one(s: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            samples = await fetch_metric_reports(s["bmc_host"], s["username"], s["password"], pool=pool)
+        except Exception as exc:
+            return {"bmc_host": s["bmc_host"], "samples": 0, "error": f"{type(exc).__name__}: {exc}"}
+        await pipeline.get_pipeline().publish_samples(samples, source="poll")
+        return {"bmc_host": s["bmc_host"], "samples": len(samples), "error": None}
+
+    return list(await asyncio.gather(*(one(s) for s in servers)))
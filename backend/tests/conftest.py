@@ -0,0 +1,69 @@
+"""
+Shared fixtures: the backend modules are imported flat (as ``app.main`` does),
+and every test gets its own state directory and fresh module singletons.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+import bmc_health  # noqa: E402
+import capabilities  # noqa: E402
+import events  # noqa: E402
+import http_pool  # noqa: E402
+import ipmi_shell  # noqa: E402
+import log_cursor  # noqa: E402
+import log_segments  # noqa: E402
+import log_store  # noqa: E402
+import pipeline  # noqa: E402
+import redfish_discovery  # noqa: E402
+import redfish_session  # noqa: E402
+import sdr_cache  # noqa: E402
+import sensor_store  # noqa: E402
+import telemetry  # noqa: E402
+
+SINGLETONS = [
+    (bmc_health, "_registry"),
+    (capabilities, "_store"),
+    (events, "_subscriptions"),
+    (http_pool, "_pool"),
+    (ipmi_shell, "_pool"),
+    (log_cursor, "_store"),
+    (log_segments, "_store"),
+    (log_store, "_store"),
+    (pipeline, "_pipeline"),
+    (redfish_discovery, "_cache"),
+    (redfish_session, "_sessions"),
+    (sdr_cache, "_cache"),
+    (sensor_store, "_store"),
+    (telemetry, "_streams"),
+]
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    state = tmp_path / "state"
+    for name, value in {
+        "TEMS_CURSOR_PATH": state / "cursors.json",
+        "TEMS_PROFILE_PATH": state / "profiles.json",
+        "TEMS_LOG_DB": state / "logs.db",
+        "TEMS_SEGMENT_DIR": state / "segments",
+        "TEMS_SENSOR_PATH": state / "sensors.bin",
+        "TEMS_SDR_DIR": state / "sdr",
+    }.items():
+        monkeypatch.setenv(name, str(value))
+    for module, attr in SINGLETONS:
+        monkeypatch.setattr(module, attr, None)
+    return state
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
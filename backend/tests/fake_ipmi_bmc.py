@@ -0,0 +1,194 @@
+"""
+Loopback UDP BMC speaking the RMCP+ side of IPMI v2.0, written from the spec
+rather than from ``ipmi_lan`` so the two check each other.
+
+It answers Open Session, RAKP 1/3, Set Session Privilege, Close Session, Get
+SEL Info and Get SEL Entry. In-session packets are verified and signed with
+K1 and, for suites with confidentiality, AES-CBC-128 encrypted with K2.
+Packets that fail the integrity check are dropped, as a real BMC would.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import os
+import struct
+from typing import List, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+SUITES = {1: (1, 0, 0), 2: (1, 1, 0), 3: (1, 1, 1), 15: (3, 0, 0), 16: (3, 4, 0), 17: (3, 4, 1)}
+HASHES = {1: hashlib.sha1, 3: hashlib.sha256}
+INTEGRITY = {1: (hashlib.sha1, 12), 4: (hashlib.sha256, 16)}
+RAKP4_ICV = {1: 12, 3: 16}
+
+
+def sel_record(record_id: int, timestamp: int, *, sensor_type: int = 0x08, sensor: int = 0x41) -> bytes:
+    """A 16-byte system event record (PSU presence-style event by default)."""
+    return struct.pack("<HBIHBBBBBBB", record_id, 0x02, timestamp, 0x0020, 0x04, sensor_type, sensor, 0x6F, 0x01, 0xFF, 0xFF)
+
+
+def _mac(hash_fn, key: bytes, data: bytes) -> bytes:
+    return hmac.new(key, data, hash_fn).digest()
+
+
+def _checksum(data: bytes) -> int:
+    return (-sum(data)) & 0xFF
+
+
+class FakeIpmiBmc(asyncio.DatagramProtocol):
+    def __init__(self, *, username: str = "admin", password: str = "secret", suites=(3, 17)) -> None:
+        self.username = username.encode()
+        self.password = password.encode()
+        self.suites = set(suites)
+        self.records: List[bytes] = []
+        self.last_add = 0x6500_0000
+        self.last_erase = 0x6400_0000
+        self.received: List[bytes] = []
+        self.sent: List[bytes] = []
+        self.corrupt = False  # flip a bit in every in-session response
+        self.closed = False
+        self.port = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sid = 0x0A0B0C0D
+        self._console_sid = 0
+        self._algs = (0, 0, 0)
+        self._rm = self._rc = b""
+        self._role = 0
+        self._guid = os.urandom(16)
+        self._k1 = self._k2 = b""
+        self._seq = 0
+        self.active = False
+
+    async def start(self) -> "FakeIpmiBmc":
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=("127.0.0.1", 0))
+        self.port = self._transport.get_extra_info("sockname")[1]
+        return self
+
+    def stop(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    # -- framing -----------------------------------------------------------
+
+    def _send(self, addr: Tuple[str, int], ptype: int, payload: bytes, *, session: bool = False) -> None:
+        _, integrity, conf = self._algs
+        encrypted, signed = session and bool(conf), session and bool(integrity)
+        if encrypted:
+            iv = os.urandom(16)
+            pad = (16 - (len(payload) + 1) % 16) % 16
+            enc = Cipher(algorithms.AES(self._k2), modes.CBC(iv)).encryptor()
+            payload = iv + enc.update(payload + bytes(range(1, pad + 1)) + bytes([pad])) + enc.finalize()
+        if session:
+            self._seq += 1
+        flags = (0x80 if encrypted else 0) | (0x40 if signed else 0)
+        body = struct.pack(
+            "<BBIIH", 0x06, ptype | flags, self._console_sid if session else 0, self._seq if session else 0, len(payload)
+        ) + payload
+        if signed:
+            pad = (4 - (len(body) + 2) % 4) % 4
+            body += b"\xff" * pad + bytes([pad, 0x07])
+            hash_fn, length = INTEGRITY[integrity]
+            body += _mac(hash_fn, self._k1, body)[:length]
+            if self.corrupt:
+                body = body[:-1] + bytes([body[-1] ^ 0x01])
+        packet = b"\x06\x00\xff\x07" + body
+        self.sent.append(packet)
+        assert self._transport is not None
+        self._transport.sendto(packet, addr)
+
+    def datagram_received(self, packet: bytes, addr: Tuple[str, int]) -> None:
+        self.received.append(packet)
+        ptype, plen = packet[5], struct.unpack_from("<H", packet, 14)[0]
+        payload = packet[16 : 16 + plen]
+        if ptype & 0x40:
+            hash_fn, length = INTEGRITY[self._algs[1]]
+            if not hmac.compare_digest(_mac(hash_fn, self._k1, packet[4:-length])[:length], packet[-length:]):
+                return  # drop, like a BMC would
+        elif self.active and self._algs[1]:
+            return  # unsigned packet in an integrity-protected session
+        if ptype & 0x80:
+            dec = Cipher(algorithms.AES(self._k2), modes.CBC(payload[:16])).decryptor()
+            data = dec.update(payload[16:]) + dec.finalize()
+            payload = data[: -1 - data[-1]]
+        handler = {0x10: self._open_session, 0x12: self._rakp1, 0x14: self._rakp3, 0x00: self._ipmi}.get(ptype & 0x3F)
+        if handler is not None:
+            handler(addr, payload)
+
+    # -- session setup -----------------------------------------------------
+
+    def _open_session(self, addr: Tuple[str, int], req: bytes) -> None:
+        self.closed = False
+        tag, self._console_sid = req[0], struct.unpack_from("<I", req, 4)[0]
+        algs = (req[12], req[20], req[28])
+        suite = next((s for s, a in SUITES.items() if a == algs), None)
+        status = 0 if suite in self.suites else 0x11  # no matching integrity/confidentiality
+        self._algs = algs
+        rsp = struct.pack("<BBBxII", tag, status, 0x04, self._console_sid, self._sid) + req[12:36]
+        self._send(addr, 0x11, rsp)
+
+    def _user(self) -> bytes:
+        return bytes([self._role, len(self.username)]) + self.username
+
+    def _rakp1(self, addr: Tuple[str, int], req: bytes) -> None:
+        tag, self._rm, self._role = req[0], req[8:24], req[24]
+        name = req[28 : 28 + req[27]]
+        self._rc = os.urandom(16)
+        hash_fn = HASHES[self._algs[0]]
+        if name != self.username:
+            self._send(addr, 0x13, struct.pack("<BBxxI", tag, 0x0D, self._console_sid))
+            return
+        code = _mac(
+            hash_fn,
+            self.password,
+            struct.pack("<II", self._console_sid, self._sid) + self._rm + self._rc + self._guid + self._user(),
+        )
+        self._send(addr, 0x13, struct.pack("<BBxxI", tag, 0, self._console_sid) + self._rc + self._guid + code)
+
+    def _rakp3(self, addr: Tuple[str, int], req: bytes) -> None:
+        tag = req[0]
+        hash_fn = HASHES[self._algs[0]]
+        expected = _mac(hash_fn, self.password, self._rc + struct.pack("<I", self._console_sid) + self._user())
+        if not hmac.compare_digest(req[8:], expected):
+            self._send(addr, 0x15, struct.pack("<BBxxI", tag, 0x0F, self._console_sid))  # invalid integrity check
+            return
+        sik = _mac(hash_fn, self.password, self._rm + self._rc + self._user())
+        size = hash_fn().digest_size
+        self._k1 = _mac(hash_fn, sik, b"\x01" * size)
+        self._k2 = _mac(hash_fn, sik, b"\x02" * size)[:16]
+        icv = _mac(hash_fn, sik, self._rm + struct.pack("<I", self._sid) + self._guid)[: RAKP4_ICV[self._algs[0]]]
+        self._send(addr, 0x15, struct.pack("<BBxxI", tag, 0, self._console_sid) + icv)
+        self.active = True
+
+    # -- commands ----------------------------------------------------------
+
+    def _ipmi(self, addr: Tuple[str, int], msg: bytes) -> None:
+        if not self.active:
+            return
+        netfn, seq, cmd, data = msg[1] >> 2, msg[4], msg[5], msg[6:-1]
+        cc, out = 0, b""
+        if (netfn, cmd) == (0x06, 0x3B):  # Set Session Privilege Level
+            out = data[:1]
+        elif (netfn, cmd) == (0x06, 0x3C):  # Close Session
+            self.closed = True
+        elif (netfn, cmd) == (0x0A, 0x40):  # Get SEL Info
+            out = struct.pack("<BHHIIB", 0x51, len(self.records), 0x1000, self.last_add, self.last_erase, 0x02)
+        elif (netfn, cmd) == (0x0A, 0x43):  # Get SEL Entry
+            record_id = struct.unpack_from("<H", data, 2)[0]
+            ids = [struct.unpack_from("<H", r)[0] for r in self.records]
+            index = 0 if record_id == 0 and ids else ids.index(record_id) if record_id in ids else None
+            if index is None:
+                cc = 0xCB
+            else:
+                following = ids[index + 1] if index + 1 < len(ids) else 0xFFFF
+                out = struct.pack("<H", following) + self.records[index]
+        else:
+            cc = 0xC1  # invalid command
+        head = bytes([0x81, ((netfn + 1) << 2) | (msg[1] & 0x03)])
+        body = bytes([0x20, seq, cmd, cc]) + out
+        self._send(addr, 0x00, head + bytes([_checksum(head)]) + body + bytes([_checksum(body)]), session=True)
+        if self.closed:
+            self.active, self._seq = False, 0
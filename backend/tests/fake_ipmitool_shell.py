@@ -0,0 +1,37 @@
+"""
+Stand-in for ``ipmitool ... shell``: reads commands from stdin like the real
+shell and answers the few the tests need.
+
+``echo`` prints its argument, an unknown command prints "Invalid command:
+<name>" on stderr (as ipmitool does), ``sel elist`` prints two records,
+``fail`` prints only an error, ``sleep <s>`` takes that long, and ``exit``
+quits.
+"""
+
+import sys
+import time
+
+
+def main() -> None:
+    for line in sys.stdin:
+        name, _, arg = line.strip().partition(" ")
+        if name == "exit":
+            return
+        if name == "echo":
+            print(arg)
+        elif line.strip() == "sel elist":
+            print("1 | 09/13/2024 | 12:34:56 | Power Supply PSU1 | Presence detected | Asserted")
+            print("2 | 09/13/2024 | 12:35:02 | Power Supply PSU1 | Failure detected | Asserted")
+        elif name == "fail":
+            print("Error: Unable to get SEL Info", file=sys.stderr)
+        elif name == "sleep":
+            time.sleep(float(arg))
+            print("slept")
+        elif name:
+            print(f"Invalid command: {name}", file=sys.stderr)
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+In-process fake Redfish BMC served through ``httpx.MockTransport``.
+
+It implements what collection touches: SessionService login/logout, the
+ServiceRoot -> Systems -> LogServices walk and paged log ``Entries`` (nextLink
+pages, or ``$top``/``$skip`` when ``top_skip`` is advertised), EventService
+subscriptions and an SSE stream of ``sse_reports``. Tests can make a path
+answer 401 once (dropping every session, as a BMC restart would), or hold a
+path until an ``asyncio.Event`` is set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+import http_pool
+
+ROOT = "/redfish/v1"
+ENTRIES = f"{ROOT}/Systems/1/LogServices/SEL/Entries"
+SUBSCRIPTIONS = f"{ROOT}/EventService/Subscriptions"
+SSE = f"{ROOT}/EventService/SSE"
+
+
+def entry(n: int, *, severity: str = "OK", message: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "@odata.id": f"{ENTRIES}/{n}",
+        "Id": str(n),
+        "Created": f"2026-01-01T00:00:{n:02d}Z",
+        "Severity": severity,
+        "Message": message or f"entry {n}",
+    }
+
+
+class FakeRedfish:
+    def __init__(self, *, page_size: int = 2, session_timeout: Optional[int] = None, top_skip: bool = False) -> None:
+        self.entries: List[Dict[str, Any]] = []
+        self.page_size = page_size
+        self.top_skip = top_skip
+        self.missing_root = False  # no Redfish service: the service root answers 404
+        self.session_timeout = session_timeout
+        self.sessions: Dict[str, str] = {}  # token -> session path
+        self.logins = 0
+        self.deleted: List[str] = []
+        self.requests: List[httpx.Request] = []
+        self.hold: Dict[str, asyncio.Event] = {}  # "path?query" -> released when set
+        self.reject_once: set[str] = set()  # paths that answer the next request with 401
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}  # path -> subscription body
+        self.sse_reports: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+
+    def pool(self) -> http_pool.ClientPool:
+        """A client pool whose requests are answered by this fake."""
+        pool = http_pool.ClientPool()
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        return pool
+
+    def expire_sessions(self) -> None:
+        """Forget every session, so the next request with a cached token gets 401."""
+        self.sessions.clear()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        key = f"{path}?{request.url.query.decode()}" if request.url.query else path
+        if key in self.hold:
+            await self.hold[key].wait()
+        if path == f"{ROOT}/SessionService/Sessions" and request.method == "POST":
+            self.logins += 1
+            token = f"tok{next(self._ids)}"
+            location = f"{ROOT}/SessionService/Sessions/{token}"
+            self.sessions[token] = location
+            return httpx.Response(201, headers={"X-Auth-Token": token, "Location": location}, json={})
+        if path == f"{ROOT}/SessionService":
+            body: Dict[str, Any] = {"Sessions": {"@odata.id": f"{ROOT}/SessionService/Sessions"}}
+            if self.session_timeout is not None:
+                body["SessionTimeout"] = self.session_timeout
+            return httpx.Response(200, json=body)
+        token = request.headers.get("X-Auth-Token")
+        if path in self.reject_once:
+            self.reject_once.discard(path)
+            self.expire_sessions()
+        if token not in self.sessions:
+            return httpx.Response(401, json={})
+        if request.method == "DELETE" and path.startswith(f"{ROOT}/SessionService/Sessions/"):
+            self.deleted.append(path)
+            self.sessions = {t: p for t, p in self.sessions.items() if p != path}
+            return httpx.Response(204)
+        if path.rstrip("/") == ROOT and self.missing_root:
+            return httpx.Response(404, json={})
+        if path == ROOT:
+            root: Dict[str, Any] = {
+                "RedfishVersion": "1.6.0",
+                "Systems": {"@odata.id": f"{ROOT}/Systems"},
+                "SessionService": {"@odata.id": f"{ROOT}/SessionService"},
+            }
+            if self.top_skip:
+                root["ProtocolFeaturesSupported"] = {"TopSkipQuery": True}
+            return httpx.Response(200, json=root)
+        if path == f"{ROOT}/Systems":
+            return httpx.Response(200, json={"Members": [{"@odata.id": f"{ROOT}/Systems/1"}]})
+        if path == f"{ROOT}/Systems/1/LogServices":
+            return httpx.Response(200, json={"Members": [{"@odata.id": f"{ROOT}/Systems/1/LogServices/SEL"}]})
+        if path == ENTRIES and self.top_skip and "$top" in request.url.params:
+            skip, top = int(request.url.params.get("$skip", "0")), int(request.url.params["$top"])
+            return httpx.Response(
+                200, json={"Members@odata.count": len(self.entries), "Members": self.entries[skip : skip + top]}
+            )
+        if path == ENTRIES:
+            page = int(request.url.params.get("page", "1"))
+            start = (page - 1) * self.page_size
+            body = {
+                "Members@odata.count": len(self.entries),
+                "Members": self.entries[start : start + self.page_size],
+            }
+            if start + self.page_size < len(self.entries):
+                body["Members@odata.nextLink"] = f"{ENTRIES}?page={page + 1}"
+            return httpx.Response(200, json=body)
+        if path == f"{ROOT}/EventService":
+            return httpx.Response(200, json={"ServerSentEventUri": SSE, "Subscriptions": {"@odata.id": SUBSCRIPTIONS}})
+        if path == SUBSCRIPTIONS and request.method == "POST":
+            location = f"{SUBSCRIPTIONS}/{next(self._ids)}"
+            self.subscriptions[location] = json.loads(request.content)
+            return httpx.Response(201, headers={"Location": location}, json={})
+        if path == SUBSCRIPTIONS:
+            return httpx.Response(200, json={"Members": [{"@odata.id": p} for p in self.subscriptions]})
+        if path in self.subscriptions:
+            if request.method == "DELETE":
+                del self.subscriptions[path]
+                return httpx.Response(204)
+            return httpx.Response(200, json=self.subscriptions[path])
+        if path == SSE:
+            body = "".join(f"data: {json.dumps(report)}\n\n" for report in self.sse_reports)
+            return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, text=body)
+        return httpx.Response(404, json={})
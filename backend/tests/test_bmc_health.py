@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import bmc_health
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(bmc_health.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(bmc_health.random, "uniform", lambda lo, hi: 1.0)
+    return now
+
+
+def fail(health: bmc_health.HealthRegistry, n: int = 1) -> None:
+    for _ in range(n):
+        health.record_failure("bmc1", "redfish", OSError("connect timeout"))
+
+
+async def test_breaker_opens_backs_off_and_probes_once(clock):
+    health = bmc_health.HealthRegistry(failure_threshold=3, base_backoff=30, max_backoff=100)
+    fail(health, 2)
+    assert health.allow("bmc1", "redfish")
+    fail(health)
+    assert health.breaker("bmc1", "redfish").state == bmc_health.OPEN
+    assert not health.allow("bmc1", "redfish")
+    assert health.retry_after("bmc1", "redfish") == 30
+
+    clock[0] += 30
+    assert health.allow("bmc1", "redfish")  # the half-open probe
+    assert not health.allow("bmc1", "redfish")  # only one at a time
+    fail(health)  # a failed probe re-opens with twice the backoff
+    assert health.retry_after("bmc1", "redfish") == 60
+
+    clock[0] += 60
+    assert health.allow("bmc1", "redfish")
+    fail(health)
+    assert health.retry_after("bmc1", "redfish") == 100  # capped
+
+    clock[0] += 100
+    assert health.allow("bmc1", "redfish")
+    health.record_success("bmc1", "redfish")
+    b = health.breaker("bmc1", "redfish")
+    assert (b.state, b.failures, b.opens) == (bmc_health.CLOSED, 0, 0)
+    assert health.allow("bmc1", "ipmi")  # protocols are tracked separately
+
+
+async def test_track_ignores_the_callers_own_deadline(clock):
+    health = bmc_health.HealthRegistry(failure_threshold=1)
+    with pytest.raises(asyncio.TimeoutError):
+        async with health.track("bmc1", "redfish"):
+            raise asyncio.TimeoutError
+    assert health.breaker("bmc1", "redfish").state == bmc_health.CLOSED
+
+    with pytest.raises(OSError):
+        async with health.track("bmc1", "redfish"):
+            raise OSError("connection refused")
+    assert health.breaker("bmc1", "redfish").state == bmc_health.OPEN
+    assert health.snapshot()["bmc1"]["redfish"]["last_error"] == "OSError: connection refused"
+
+
+def test_hedge_delay_is_the_learned_percentile():
+    health = bmc_health.HealthRegistry(hedge_percentile=95, hedge_default=2.0)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        health.observe_latency("bmc1", "redfish", seconds)
+    assert health.hedge_delay("bmc1", "redfish") == 2.0  # too few samples yet
+    for seconds in (0.5, 0.6, 0.7, 0.8, 0.9, 5.0):
+        health.observe_latency("bmc1", "redfish", seconds)
+    assert health.hedge_delay("bmc1", "redfish") == 5.0
+
+    health.record_winner("bmc1", "ipmi")
+    assert health.order("bmc1", ["redfish", "ipmi"]) == ["ipmi", "redfish"]
+    assert health.order("bmc2", ["redfish", "ipmi"]) == ["redfish", "ipmi"]
+
+
+async def test_aimd_limit_grows_slowly_and_halves_on_overload():
+    limiter = bmc_health.AimdLimiter(initial=2, maximum=4)
+    for _ in range(4):
+        limiter.on_success()
+    before = limiter.limit
+    assert 3 < before < 4  # about +1 per round of requests
+    limiter.on_overload()
+    assert limiter.limit == before / 2
+    for _ in range(10):
+        limiter.on_overload()
+    assert limiter.limit == limiter.minimum
+
+    inside = []
+
+    async def request() -> None:
+        async with limiter.slot():
+            inside.append(limiter.inflight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(5)))
+    assert max(inside) == 1
+    assert limiter.inflight == 0
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+import bmc_health
+import capabilities
+import collector
+import http_pool
+import log_cursor
+from fake_redfish import ENTRIES, FakeRedfish, entry
+
+pytestmark = pytest.mark.anyio
+
+HOST = "bmc1"
+
+
+@pytest.fixture
+def bmc() -> FakeRedfish:
+    fake = FakeRedfish(page_size=2)
+    fake.entries = [entry(n) for n in range(1, 5)]
+    http_pool.set_pool(fake.pool())
+    return fake
+
+
+def fake_ipmi(calls: list):
+    async def fetch(bmc_host, username, password, vendor, *, cursors=None, **kwargs):
+        calls.append(cursors)
+        if cursors is not None:
+            cursors.get_sel(bmc_host).last_id = 7
+        return [
+            collector.normalize_log(
+                timestamp=datetime(2026, 1, 1), host=bmc_host, vendor=vendor, service="ipmi",
+                severity="OK", message="from ipmi", record_id="sel:7",
+            )
+        ]
+
+    return fetch
+
+
+async def test_hedge_loser_entries_are_fetched_on_next_poll(bmc, monkeypatch):
+    calls: list = []
+    monkeypatch.setattr(collector, "fetch_ipmi_logs", fake_ipmi(calls))
+    bmc_health.get_health().hedge_default = 0.05
+    bmc.hold[f"{ENTRIES}?page=2"] = release = asyncio.Event()
+
+    # Redfish reads page 1 (entries 1-2), stalls on page 2, and loses the race to IPMI.
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p", hedge=True)
+    assert result.protocol == "ipmi"
+    assert [r.message for r in result.logs] == ["from ipmi"]
+    assert result.sources["redfish"] == collector.CANCELLED
+
+    # Only the winner's cursors were committed.
+    store = log_cursor.get_cursors()
+    assert store.get_sel(HOST).last_id == 7
+    assert store.get(HOST, "/Systems/1/LogServices/SEL/Entries").created is None
+
+    release.set()
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p")
+    assert result.protocol == "redfish"
+    assert [r.record_id.rsplit("/", 1)[1] for r in result.logs] == ["1", "2", "3", "4"]
+
+    # The winning Redfish poll moved the cursor: nothing is fetched twice.
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p")
+    assert len(result.logs) == 0
+
+
+async def test_sink_gets_each_page_as_it_is_read(bmc):
+    bmc.entries = [entry(n) for n in range(1, 6)]
+    pages: list = []
+
+    async def sink(batch):
+        pages.append([r.record_id.rsplit("/", 1)[1] for r in batch])
+
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p", sink=sink)
+    assert pages == [["1", "2"], ["3", "4"], ["5"]]
+    assert len(result.logs) == 0 and result.streamed == 5
+
+
+async def test_iter_redfish_logs_yields_one_batch_per_page(bmc):
+    pages = [len(batch) async for batch in collector.iter_redfish_logs(HOST, "u", "p", "dell")]
+    assert pages == [2, 2]
+
+
+async def test_standalone_fetch_commits_its_own_cursor(bmc):
+    logs = await collector.fetch_redfish_logs(HOST, "u", "p", "dell")
+    assert len(logs) == 4
+    assert log_cursor.get_cursors().get(HOST, "/Systems/1/LogServices/SEL/Entries").created is not None
+    assert await collector.fetch_redfish_logs(HOST, "u", "p", "dell") == []
+
+
+async def test_failed_collection_returns_no_made_up_logs(bmc, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise collector.IpmiError("ipmitool failed: unable to establish session")
+
+    bmc.entries = []
+    monkeypatch.setattr(collector, "fetch_ipmi_logs", broken)
+    monkeypatch.setattr(collector, "fetch_redfish_logs", broken)
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p")
+    assert result.sources == {"redfish": collector.ERROR, "ipmi": collector.ERROR}
+    assert len(result.logs) == 0 and result.protocol is None
+
+
+async def test_ipmi_deadline_expiry_trips_the_breaker(monkeypatch):
+    async def hung(args, *, timeout=None, input=None):
+        await asyncio.sleep(timeout)
+        raise collector.IpmiTimeout(f"ipmitool timed out after {timeout:g}s")
+
+    monkeypatch.setattr(collector, "run_ipmitool", hung)
+    health = bmc_health.get_health()
+    for _ in range(health.failure_threshold):
+        result = await collector.collect(
+            vendor="dell", bmc_host=HOST, username="u", password="p", prefer_redfish=False, ipmi_shell=False, timeout=0.05
+        )
+        assert result.sources == {"ipmi": collector.TIMEOUT}
+    assert health.breaker(HOST, "ipmi").state == bmc_health.OPEN
+    with pytest.raises(bmc_health.CircuitOpen):
+        await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p", prefer_redfish=False)
+
+
+async def test_redfish_timeout_is_a_failure_not_a_success(bmc):
+    bmc.hold[ENTRIES] = asyncio.Event()
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p", timeout=0.1)
+    assert result.sources["redfish"] == collector.TIMEOUT
+    assert bmc_health.get_health().breaker(HOST, "redfish").failures == 1
+
+
+async def test_timeouts_do_not_mark_a_protocol_unsupported(bmc):
+    bmc.hold[ENTRIES] = asyncio.Event()
+    bmc_health.get_health().failure_threshold = 100
+    profiles = capabilities.get_profiles()
+    for _ in range(profiles.failure_threshold):
+        result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p", timeout=0.05)
+        assert result.sources["redfish"] == collector.TIMEOUT
+    assert profiles.get(HOST).redfish is None and profiles.usable(HOST, "redfish")
+
+
+async def test_missing_service_root_marks_redfish_unsupported(monkeypatch):
+    fake = FakeRedfish()
+    http_pool.set_pool(fake.pool())
+    monkeypatch.setattr(collector, "fetch_ipmi_logs", fake_ipmi([]))
+    fake.missing_root = True
+    profiles = capabilities.get_profiles()
+    for _ in range(profiles.failure_threshold):
+        await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p")
+    assert profiles.get(HOST).redfish is False and not profiles.usable(HOST, "redfish")
+async def test_failed_redfish_service_makes_the_result_partial(monkeypatch):
+    async def one_service_failed(*args, status, **kwargs):
+        status.update({"/LogServices/SEL/Entries": collector.COMPLETE, "/LogServices/Lclog/Entries": collector.ERROR})
+        return []
+
+    monkeypatch.setattr(collector, "fetch_redfish_logs", one_service_failed)
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p")
+    assert result.sources == {"redfish": collector.PARTIAL}
+    assert not result.complete
+
+
+async def test_top_pages_without_next_link(monkeypatch):
+    fake = FakeRedfish(top_skip=True)
+    fake.entries = [entry(n) for n in range(1, 8)]
+    http_pool.set_pool(fake.pool())
+    monkeypatch.setattr(collector, "REDFISH_TOP", 3)
+    logs = await collector.fetch_redfish_logs(HOST, "u", "p", "dell")
+    assert [r.record_id.rsplit("/", 1)[1] for r in logs] == [str(n) for n in range(1, 8)]
+    pages = [dict(r.url.params) for r in fake.requests if r.url.path == ENTRIES]
+    assert pages == [{"$top": "3"}, {"$top": "3", "$skip": "3"}, {"$top": "3", "$skip": "6"}]
+
+
+async def test_cut_off_newest_first_read_keeps_the_older_entries():
+    fake = FakeRedfish(page_size=2)
+    fake.entries = [entry(n) for n in range(10, 0, -1)]
+    http_pool.set_pool(fake.pool())
+    fake.hold[f"{ENTRIES}?page=2"] = release = asyncio.Event()
+
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p", timeout=0.2)
+    assert result.sources == {"redfish": collector.PARTIAL}
+    assert [r.record_id.rsplit("/", 1)[1] for r in result.logs] == ["10", "9"]
+
+    release.set()
+    result = await collector.collect(vendor="dell", bmc_host=HOST, username="u", password="p")
+    assert [r.record_id.rsplit("/", 1)[1] for r in result.logs] == [str(n) for n in range(10, 0, -1)]
+
+
+@pytest.mark.parametrize(
+    "event, severity",
+    [
+        ("Power Supply PSU1 | Presence detected | Asserted", collector.Severity.INFO),
+        ("Power Supply PSU1 | Failure detected | Asserted", collector.Severity.CRITICAL),
+        ("Power Supply PSU1 | Failure detected | Deasserted", collector.Severity.INFO),
+        ("Memory DIMM_A1 | Correctable ECC | Asserted", collector.Severity.WARN),
+        ("Drive Slot Bay0 | Drive Present | Asserted", collector.Severity.INFO),
+        ("Temperature CPU1 | Upper Critical going high | Asserted", collector.Severity.CRITICAL),
+        ("OEM 0xC0 | Vendor thing | Asserted", collector.Severity.INFO),
+    ],
+)
+def test_elist_severity_comes_from_the_event_not_the_direction(event, severity):
+    logs = collector.parse_ipmi_sel(f"7 | 09/13/2024 | 12:35:02 | {event}", host="bmc1", vendor="supermicro")
+    assert [log.severity for log in logs] == [severity]
+
+
+def test_elist_message_keeps_the_sensor_name():
+    (log,) = collector.parse_ipmi_sel(
+        "7 | 09/13/2024 | 12:35:02 | Power Supply PSU1 | Failure detected | Asserted", host="bmc1", vendor="dell"
+    )
+    assert log.message == "Power Supply PSU1 | Failure detected | Asserted"
+
+
+def python(code: str) -> list:
+    return [sys.executable, "-c", code]
+
+
+async def test_run_ipmitool_returns_stdout_and_feeds_stdin():
+    out = await collector.run_ipmitool(python("import sys; print(sys.stdin.read().upper())"), input="sel info\n")
+    assert out == "SEL INFO\n\n"
+
+
+async def test_run_ipmitool_raises_with_stderr_on_failure():
+    with pytest.raises(collector.IpmiError) as err:
+        await collector.run_ipmitool(python("import sys; sys.stderr.write('Unable to establish IPMI v2 session'); sys.exit(1)"))
+    assert (err.value.returncode, err.value.stderr) == (1, "Unable to establish IPMI v2 session")
+
+
+async def test_run_ipmitool_kills_a_hung_process():
+    started = time.monotonic()
+    with pytest.raises(collector.IpmiTimeout) as err:
+        await collector.run_ipmitool(python("import time; time.sleep(30)"), timeout=0.2)
+    assert time.monotonic() - started < 5
+    assert err.value.returncode is not None  # reaped, not left running
+
+
+ADD, DEL = "10/01/2026 12:00:00", "09/01/2026 08:00:00"
+
+
+@pytest.mark.parametrize(
+    "cursor, info, plan",
+    [
+        # First poll: read everything.
+        (log_cursor.SelCursor(), {"Entries": "40"}, ("sel elist", None)),
+        (log_cursor.SelCursor(), {"Entries": "0"}, (None, None)),
+        # Unchanged since the last poll: skip the read.
+        (log_cursor.SelCursor(0x28, 40, ADD, DEL), {"Entries": "40", "Last Add Time": ADD, "Last Del Time": DEL}, (None, 0x28)),
+        # New records: read only the tail.
+        (
+            log_cursor.SelCursor(0x28, 40, ADD, DEL),
+            {"Entries": "43", "Last Add Time": "10/01/2026 12:05:00", "Last Del Time": DEL},
+            ("sel elist last 3", 0x28),
+        ),
+        # Full SEL wrapped: same count, newer add time.
+        (
+            log_cursor.SelCursor(0x28, 40, ADD, DEL),
+            {"Entries": "40", "Last Add Time": "10/01/2026 12:05:00", "Last Del Time": DEL},
+            ("sel elist", 0x28),
+        ),
+        # Cleared: ids restart, resync from scratch.
+        (
+            log_cursor.SelCursor(0x28, 40, ADD, DEL),
+            {"Entries": "2", "Last Add Time": "10/01/2026 12:05:00", "Last Del Time": "10/01/2026 12:01:00"},
+            ("sel elist", None),
+        ),
+        (log_cursor.SelCursor(0x28, 40, ADD, DEL), {"Entries": "0", "Last Add Time": ADD, "Last Del Time": ADD}, (None, None)),
+        # Unreadable sel info: read everything, still cut off at the cursor.
+        (log_cursor.SelCursor(0x28, 40, ADD, DEL), {}, ("sel elist", 0x28)),
+    ],
+)
+def test_plan_sel_read(cursor, info, plan):
+    assert collector._plan_sel_read(cursor, info) == plan
+    if plan == ("sel elist", None) and cursor.entries is not None:
+        assert cursor.last_id is None  # the resync forgets the old cut-off
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+import collector
+import http_pool
+import log_batch
+import log_store
+from fake_redfish import FakeRedfish
+
+SERVER = {"vendor": "dell", "bmc_host": "bmc1", "username": "u", "password": "p"}
+EVENT = {
+    "EventId": "4711",
+    "EventTimestamp": "2026-10-01T12:00:00Z",
+    "MessageSeverity": "Critical",
+    "Message": "PSU1 input lost",
+    "OriginOfCondition": {"@odata.id": "/redfish/v1/Chassis/1/Power"},
+}
+
+
+@pytest.fixture
+def bmc(monkeypatch) -> FakeRedfish:
+    fake = FakeRedfish()
+    monkeypatch.setattr(http_pool.ClientPool, "from_env", classmethod(lambda cls: fake.pool()))
+    monkeypatch.setenv("TEMS_EVENT_BASE_URL", "http://tems.test")
+    return fake
+
+
+@pytest.fixture
+def api(bmc):
+    from app import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+def subscribe(api, bmc) -> str:
+    res = api.post("/api/events/subscribe", json={"servers": [SERVER]})
+    assert res.json()["subscriptions"][0]["subscribed"] is True
+    (sub,) = bmc.subscriptions.values()
+    return urlsplit(sub["Destination"]).path
+
+
+def test_pushed_event_reaches_pipeline_and_store(api, bmc):
+    path = subscribe(api, bmc)
+    assert api.post(path, json={"Events": [EVENT]}).status_code == 204
+
+    (recent,) = api.get("/api/logs/recent").json()["logs"]
+    assert (recent["host"], recent["message"]) == ("bmc1", "PSU1 input lost")
+    stored = api.get("/api/logs", params={"host": "bmc1", "severity": "critical"}).json()
+    assert [log["message"] for log in stored["logs"]] == ["PSU1 input lost"]
+
+    # A BMC retrying the same push does not store the event twice.
+    assert api.post(path, json={"Events": [EVENT]}).status_code == 204
+    assert api.get("/api/logs", params={"host": "bmc1"}).json()["count"] == 1
+
+
+def test_unknown_context_is_rejected(api, bmc):
+    subscribe(api, bmc)
+    assert api.post("/api/events/not-a-context", json={"Events": [EVENT]}).status_code == 404
+    assert api.get("/api/logs/recent").json()["count"] == 0
+
+
+def test_shutdown_deletes_subscriptions(bmc):
+    from app import main
+
+    with TestClient(main.app) as api:
+        subscribe(api, bmc)
+    assert bmc.subscriptions == {}
+
+
+def test_inventory_hosts_are_subscribed_on_startup(bmc, monkeypatch, tmp_path):
+    from app import main
+
+    inventory = tmp_path / "inventory.json"
+    inventory.write_text(json.dumps([SERVER]))
+    monkeypatch.setenv("TEMS_FLEET_INVENTORY", str(inventory))
+    monkeypatch.setenv("TEMS_FLEET_INTERVAL", "3600")
+    with TestClient(main.app) as api:
+        for _ in range(100):
+            if bmc.subscriptions:
+                break
+            time.sleep(0.02)
+        (sub,) = bmc.subscriptions.values()
+        assert api.post(urlsplit(sub["Destination"]).path, json={"Events": [EVENT]}).status_code == 204
+        recent = api.get("/api/logs/recent").json()["logs"]
+        assert "PSU1 input lost" in [log["message"] for log in recent]
+    assert bmc.subscriptions == {}
+
+
+def test_event_and_polled_entry_share_the_record(api, bmc):
+    path = subscribe(api, bmc)
+    entry = "/redfish/v1/Managers/1/LogServices/Sel/Entries/7"
+    assert api.post(path, json={"Events": [{**EVENT, "LogEntry": {"@odata.id": entry}}]}).status_code == 204
+    polled = collector._normalize_redfish_entry(
+        {"@odata.id": entry, "Severity": "Critical", "Message": "PSU1 input lost"},
+        datetime.fromisoformat("2026-10-01T12:00:00+00:00"),
+        host="bmc1",
+        vendor="dell",
+    )
+    assert log_store.get_log_store().ingest(log_batch.LogBatch.from_records([polled]), source="poll") == 0
+
+    (stored,) = api.get("/api/logs", params={"host": "bmc1"}).json()["logs"]
+    assert stored["timestamp"].endswith(("Z", "+00:00"))  # UTC stays explicit in responses
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import functools
+
+import pytest
+
+import collector
+import ipmi_lan
+import log_cursor
+from fake_ipmi_bmc import FakeIpmiBmc, sel_record
+
+pytestmark = pytest.mark.anyio
+
+HOST = "127.0.0.1"
+
+
+@pytest.fixture
+async def bmc():
+    fake = await FakeIpmiBmc(suites=(2, 3, 16, 17)).start()
+    fake.records = [sel_record(i, 0x6500_0000 + i) for i in (1, 2, 5)]
+    yield fake
+    fake.stop()
+
+
+def client(bmc: FakeIpmiBmc, suite: int, password: str = "secret", **kwargs) -> ipmi_lan.IpmiLanClient:
+    return ipmi_lan.IpmiLanClient(HOST, "admin", password, port=bmc.port, cipher_suite=suite, timeout=0.2, **kwargs)
+
+
+@pytest.mark.parametrize("suite", [2, 3, 16, 17])
+async def test_session_setup_and_sel_read(bmc, suite):
+    async with client(bmc, suite) as c:
+        assert bmc.active
+        info = await c.get_sel_info()
+        assert (info.entries, info.last_add) == (3, bmc.last_add)
+        assert [r async for r in c.iter_sel()] == bmc.records
+        assert [r async for r in c.iter_sel(5)] == bmc.records[2:]
+    assert bmc.closed
+
+
+@pytest.mark.parametrize("suite, encrypted", [(2, False), (3, True), (16, False), (17, True)])
+async def test_in_session_packets_are_signed_and_encrypted_per_suite(bmc, suite, encrypted):
+    async with client(bmc, suite) as c:
+        await c.get_sel_entry(1)
+    session = [p for p in bmc.received + bmc.sent if p[5] & 0x3F == 0x00]
+    assert session and all(p[5] & 0x40 for p in session)  # integrity on every packet
+    assert all(bool(p[5] & 0x80) == encrypted for p in session)
+    assert any(bmc.records[0] in p for p in bmc.sent) != encrypted
+
+
+async def test_tampered_responses_are_rejected(bmc):
+    async with client(bmc, 17, retries=2) as c:
+        bmc.corrupt = True
+        with pytest.raises(ipmi_lan.IpmiLanTimeout):
+            await c.get_sel_info()
+        bmc.corrupt = False
+        assert (await c.get_sel_info()).entries == 3
+
+
+async def test_wrong_password_fails_rakp2(bmc):
+    with pytest.raises(ipmi_lan.IpmiLanError, match="wrong password"):
+        await client(bmc, 3, password="nope").connect()
+    assert not bmc.active
+
+
+async def test_unknown_user_is_rejected(bmc):
+    c = ipmi_lan.IpmiLanClient(HOST, "root", "secret", port=bmc.port, cipher_suite=3, timeout=0.2)
+    with pytest.raises(ipmi_lan.IpmiLanError, match="RAKP2 .* status 0x0d"):
+        await c.connect()
+
+
+async def test_unsupported_suite_is_rejected(bmc):
+    with pytest.raises(ipmi_lan.IpmiLanError, match="open session rejected"):
+        await client(bmc, 1).connect()
+
+
+async def test_fetch_ipmi_lan_logs_reads_only_new_records(bmc, monkeypatch):
+    monkeypatch.setattr(ipmi_lan, "IpmiLanClient", functools.partial(ipmi_lan.IpmiLanClient, port=bmc.port, timeout=0.2))
+    logs = await collector.fetch_ipmi_lan_logs(HOST, "admin", "secret", "dell", cipher_suite=17)
+    assert len(logs) == 3
+    assert log_cursor.get_cursors().get_sel(HOST).last_id == 5
+
+    bmc.records.append(sel_record(9, 0x6500_0009))
+    bmc.last_add += 9
+    logs = await collector.fetch_ipmi_lan_logs(HOST, "admin", "secret", "dell", cipher_suite=17)
+    assert len(logs) == 1
+    assert log_cursor.get_cursors().get_sel(HOST).last_id == 9
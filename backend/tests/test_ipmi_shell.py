@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+import ipmi_shell
+
+pytestmark = pytest.mark.anyio
+
+FAKE = str(Path(__file__).with_name("fake_ipmitool_shell.py"))
+
+
+class FakeShell(ipmi_shell.IpmiShell):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.args = [sys.executable, FAKE]
+
+
+@pytest.fixture(autouse=True)
+def fake_ipmitool(monkeypatch):
+    monkeypatch.setattr(ipmi_shell, "IpmiShell", FakeShell)
+
+
+async def test_outputs_are_split_per_command():
+    shell = FakeShell("bmc1", "u", "p")
+    try:
+        sel, echoed = await shell.run_many(["sel elist", "echo hello"], timeout=5)
+        assert sel.count("Asserted") == 2
+        assert echoed == "hello\n"
+    finally:
+        await shell.close()
+
+
+async def test_command_that_only_prints_an_error_raises():
+    shell = FakeShell("bmc1", "u", "p")
+    try:
+        with pytest.raises(ipmi_shell.IpmiError, match="Unable to get SEL Info") as info:
+            await shell.run_many(["echo before", "fail"], timeout=5)
+        assert not isinstance(info.value, ipmi_shell.ShellError)
+        # The stream is still in sync: the same process answers the next command.
+        proc = shell._proc
+        assert await shell.run("echo after", timeout=5) == "after\n"
+        assert shell._proc is proc
+    finally:
+        await shell.close()
+
+
+async def test_eviction_waits_for_a_busy_shell():
+    pool = ipmi_shell.ShellPool(max_shells=1)
+    busy = await pool.get("bmc1", "u", "p")
+    running = asyncio.create_task(busy.run("sleep 0.3", timeout=5))
+    await asyncio.sleep(0.1)
+    assert busy.busy
+
+    other = await pool.get("bmc2", "u", "p")
+    assert await running == "slept\n"  # not cut off by the eviction
+    assert not busy.alive
+    assert await other.run("echo hi", timeout=5) == "hi\n"
+    await pool.close_all()
+
+
+async def test_eviction_prefers_an_idle_shell():
+    pool = ipmi_shell.ShellPool(max_shells=2)
+    idle = await pool.get("bmc1", "u", "p")
+    await idle.run("echo warm", timeout=5)
+    busy = await pool.get("bmc2", "u", "p")
+    running = asyncio.create_task(busy.run("sleep 0.3", timeout=5))
+    await asyncio.sleep(0.1)
+
+    await pool.get("bmc3", "u", "p")
+    assert not idle.alive and busy.alive
+    assert await running == "slept\n"
+    await pool.close_all()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import log_batch
+from log_record import LogRecord, Severity
+
+BASE = datetime(2026, 10, 1)
+
+
+def rec(i: int, host: str = "bmc1", message: str = "") -> LogRecord:
+    return LogRecord(
+        BASE + timedelta(minutes=i), host, "dell", ("Power", "Cooling")[i % 2], Severity(i % 4),
+        message or f"msg {i}", f"sel:{i:x}",
+    )
+
+
+def test_records_round_trip():
+    recs = [rec(i) for i in range(10)] + [rec(10, message="팬 2 속도 경고 — ✓"), rec(11, message="")]
+    batch = log_batch.LogBatch.from_records(recs)
+    assert len(batch) == 12
+    assert batch.records() == recs
+    assert list(batch) == recs
+    assert batch.dictionaries["host"] == ["bmc1"] and batch.dictionaries["service"] == ["Power", "Cooling"]
+    assert len(log_batch.LogBatch.empty().records()) == 0
+
+
+def test_aware_timestamps_are_stored_as_naive_utc():
+    kst = timezone(timedelta(hours=9))
+    batch = log_batch.LogBatch.from_records([rec(0)._replace(timestamp=datetime(2026, 10, 1, 9, 0, tzinfo=kst))])
+    (record,) = batch.records()
+    assert record.timestamp == BASE and record.timestamp.tzinfo is None
+    assert batch.micros() == [(BASE - datetime(1970, 1, 1)) // timedelta(microseconds=1)]
+
+
+def test_take_and_concat_keep_rows_and_remap_codes():
+    a = log_batch.LogBatch.from_records([rec(i, host="bmc1") for i in range(4)])
+    b = log_batch.LogBatch.from_records([rec(i, host=h, message="é") for i, h in ((4, "bmc2"), (5, "bmc1"))])
+    both = log_batch.LogBatch.concat([a, log_batch.LogBatch.empty(), b])
+    assert both.records() == a.records() + b.records()
+    assert both.dictionaries["host"] == ["bmc1", "bmc2"]
+    assert both.count_by("host") == {"bmc1": 5, "bmc2": 1}
+
+    assert both.take(np.array([5, 0])).records() == [both.records()[5], both.records()[0]]
+    assert both.take(slice(1, 3)).records() == both.records()[1:3]
+    assert both.take(both.mask("host", {"bmc2"})).records() == [b.records()[0]]
+
+
+def test_filters_and_counts():
+    batch = log_batch.LogBatch.from_records([rec(i) for i in range(8)])
+    window = batch.between(BASE + timedelta(minutes=2), (BASE + timedelta(minutes=5)).replace(tzinfo=timezone.utc))
+    assert window.tolist() == [False, False, True, True, True, True, False, False]
+    assert batch.at_least(Severity.ERROR).sum() == 4
+    assert batch.severity_counts() == {s: 2 for s in Severity}
+    assert log_batch.LogBatch.empty().severity_counts() == {s: 0 for s in Severity}
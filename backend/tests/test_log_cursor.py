@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import log_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+def commit(store: log_cursor.CursorStore, last_id: int) -> None:
+    stage = store.stage()
+    stage.get_sel("bmc1").last_id = last_id
+    stage.commit()
+
+
+async def test_commits_are_saved_at_most_once_per_interval(state_dir):
+    store = log_cursor.CursorStore(save_interval=3600)
+    commit(store, 1)  # first commit writes (in a worker thread)
+    await asyncio.sleep(0.05)
+    assert log_cursor.CursorStore().get_sel("bmc1").last_id == 1
+
+    commit(store, 2)
+    commit(store, 3)
+    await asyncio.sleep(0.05)
+    assert log_cursor.CursorStore().get_sel("bmc1").last_id == 1
+
+    store.save()  # shutdown
+    assert log_cursor.CursorStore().get_sel("bmc1").last_id == 3
+
+
+def test_older_snapshot_never_overwrites_a_newer_one(state_dir):
+    store = log_cursor.CursorStore(save_interval=0)
+    commit(store, 1)
+    old = store._snapshot()
+    commit(store, 2)
+    store._write(*old)  # a slow background write finishing late
+    assert log_cursor.CursorStore().get_sel("bmc1").last_id == 2
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import inspect
+import os
+import stat
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+import log_batch
+import log_segments
+import log_store
+from log_record import LogRecord, Severity
+
+BASE = datetime(2026, 10, 1)
+
+
+def records(n: int, *, step: int = 3600) -> list:
+    return [
+        LogRecord(
+            BASE + timedelta(seconds=i * step),
+            f"h{i % 8}",
+            ("hpe", "dell")[i % 2],
+            "sel",
+            Severity(i % 4),
+            f"msg {i}",
+            f"id{i}",
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def recs() -> list:
+    return records(24 * 20)  # 20 days, one record per hour
+
+
+@pytest.fixture
+def store(state_dir, recs) -> log_segments.SegmentStore:
+    s = log_segments.SegmentStore(state_dir / "segments", shards=4, segment_rows=16, retention_days=0)
+    s.append(log_batch.LogBatch.from_records(recs))
+    s.flush()
+    return s
+
+
+def test_query_and_counts_match_a_plain_filter(store, recs):
+    start, end = BASE + timedelta(days=3), BASE + timedelta(days=5, hours=6)
+    inside = [r for r in recs if start <= r.timestamp <= end]
+    counts = Counter(r.severity for r in inside)
+    assert store.severity_counts(start=start, end=end) == {s: counts.get(s, 0) for s in Severity}
+
+    got = store.query(start=start, end=end, host="h3", min_severity=Severity.WARN, limit=5)
+    want = sorted((r for r in inside if r.host == "h3" and r.severity >= Severity.WARN), key=lambda r: r.timestamp)
+    assert got.records() == want[::-1][:5]
+
+
+def test_reopened_store_reads_footers(store, recs, state_dir):
+    again = log_segments.SegmentStore(state_dir / "segments", shards=4, segment_rows=16)
+    again.load()
+    assert again.stats()["records"] == len(recs)
+    assert len(again.query(limit=10_000)) == len(recs)
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_scans_do_not_keep_file_descriptors(store):
+    before = len(os.listdir("/proc/self/fd"))
+    assert store.stats()["segments"] > 40
+    for host in ("h0", "h1", "h2"):
+        store.query(host=host, limit=10_000)
+        store.severity_counts(host=host)
+    assert len(os.listdir("/proc/self/fd")) == before
+
+
+def test_unsealed_rows_survive_a_restart(state_dir, recs):
+    logs = log_store.LogStore(dedupe_window=0)
+    segments = log_segments.SegmentStore(state_dir / "segments", shards=4, segment_rows=10_000, retention_days=0)
+    segments.attach(logs)
+    segments.ingest(logs, log_batch.LogBatch.from_records(recs[:100]))
+    # Crash: the pending rows are never sealed.
+    assert segments.stats()["segments"] == 0
+    logs.close()
+
+    logs = log_store.LogStore(dedupe_window=0)
+    segments = log_segments.SegmentStore(state_dir / "segments", shards=4, segment_rows=10_000, retention_days=0)
+    segments.load()
+    segments.attach(logs)
+    segments.ingest(logs, log_batch.LogBatch.from_records(recs[50:120]))
+    assert len(segments.query(limit=10_000)) == 120
+
+    # Sealing moves the watermark and prunes the sealed rows from SQLite.
+    segments.flush()
+    assert logs.sealed_through() == logs.last_rowid
+    assert logs.stats()["records"] == 0
+    assert len(logs.unsealed()[0]) == 0
+    assert len(segments.query(limit=10_000)) == 120
+    logs.close()
+
+
+def test_segments_reach_disk_before_the_store_is_told(state_dir, recs, monkeypatch):
+    events = []
+    fsync = os.fsync
+
+    def recording_fsync(fd):
+        events.append("dir" if stat.S_ISDIR(os.fstat(fd).st_mode) else "file")
+        fsync(fd)
+
+    monkeypatch.setattr(log_segments.os, "fsync", recording_fsync)
+    logs = log_store.LogStore(dedupe_window=0)
+    segments = log_segments.SegmentStore(state_dir / "segments", shards=4, segment_rows=16, retention_days=0)
+    segments.attach(logs)
+    mark_sealed = segments.on_seal
+    segments.on_seal = lambda through: (events.append("seal"), mark_sealed(through))
+    segments.ingest(logs, log_batch.LogBatch.from_records(recs[:100]))
+    segments.flush()
+    logs.close()
+    assert events[-1] == "seal" and events.count("seal") == 1
+    assert events.count("file") == segments.stats()["segments"]
+    assert events.count("dir") >= events.count("file")
+
+
+def test_analysis_of_stored_logs_runs_off_the_event_loop(state_dir, recs):
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    assert not inspect.iscoroutinefunction(main.analyze_endpoint)
+    with TestClient(main.app) as api:
+        segments = log_segments.get_segments()
+        segments.append(log_batch.LogBatch.from_records(recs))
+        segments.flush()
+        res = api.post("/api/analyze", json={"bmc_host": "h1"}).json()
+    assert res["count"] == sum(r.host == "h1" for r in recs)
+    assert res["evidence"] and all("@h1]" in e for e in res["evidence"])
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+
+import collector
+import log_batch
+import log_store
+
+HOST = "bmc1"
+
+
+def sel(rid: int, ts: datetime, message: str) -> collector.LogRecord:
+    return collector.normalize_log(
+        timestamp=ts, host=HOST, vendor="dell", service="ipmi", severity="Critical", message=message,
+        record_id=f"sel:{rid:x}",
+    )
+
+
+def test_reused_sel_id_after_clear_is_stored():
+    # Why the timestamp stays in the unique key: (host, record_id) alone would drop these.
+    store = log_store.LogStore()
+    before = log_batch.LogBatch.from_records(
+        [sel(1, datetime(2026, 1, 1, 0, 0), "PSU1 input lost"), sel(2, datetime(2026, 1, 1, 0, 1), "Fan 2 failed")]
+    )
+    assert len(store.ingest_new(before)) == 2
+
+    # SEL cleared: record ids restart at 1 for new events.
+    after = log_batch.LogBatch.from_records(
+        [sel(1, datetime(2026, 2, 1, 0, 0), "Drive 3 fault"), sel(2, datetime(2026, 2, 1, 0, 5), "PSU2 input lost")]
+    )
+    new = store.ingest_new(log_batch.LogBatch.concat([before, after]))
+    assert [r.message for r in new] == ["Drive 3 fault", "PSU2 input lost"]
+    assert store.stats()["records"] == 4
+    assert store.ingest(after) == 0
+    store.close()
+
+
+def test_ingest_new_mask_with_repeated_ids_in_one_batch():
+    store = log_store.LogStore()
+    old = sel(1, datetime(2026, 1, 1), "old")
+    store.ingest(log_batch.LogBatch.from_records([old]))
+    batch = log_batch.LogBatch.from_records([old, sel(1, datetime(2026, 3, 1), "new"), sel(5, datetime(2026, 3, 2), "other")])
+    assert [r.message for r in store.ingest_new(batch)] == ["new", "other"]
+    store.close()
+
+
+def test_record_from_poll_and_event_is_stored_once():
+    store = log_store.LogStore()
+    entry = collector.normalize_log(
+        timestamp=datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc), host=HOST, vendor="dell", service="Power",
+        severity="Critical", message="PSU1 input lost", record_id="/redfish/v1/Managers/1/LogServices/Sel/Entries/7",
+    )
+    assert store.ingest(log_batch.LogBatch.from_records([entry]), source="event") == 1
+    assert store.ingest(log_batch.LogBatch.from_records([entry]), source="poll") == 0
+    assert store.stats()["records"] == 1
+    store.close()
+
+
+def test_per_source_copies_are_merged_on_open(state_dir):
+    path = state_dir / "old.db"
+    state_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE logs (ts INTEGER NOT NULL, host TEXT NOT NULL, source TEXT NOT NULL, record_id TEXT NOT NULL,"
+        " vendor TEXT NOT NULL, service TEXT NOT NULL, severity INTEGER NOT NULL, message TEXT NOT NULL);"
+        "CREATE UNIQUE INDEX logs_identity_ts ON logs (host, source, record_id, ts);"
+        "INSERT INTO logs VALUES (1, 'bmc1', 'event', 'e7', 'dell', 'Power', 3, 'PSU1 input lost');"
+        "INSERT INTO logs VALUES (1, 'bmc1', 'poll', 'e7', 'dell', 'Power', 3, 'PSU1 input lost');"
+        "INSERT INTO logs VALUES (2, 'bmc1', 'poll', 'e8', 'dell', 'Power', 0, 'PSU1 input restored');"
+    )
+    conn.close()
+    store = log_store.LogStore(path)
+    assert store.stats()["records"] == 2
+    store.close()
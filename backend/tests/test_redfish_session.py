@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import redfish_session
+from fake_redfish import ROOT, FakeRedfish
+
+pytestmark = pytest.mark.anyio
+
+HOST = "bmc1"
+
+
+@pytest.fixture
+def bmc() -> FakeRedfish:
+    return FakeRedfish(session_timeout=600)
+
+
+async def test_concurrent_401s_share_one_relogin(bmc):
+    pool, sessions = bmc.pool(), redfish_session.SessionCache()
+    first = await sessions.token(pool, HOST, "u", "p")
+    bmc.expire_sessions()
+
+    url = f"https://{HOST}{ROOT}/Systems"
+    responses = await asyncio.gather(*(sessions.get(pool, url, username="u", password="p") for _ in range(8)))
+    assert [r.status_code for r in responses] == [200] * 8
+    assert bmc.logins == 2
+    # The rejected session is still deleted once, in case the BMC kept it.
+    assert [r.url.path for r in bmc.requests if r.method == "DELETE"] == [first.location.split(HOST, 1)[1]]
+
+
+async def test_stale_session_is_deleted_and_ttl_comes_from_session_service(bmc):
+    pool, sessions = bmc.pool(), redfish_session.SessionCache(margin=60)
+    tok = await sessions.token(pool, HOST, "u", "p")
+    assert tok.ttl == 600
+
+    # Idle past SessionTimeout minus the margin: log in again and delete the old session.
+    tok.last_used -= 541
+    new = await sessions.token(pool, HOST, "u", "p")
+    assert new is not tok and bmc.logins == 2
+    assert bmc.deleted == [tok.location.split(HOST, 1)[1]]
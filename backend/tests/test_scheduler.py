@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+import collector
+import log_batch
+import pipeline
+import scheduler
+
+pytestmark = pytest.mark.anyio
+
+
+def records(n: int) -> list:
+    return [
+        collector.normalize_log(
+            timestamp=datetime(2026, 1, 1), host="dell0", vendor="dell", service="sel",
+            severity="OK", message=f"entry {i}", record_id=str(i),
+        )
+        for i in range(n)
+    ]
+
+
+def hosts(vendor: str, n: int) -> list:
+    return [scheduler.FleetHost(vendor=vendor, bmc_host=f"{vendor}{i}", username="u", password="p") for i in range(n)]
+
+
+class Tracker:
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.inflight = 0
+        self.peak = 0
+        self.started: dict = {}
+
+    async def collect(self, *, bmc_host: str, **kwargs) -> log_batch.LogBatch:
+        self.started[bmc_host] = time.perf_counter()
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        await asyncio.sleep(self.seconds)
+        self.inflight -= 1
+        return log_batch.LogBatch.empty()
+
+
+async def test_vendor_cap_does_not_hold_global_slots():
+    tracker = Tracker(0.1)
+    sched = scheduler.FleetScheduler(
+        concurrency=8, vendor_limits={"dell": 1}, start_rate=0, collect=tracker.collect
+    )
+    report = await sched.sweep(hosts("dell", 8) + hosts("hpe", 8))
+    assert not report.failed
+    # One dell (its cap) plus seven hpe fill all eight global slots.
+    assert tracker.peak == 8
+
+
+async def test_host_starts_are_staggered():
+    tracker = Tracker(0.0)
+    sched = scheduler.FleetScheduler(concurrency=64, start_rate=100, collect=tracker.collect)
+    await sched.sweep(hosts("hpe", 20))
+    starts = sorted(tracker.started.values())
+    assert starts[-1] - starts[0] >= 0.15  # 20 hosts at 100/s
+
+
+def test_load_inventory(tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps([{"vendor": "dell", "bmc_host": "10.0.0.1", "username": "u", "password": "p"}, {"vendor": "hpe"}]))
+    assert scheduler.load_inventory(path) == [scheduler.FleetHost("dell", "10.0.0.1", "u", "p")]
+    assert scheduler.load_inventory(tmp_path / "missing.json") == []
+
+
+async def test_sweep_publishes_pages_as_they_arrive():
+    published: list = []
+    pipeline.get_pipeline().add_sink(lambda batch, source: published.append(len(batch)))
+
+    async def streaming(*, sink, **kwargs) -> log_batch.LogBatch:
+        for n in (2, 2, 1):
+            await sink(log_batch.LogBatch.from_records(records(n)))
+        return log_batch.LogBatch.empty()
+
+    sched = scheduler.FleetScheduler(start_rate=0, collect=streaming)
+    report = await sched.sweep(hosts("dell", 1))
+    assert published == [2, 2, 1]
+    assert report.summary()["logs"] == 5
+
+
+def test_vendor_limits_below_one_are_clamped_or_rejected():
+    from pydantic import ValidationError
+
+    from app import main
+
+    assert scheduler.FleetScheduler(vendor_limits={"dell": 0, "hpe": -2}).vendor_limits == {"dell": 1, "hpe": 1}
+    with pytest.raises(ValidationError):
+        main.FleetSweepRequest(servers=[], vendor_limits={"dell": 0})
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import capabilities
+import collector
+import sdr_cache
+
+pytestmark = pytest.mark.anyio
+
+BASE = ["ipmitool", "-H", "bmc1"]
+
+
+class Bmc:
+    """ipmitool stand-in: ``dump_error`` makes ``sdr dump`` fail with that exception."""
+
+    def __init__(self) -> None:
+        self.calls: list = []
+        self.dump_error: Exception | None = None
+
+    async def run(self, args: list, **kwargs) -> str:
+        self.calls.append(args)
+        if args[-2:] == ["mc", "info"]:
+            return "Firmware Revision         : 1.71\n"
+        if "dump" in args:
+            if self.dump_error is not None:
+                raise self.dump_error
+            Path(args[-1]).write_bytes(b"sdr")
+            return ""
+        if args[-2:] == ["sdr", "elist"]:
+            return "Fan1             | 41h | ok  |  7.1 | 3000 RPM\n"
+        return ""
+
+
+async def test_transient_failure_backs_off_then_retries(state_dir, monkeypatch):
+    bmc, cache = Bmc(), sdr_cache.SdrCache(retry=300)
+    bmc.dump_error = collector.IpmiTimeout("ipmitool timed out after 30s")
+    assert await cache.ensure("bmc1", BASE, bmc.run) is None
+    assert await cache.ensure("bmc1", BASE, bmc.run) is None  # backing off: no new dump
+    assert sum("dump" in c for c in bmc.calls) == 1
+
+    bmc.dump_error = None
+    monkeypatch.setattr(sdr_cache.time, "monotonic", lambda: 1e12)
+    path = await cache.ensure("bmc1", BASE, bmc.run)
+    assert path is not None and path.read_bytes() == b"sdr"
+
+
+async def test_rejected_dump_marks_the_host_unsupported(state_dir):
+    bmc, cache = Bmc(), sdr_cache.SdrCache(retry=0)
+    bmc.dump_error = collector.IpmiError("ipmitool failed", stderr="Get SDR command failed: Invalid command")
+    assert await cache.ensure("bmc1", BASE, bmc.run) is None
+    bmc.dump_error = None
+    assert await cache.ensure("bmc1", BASE, bmc.run) is None
+    assert sum("dump" in c for c in bmc.calls) == 1
+
+
+async def test_collect_reads_sensors_through_the_cache(state_dir, monkeypatch):
+    bmc = Bmc()
+    monkeypatch.setattr(collector, "run_ipmitool", bmc.run)
+    result = await collector.collect(
+        vendor="supermicro", bmc_host="bmc1", username="u", password="p",
+        prefer_redfish=False, ipmi_shell=False, ipmi_sensors=True,
+    )
+    assert [(s.host, s.sensor, s.value) for s in result.samples] == [("bmc1", "Fan1", 3000.0)]
+    assert len(result.logs) == 0
+    assert any("-S" in c and c[-2:] == ["sdr", "elist"] for c in bmc.calls)
+
+
+@pytest.mark.parametrize(
+    "error, verdict",
+    [
+        (collector.IpmiTimeout("ipmitool timed out after 30s"), None),
+        (collector.IpmiError("ipmitool failed", stderr="Get SDR command failed: Invalid command"), False),
+    ],
+)
+async def test_only_a_rejected_dump_is_recorded_in_the_profile(state_dir, monkeypatch, error, verdict):
+    bmc = Bmc()
+    bmc.dump_error = error
+    monkeypatch.setattr(collector, "run_ipmitool", bmc.run)
+    await collector.collect(
+        vendor="supermicro", bmc_host="bmc1", username="u", password="p",
+        prefer_redfish=False, ipmi_shell=False, ipmi_sensors=True,
+    )
+    assert capabilities.get_profiles().get("bmc1").sdr_cache is verdict
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import ast
+import pathlib
+from datetime import datetime
+
+import pytest
+
+import sel_decode
+from log_record import Severity
+
+TABLES = ("THRESHOLD_EVENTS", "GENERIC_EVENTS", "SENSOR_SPECIFIC_EVENTS")
+
+
+def test_event_tables_have_no_duplicate_keys():
+    tree = ast.parse(pathlib.Path(sel_decode.__file__).read_text())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.AnnAssign) and getattr(node.target, "id", None) in TABLES:
+            keys = [ast.literal_eval(k) for k in node.value.keys]
+            assert len(keys) == len(set(keys)), node.target.id
+
+
+def test_elist_severity_uses_the_sensor_type():
+    assert sel_decode.elist_severity("Power Supply PSU1", "Failure detected", "Asserted") == Severity.CRITICAL
+    assert sel_decode.elist_severity("Watchdog 2 WD", "Timer expired", "Asserted") == Severity.WARN
+    assert sel_decode.elist_severity("Processor CPU0", "Presence detected", "Asserted") == Severity.INFO
+    assert sel_decode.elist_severity("Processor CPU0", "No such event", "Asserted") is None
+
+
+WHEN = 1_790_000_000  # 2026-09-21, wall clock
+
+
+def raw(rid: int, stype: int, snum: int, event: int, data1: int, *, rtype: int = 0x02, ts: int = WHEN) -> bytes:
+    return sel_decode.RECORD_STRUCT.pack(rid, rtype, ts, 0x20, 0x04, stype, snum, event, data1, 0xFF, 0xFF)
+
+
+DUMP = b"".join(
+    [
+        raw(1, 0x08, 0x31, 0x6F, 0x01),  # PSU failure asserted
+        raw(2, 0x08, 0x31, 0xEF, 0x01),  # ... and deasserted: a recovery
+        raw(3, 0x01, 0x30, 0x01, 0x09),  # upper critical going high
+        raw(4, 0x04, 0x41, 0x01, 0x07, ts=0x100),  # seconds since BMC init
+        raw(5, 0x07, 0x01, 0x6F, 0x0F),  # offset with no description
+        sel_decode.RECORD_STRUCT.pack(6, 0xE0, 0x01020304, 0x0605, 0x07, 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D),
+        b"\x07\x00",  # trailing partial record
+    ]
+)
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_sel_to_logs(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(sel_decode, "np", None)
+    logs = sel_decode.sel_to_logs(DUMP, host="bmc1", vendor="dell", sensor_names={0x30: "Inlet Temp"})
+    assert [r.record_id for r in logs] == [f"sel:{i}" for i in range(1, 7)]
+    assert [(r.message, r.severity) for r in logs] == [
+        ("Power Supply #0x31 | Failure detected | Asserted", Severity.CRITICAL),
+        ("Power Supply #0x31 | Failure detected | Deasserted", Severity.INFO),
+        ("Inlet Temp | Upper Critical going high | Asserted", Severity.CRITICAL),
+        ("Fan #0x41 | Upper Non-critical going high | Asserted", Severity.WARN),
+        (f"Processor #0x01 | {sel_decode.DESCRIPTIONS[0]} | Asserted", Severity.INFO),
+        ("OEM record type 0xe0: 0403020105060708090a0b0c0d", Severity.INFO),
+    ]
+    assert logs[0].timestamp == datetime.utcfromtimestamp(WHEN)
+    assert logs[3].timestamp > datetime(2026, 1, 1)  # pre-init time: read time instead
+    assert logs[3].timestamp == logs[5].timestamp
+
+
+def test_decode_paths_agree(monkeypatch):
+    fast = sel_decode.decode_sel(DUMP)
+    monkeypatch.setattr(sel_decode, "np", None)
+    slow = sel_decode.decode_sel(DUMP)
+    assert len(fast) == len(slow) == 6
+    for name in ("record_id", "record_type", "timestamp", "sensor_type", "deasserted", "event_code", "severity_code"):
+        assert [int(v) for v in getattr(fast, name)] == [int(v) for v in getattr(slow, name)], name
+    assert fast.oem == slow.oem
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+
+import collector
+import sensor_store
+
+T0 = datetime(2024, 5, 1)
+
+
+def bits(value: float) -> bytes:
+    return struct.pack(">d", value)
+
+
+@pytest.mark.parametrize(
+    "ts",
+    [
+        [1_700_000_000],
+        [1_700_000_000 + 60 * i for i in range(200)],  # steady polling: one bit per sample
+        [0, 1, 3, 70, 200, 199_000, 199_001, 5_000_000, 5_000_000 - 2_000_000_000],
+        [10, 10 + (1 << 31) - 1, 10 + 2 * ((1 << 31) - 1)],  # largest jump that still fits
+    ],
+)
+def test_timestamps_round_trip(ts):
+    assert sensor_store.decode_timestamps(sensor_store.encode_timestamps(ts), len(ts)) == ts
+
+
+def test_steady_timestamps_cost_a_bit_each():
+    ts = [1_700_000_000 + 60 * i for i in range(1001)]
+    # 64-bit first value, one 7-bit bucket for the first delta, then single zero bits.
+    assert len(sensor_store.encode_timestamps(ts)) <= (64 + 9 + 999 + 7) // 8
+
+
+@pytest.mark.parametrize("dod", [1 << 31, -(1 << 31) - 1, 1 << 40])
+def test_delta_of_delta_beyond_32_bits_is_refused(dod):
+    with pytest.raises(ValueError):
+        sensor_store.encode_timestamps([0, 0, dod])
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [42.0],
+        [3000.0] * 50,
+        [21.5, 21.5, 21.75, 22.0, 21.0, -3.25, 1e300, 5e-324, 0.0, -0.0, 12.125],
+        [math.inf, -math.inf, math.nan, 1.0, math.nan],
+    ],
+)
+def test_values_round_trip_bit_for_bit(values):
+    decoded = sensor_store.decode_values(sensor_store.encode_values(values), len(values))
+    assert [bits(v) for v in decoded] == [bits(v) for v in values]
+
+
+def test_a_gap_too_big_for_a_chunk_starts_a_new_one(state_dir):
+    store = sensor_store.SensorStore(chunk_size=100)
+    times = [T0, T0 + timedelta(seconds=60), T0 + timedelta(seconds=60 + (1 << 31) + 60)]
+    times.append(times[-1] + timedelta(seconds=60))
+    for i, t in enumerate(times):
+        assert store.add("bmc1", "Fan1", t, float(i))
+    series = store._series[("bmc1", "Fan1")]
+    assert [c.count for c in series.chunks] == [2]
+    store.save()
+
+    loaded = sensor_store.SensorStore()
+    loaded.load()
+    ts, values = loaded.query("bmc1", "Fan1", T0, times[-1])
+    assert ts.tolist() == [sensor_store.epoch_seconds(t) for t in times]
+    assert values.tolist() == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_samples_are_saved_as_they_come_in(state_dir):
+    store = sensor_store.SensorStore(save_interval=0)
+    samples = [sensor_store.SensorSample(T0 + timedelta(minutes=i), "bmc1", "Temp", 40.0 + i) for i in range(3)]
+    assert store.ingest(samples) == 3  # no event loop: written inline
+
+    loaded = sensor_store.SensorStore()
+    loaded.load()  # open heads were written too
+    assert loaded.query("bmc1", "Temp", T0, T0 + timedelta(hours=1))[1].tolist() == [40.0, 41.0, 42.0]
+
+    loaded.add("bmc1", "Temp", T0 + timedelta(minutes=3), 43.0)
+    assert loaded.add("bmc1", "Temp", T0 + timedelta(minutes=2), 0.0) is False  # already stored
+
+
+def test_saves_are_throttled(state_dir):
+    store = sensor_store.SensorStore(save_interval=3600)
+    store.ingest([sensor_store.SensorSample(T0, "bmc1", "Temp", 40.0)])
+    store.ingest([sensor_store.SensorSample(T0 + timedelta(minutes=1), "bmc1", "Temp", 41.0)])
+    loaded = sensor_store.SensorStore()
+    loaded.load()
+    assert loaded.stats()["samples"] == 1
+
+    store.save()  # shutdown
+    loaded = sensor_store.SensorStore()
+    loaded.load()
+    assert loaded.stats()["samples"] == 2
+
+
+def test_ipmitool_readings_become_samples():
+    sensor = (
+        "Fan1             | 3000.000   | RPM        | ok    | na | na\n"
+        "CPU Temp         | 45.000     | degrees C  | ok    | na | na\n"
+        "PS1 Status       | 0x1        | discrete   | 0x0100| na | na\n"
+        "Fan2             | na         | RPM        | na    | na | na\n"
+    )
+    sdr = (
+        "Fan1             | 41h | ok  |  7.1 | 3000 RPM\n"
+        "Inlet Temp       | 04h | ok  |  7.1 | 23 degrees C\n"
+        "PS1 Status       | c8h | ok  | 10.1 | Presence detected\n"
+        "Fan3             | 43h | ns  |  7.3 | No Reading\n"
+    )
+    assert [(s.host, s.sensor, s.value) for s in collector.parse_ipmi_sensor(sensor, host="bmc1")] == [
+        ("bmc1", "Fan1", 3000.0),
+        ("bmc1", "CPU Temp", 45.0),
+    ]
+    assert [(s.sensor, s.value) for s in collector.parse_ipmi_sdr(sdr, host="bmc1")] == [
+        ("Fan1", 3000.0),
+        ("Inlet Temp", 23.0),
+    ]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+import http_pool
+import redfish_session
+import telemetry
+from fake_redfish import SSE, FakeRedfish
+
+pytestmark = pytest.mark.anyio
+
+REPORT = {
+    "Id": "PowerMetrics",
+    "Timestamp": "2026-10-01T12:00:00Z",
+    "MetricValues": [
+        {"MetricProperty": "/redfish/v1/Chassis/1/Power#/PowerControl/0/PowerConsumedWatts", "MetricValue": "412"},
+        {"MetricId": "Fan1", "MetricValue": "n/a"},
+    ],
+}
+
+
+@pytest.fixture
+def bmc() -> FakeRedfish:
+    fake = FakeRedfish()
+    fake.sse_reports = [REPORT, {"Id": "ignored"}]
+    http_pool.set_pool(fake.pool())
+    return fake
+
+
+async def test_sse_stream_yields_metric_reports(bmc):
+    batches = [samples async for samples in telemetry.stream_metric_reports("bmc1", "u", "p")]
+    assert [[(s.sensor, s.value) for s in b] for b in batches] == [
+        [("/Chassis/1/Power#/PowerControl/0/PowerConsumedWatts", 412.0)]
+    ]
+
+
+async def test_sse_stream_reauthenticates_on_401(bmc):
+    sessions = redfish_session.get_sessions()
+    await sessions.token(http_pool.get_pool(), "bmc1", "u", "p")
+    bmc.reject_once.add(SSE)
+
+    batches = [samples async for samples in telemetry.stream_metric_reports("bmc1", "u", "p")]
+    assert len(batches) == 1
+    assert bmc.logins == 2
+    assert [r.url.path for r in bmc.requests].count(SSE) == 2
+
+
+class SessionsNeverLast(FakeRedfish):
+    async def handle(self, request):
+        if request.url.path == SSE:
+            self.expire_sessions()
+        return await super().handle(request)
+
+
+async def test_sse_stream_gives_up_after_one_relogin():
+    bmc = SessionsNeverLast()
+    http_pool.set_pool(bmc.pool())
+    with pytest.raises(httpx.HTTPStatusError):
+        async for _ in telemetry.stream_metric_reports("bmc1", "u", "p"):
+            pass
+    assert [r.url.path for r in bmc.requests].count(SSE) == 2